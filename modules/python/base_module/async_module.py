@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+asyncio integration for DDS modules
+
+cyclonedds' own take_aiter parks a thread-pool thread in a WaitSet for every
+reader. Here each reader instead gets a listener whose on_data_available
+callback (run on the participant's existing receive thread) schedules a
+wake-up on the event loop, so any number of topics are multiplexed on one
+loop thread. Wake-ups are coalesced: at most one is in flight per reader, and
+the consumer drains everything available each time it wakes.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, List, Optional, Union
+
+from base_module import BaseDDSModule, ModuleState
+
+from cyclonedds.core import Listener, Qos
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.topic import Topic
+
+
+class AsyncReader:
+    """`async for sample in reader` over a DataReader"""
+
+    def __init__(self, reader: DataReader, loop: asyncio.AbstractEventLoop, batch: int = 64):
+        self.reader = reader
+        self.batch = batch
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._scheduled = False
+        self._closed = False
+        reader.set_listener(Listener(on_data_available=self._on_data_available))
+
+    def _on_data_available(self, reader) -> None:
+        # DDS receive thread: only hand off, never take here
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        self._scheduled = False
+        self._ready.set()
+
+    async def take(self) -> List[Any]:
+        """Wait until samples are available and take up to batch of them"""
+        while not self._closed:
+            samples = self.reader.take(N=self.batch)
+            if samples:
+                return samples
+            self._ready.clear()
+            # Data that arrived between the take and the clear already re-armed the listener
+            samples = self.reader.take(N=self.batch)
+            if samples:
+                return samples
+            await self._ready.wait()
+        return []
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while not self._closed:
+            for sample in await self.take():
+                yield sample
+
+    def close(self) -> None:
+        self._closed = True
+        self.reader.set_listener(None)
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+
+class AsyncWriter:
+    """`await writer.write(sample)` over a DataWriter
+
+    Best-effort and keep-last writes never block, so they are made inline on
+    the loop thread. A reliable writer whose history is full can block for up
+    to its max_blocking_time; pass offload=True to move those writes to the
+    loop's default executor instead.
+    """
+
+    def __init__(self, writer: DataWriter, loop: asyncio.AbstractEventLoop, offload: bool = False):
+        self.writer = writer
+        self._loop = loop
+        self.offload = offload
+
+    async def write(self, sample: Any) -> None:
+        if self.offload:
+            await self._loop.run_in_executor(None, self.writer.write, sample)
+        else:
+            self.writer.write(sample)
+
+
+class AsyncDDSModule(BaseDDSModule):
+    """BaseDDSModule driven by an asyncio event loop instead of the WaitSet executor
+
+    Config messages, heartbeat and metrics run as tasks on the loop; subclasses
+    add their own with reader()/writer()/every()/spawn() and implement
+    main() as a coroutine.
+    """
+
+    def __init__(self, module_id: str, debug_level: int = 0, domain_id: int = 0, qos: Qos = None,
+                 log_config: dict = None):
+        super().__init__(module_id, debug_level=debug_level, domain_id=domain_id, qos=qos,
+                         log_config=log_config)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._readers: List[AsyncReader] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def reader(self, topic_name: str, data_type: type, qos: Qos = None, batch: int = 64) -> AsyncReader:
+        reader = AsyncReader(DataReader(self.participant, Topic(self.participant, topic_name, data_type),
+                                        qos=qos), self.loop, batch)
+        self._readers.append(reader)
+        return reader
+
+    def writer(self, topic_name: str, data_type: type, qos: Qos = None,
+               offload: bool = False) -> AsyncWriter:
+        return AsyncWriter(DataWriter(self.participant, Topic(self.participant, topic_name, data_type),
+                                      qos=qos), self.loop, offload)
+
+    def spawn(self, coro: Awaitable) -> asyncio.Task:
+        task = self.loop.create_task(coro)
+        self._tasks.append(task)
+        return task
+
+    def every(self, interval_s: float, callback: Callable[[], Union[None, Awaitable]]) -> asyncio.Task:
+        """Run callback (plain function or coroutine function) on monotonic deadlines"""
+        async def tick():
+            deadline = self.loop.time()
+            while True:
+                deadline += interval_s
+                await asyncio.sleep(max(0.0, deadline - self.loop.time()))
+                try:
+                    result = callback()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    self.error(f"Timer callback failed: {e!r}")
+        return self.spawn(tick())
+
+    async def main(self) -> None:
+        """Module body; the default just waits for request_stop()"""
+        await self._stop_event.wait()
+
+    async def run_async(self) -> None:
+        """Run the module on the current event loop until request_stop()"""
+        self.loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        config = AsyncReader(self.subscriber, self.loop)
+        self._readers.append(config)
+        self.spawn(self._config_loop(config))
+        self.every(self.heartbeat_interval_s, self.publish_heartbeat)
+        self.every(self.metrics_interval_s, self.publish_metrics)
+        self.status = ModuleState.Running
+        try:
+            body = self.spawn(self.main())
+            await asyncio.wait([body, self.spawn(self._stop_event.wait())],
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.status = ModuleState.Stopping
+            for reader in self._readers:
+                reader.close()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks.clear()
+            self.status = ModuleState.Stopped
+
+    async def _config_loop(self, config: AsyncReader) -> None:
+        async for sample in config:
+            self._apply_config(sample)
+
+    def request_stop(self) -> None:
+        """Thread-safe; also stops the WaitSet executor if it is being used"""
+        super().request_stop()
+        if self.loop is not None and self._stop_event is not None:
+            self.loop.call_soon_threadsafe(self._stop_event.set)
@@ -4,15 +4,26 @@
 from abc import ABC #? maybe
 from dataclasses import dataclass
 from enum import Enum
+import heapq
+import itertools
+import json
+import sys
 import time
+import threading
+from typing import Callable, List, Optional
+
+from metrics import ModuleMetrics
+from log_transport import AsyncLogTransport, level_from_name
 try:
-    import cyclonedds
-    from cyclonedds.domain import DomainParticipant, Qos
+    from cyclonedds.domain import DomainParticipant
     from cyclonedds.topic import Topic
     from cyclonedds.pub import DataWriter
     from cyclonedds.sub import DataReader
-    from cyclonedds.core import WaitSet
+    from cyclonedds.core import (WaitSet, Qos, GuardCondition, ReadCondition,
+                                 SampleState, ViewState, InstanceState)
     from cyclonedds.idl import IdlStruct
+    from cyclonedds.util import duration
+    from dashcam_types import PerformanceMetrics
     HAS_DDS = True
 except ImportError:
     print("Warning: CycloneDDS not available, running in stub mode")
@@ -20,19 +31,19 @@ except ImportError:
 
 
 class LogLevels(Enum):
-    Debug=0,
-    Info=1,
-    Warn=2,
-    Error=3,
-    Critical=4,
+    Debug=0
+    Info=1
+    Warn=2
+    Error=3
+    Critical=4
     
 
 class ModuleState(Enum):
-    Unknown=0,
-    Starting=1,
-    Running=2,
-    Stopping=3,
-    Stopped=4,
+    Unknown=0
+    Starting=1
+    Running=2
+    Stopping=3
+    Stopped=4
     Error=5
 
 @dataclass
@@ -45,9 +56,175 @@ class logmsg(IdlStruct,typename="log.Msg"):
     module_id:str
     log_level:int
     msg:str
+@dataclass
+class configmsg(IdlStruct,typename="config.Msg"):
+    config_json:str
+
+
+class Timer:
+    def __init__(self, interval_ticks:int, callback:Callable[[], None], periodic:bool):
+        self.interval_ticks = interval_ticks
+        self.callback = callback
+        self.periodic = periodic
+        self.due_tick = 0
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timing wheel; firing is O(1) per timer
+
+    Periodic timers are rescheduled from their previous due tick, so they do
+    not drift with executor latency; if the executor falls a whole interval
+    behind, the missed firings are skipped rather than run back to back.
+    Due ticks are also kept in a heap so the executor can find the next
+    deadline without scanning the wheel.
+    """
+    def __init__(self, tick_s:float=0.01, slots:int=512, clock:Callable[[], float]=time.monotonic):
+        self.tick_s = tick_s
+        self.clock = clock
+        self.slots:List[List[Timer]] = [[] for _ in range(slots)]
+        self.current_tick = self._now_tick()
+        # (due_tick, order, timer); entries go stale when a timer fires, is
+        # rescheduled or cancelled and are dropped lazily in next_timeout()
+        self._deadlines:List[tuple] = []
+        self._order = itertools.count()
+
+    def _now_tick(self) -> int:
+        return int(self.clock() / self.tick_s)
+
+    def schedule(self, interval_s:float, callback:Callable[[], None], periodic:bool=True) -> Timer:
+        timer = Timer(max(1, round(interval_s / self.tick_s)), callback, periodic)
+        self._insert(timer, self._now_tick() + timer.interval_ticks)
+        return timer
+
+    def _insert(self, timer:Timer, due_tick:int) -> None:
+        timer.due_tick = due_tick
+        self.slots[due_tick % len(self.slots)].append(timer)
+        heapq.heappush(self._deadlines, (due_tick, next(self._order), timer))
+
+    def advance(self) -> List[Timer]:
+        """Collect the timers that are due and reschedule the periodic ones"""
+        now_tick = self._now_tick()
+        fired = []
+        # A gap longer than the wheel visits every slot exactly once
+        for i in range(1, min(now_tick - self.current_tick, len(self.slots)) + 1):
+            slot = self.slots[(self.current_tick + i) % len(self.slots)]
+            if not slot:
+                continue
+            pending = []
+            for timer in slot:
+                if timer.cancelled:
+                    continue
+                if timer.due_tick <= now_tick:
+                    fired.append(timer)
+                else:
+                    pending.append(timer)
+            slot[:] = pending
+        self.current_tick = max(self.current_tick, now_tick)
+        for timer in fired:
+            if timer.periodic:
+                due_tick = timer.due_tick + timer.interval_ticks
+                if due_tick <= now_tick:
+                    due_tick = now_tick + timer.interval_ticks
+                self._insert(timer, due_tick)
+        return fired
+
+    def next_timeout(self) -> float:
+        """Seconds until the next due timer, at most one revolution of the wheel"""
+        revolution = len(self.slots) * self.tick_s
+        deadlines = self._deadlines
+        while deadlines:
+            due_tick, _, timer = deadlines[0]
+            if timer.cancelled or timer.due_tick != due_tick or due_tick <= self.current_tick:
+                heapq.heappop(deadlines)
+                continue
+            return min(revolution, max(0.0, due_tick * self.tick_s - self.clock()))
+        return revolution
+
+
+class ModuleExecutor:
+    """Single-threaded dispatcher for a module's DDS conditions and timers
+
+    Read conditions and guard conditions are attached to one WaitSet; the
+    executor thread blocks in it until data arrives, a guard is set or the
+    next timer is due, so an idle module does not poll.
+    """
+    def __init__(self, participant:"DomainParticipant", tick_s:float=0.01,
+                 on_error:Optional[Callable[[Exception], None]]=None):
+        self.waitset = WaitSet(participant)
+        self.on_error = on_error
+        self.timers = TimerWheel(tick_s)
+        self.wakeup = GuardCondition(participant)
+        self._handlers = []
+        self._stopping = False
+        self.thread_id:Optional[int] = None
+        self.add_guard(self.wakeup, lambda: None)
+
+    def add_reader(self, reader:"DataReader", callback:Callable[["DataReader"], None],
+                   mask:int=None) -> "ReadCondition":
+        """Call callback(reader) on the executor thread whenever unread samples are available"""
+        if mask is None:
+            mask = SampleState.NotRead | ViewState.Any | InstanceState.Any
+        condition = ReadCondition(reader, mask)
+        self._attach(condition, lambda: callback(reader), guard=False)
+        return condition
+
+    def add_guard(self, guard:"GuardCondition", callback:Callable[[], None]) -> None:
+        self._attach(guard, callback, guard=True)
+
+    def _attach(self, condition, callback, guard:bool) -> None:
+        self.waitset.attach(condition)
+        self._handlers.append((condition, callback, guard))
+
+    def remove(self, condition) -> None:
+        self.waitset.detach(condition)
+        self._handlers = [h for h in self._handlers if h[0] is not condition]
+
+    def add_timer(self, interval_s:float, callback:Callable[[], None], periodic:bool=True) -> Timer:
+        timer = self.timers.schedule(interval_s, callback, periodic)
+        self.wake()
+        return timer
+
+    def wake(self) -> None:
+        self.wakeup.set(True)
+
+    def spin_once(self, timeout_s:Optional[float]=None) -> None:
+        self.thread_id = threading.get_ident()
+        timeout = self.timers.next_timeout()
+        if timeout_s is not None:
+            timeout = min(timeout, timeout_s)
+        if self.waitset.wait(duration(seconds=timeout)) > 0:
+            for condition, callback, guard in list(self._handlers):
+                triggered = condition.take() if guard else condition.triggered
+                if triggered:
+                    self._dispatch(callback)
+        for timer in self.timers.advance():
+            self._dispatch(timer.callback)
+
+    def _dispatch(self, callback:Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            self.on_error(e)
+
+    def spin(self, stop_event:Optional[threading.Event]=None) -> None:
+        """Dispatch until stop() is called or stop_event is set"""
+        self._stopping = False
+        while not self._stopping and not (stop_event and stop_event.is_set()):
+            self.spin_once()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self.wake()
 
 class BaseDDSModule:
-    def __init__ (self, module_id:str, debug_level:int=0,domain_id:int=0,qos:Qos=None):
+    def __init__ (self, module_id:str, debug_level:int=0,domain_id:int=0,qos:Qos=None,
+                  log_config:dict=None):
         if not HAS_DDS:
             raise RuntimeError("CycloneDDS is not available")
         # Initialize DDS participant, topics, publishers, subscribers here
@@ -56,26 +233,63 @@ class BaseDDSModule:
         self.qos = qos
         
         
-        self.participant = DomainParticipant(domain_id=domain_id, qos_profile=self.qos)
+        self.participant = DomainParticipant(domain_id=domain_id, qos=self.qos)
         # dynamic configure topic and subscriber based on module_id
-        self.configure_topic:Topic = Topic(self.participant, f"/{module_id}/config", str)
-        self.subscriber:DataReader = DataReader(self.participant, self.configure_topic, self.configure_callback)
+        self.configure_topic:Topic = Topic(self.participant, f"/{module_id}/config", configmsg)
+        self.subscriber:DataReader = DataReader(self.participant, self.configure_topic)
         
-        self.logging_topic:Topic = Topic(self.participant, f"/logging", logmsg) 
+        self.logging_topic:Topic = Topic(self.participant, "/logging", logmsg) 
         self.logger:DataWriter = DataWriter(self.participant, self.logging_topic)
+        self.log_transport = self._init_log_transport(log_config or {})
         
-        self.heartbeat_topic:Topic = Topic(self.participant, f"/heartbeat", heartbeat) 
+        self.heartbeat_topic:Topic = Topic(self.participant, "/heartbeat", heartbeat) 
         self.heartbeater:DataWriter = DataWriter(self.participant, self.heartbeat_topic)
         
-        self.topic:Topic = Topic(self.participant, "ExampleTopic", str)
-        self.publisher:DataWriter = DataWriter(self.participant, self.topic)
-        self.subscriber:DataReader = DataReader(self.participant, self.topic, self.on_data_received)
+        self.metrics_topic:Topic = Topic(self.participant, "/metrics", PerformanceMetrics)
+        self.metrics_writer:DataWriter = DataWriter(self.participant, self.metrics_topic)
+        self.metrics = ModuleMetrics()
+        self.metrics_interval_s = 1.0
+        self.heartbeat_interval_s = 1.0
         
-        self.waitset = WaitSet(self.participant)
+        # Config messages, heartbeat and metrics are all dispatched on the executor thread
+        self.executor = ModuleExecutor(self.participant,
+                                       on_error=lambda e: self.error(f"Executor callback failed: {e!r}"))
+        self.waitset = self.executor.waitset
+        self.executor.add_reader(self.subscriber, self._on_config_available)
+        self.executor.add_timer(self.heartbeat_interval_s, self.publish_heartbeat)
+        self.executor.add_timer(self.metrics_interval_s, self.publish_metrics)
         
-        self.status = ModuleState('Starting')
+        self.status = ModuleState.Starting
         
     
+    def _init_log_transport(self, log_config:dict) -> AsyncLogTransport:
+        """Log records are written to DDS (and optionally a rotating file) off the caller's thread"""
+        transport = AsyncLogTransport(
+            self.module_id,
+            level=level_from_name(log_config.get("level", self.debug_level), self.debug_level),
+            queue_size=log_config.get("queue_size", 4096),
+            rate_limit_burst=log_config.get("rate_limit_burst", 10),
+            rate_limit_window_s=log_config.get("rate_limit_window_s", 5.0))
+        transport.add_sink(self._write_log_batch)
+        if log_config.get("file"):
+            transport.add_file_sink(log_config["file"], log_config.get("max_size_mb", 50),
+                                    log_config.get("backup_count", 3))
+        return transport
+    
+    def _write_log_batch(self, records) -> None:
+        for timestamp, level, msg, args in records:
+            self.logger.write(logmsg(timestamp=timestamp, module_id=self.module_id,
+                                     log_level=level, msg=AsyncLogTransport.render((timestamp, level, msg, args))))
+    
+    def _on_config_available(self, reader) -> None:
+        for sample in reader.take(N=16):
+            self._apply_config(sample)
+    
+    def _apply_config(self, sample:configmsg) -> None:
+        try:
+            self.configure_callback(json.loads(sample.config_json))
+        except ValueError as e:
+            self.warn(f"Ignoring malformed configuration message: {e}")
     
     def configure_callback(self, data:dict) -> None:
         print(f"Received configuration data: {data}")
@@ -83,7 +297,7 @@ class BaseDDSModule:
             if hasattr(self, key):
                 setattr(self, key, value)
             else:
-                self.logger.write(f"Warning: Unknown configuration key {key}")
+                self.warn(f"Unknown configuration key {key}")
         # Handle configuration update here
 
     def start(self) -> None:
@@ -94,26 +308,42 @@ class BaseDDSModule:
         print("Stopping DDS module")
         # Stop any running threads or processes here
     
-    def run(self)->None:
-        self.waitset.wait(1)
+    def run(self, timeout_s:Optional[float]=None)->None:
+        """Dispatch one round of ready conditions and due timers"""
+        self.executor.spin_once(timeout_s)
+    
+    def spin(self, stop_event:Optional[threading.Event]=None)->None:
+        """Run the executor on the calling thread until request_stop() or stop_event"""
+        self.executor.spin(stop_event)
+    
+    def request_stop(self)->None:
+        self.executor.stop()
+    
+    def publish_metrics(self):
+        self.metrics.tick()
+        self.metrics_writer.write(PerformanceMetrics(**self._get_metrics()))
         
     def publish_heartbeat(self):
-        msg = heartbeat(timestamp=self.get_time(),status=self.status)
+        msg = heartbeat(timestamp=self.get_time(),status=self.status.value)
         self.heartbeater.write(msg)
-    def _publish_log(self,msg:str, log_level:int):
-        msg = logmsg(timestamp=self.get_time(),module_id=self.module_id,log_level=log_level,msg=msg)
-        self.logger.write(msg)
+    def _publish_log(self,msg:str, log_level:LogLevels, args:tuple=()):
+        # Queued for the log thread; %-style args are only formatted if the record is kept
+        if log_level.value < self.log_transport.level:
+            return
+        # Rate limit by the caller of debug()/info()/..., since msg is often an f-string
+        caller = sys._getframe(2)
+        self.log_transport.emit(log_level.value, msg, args, (caller.f_code, caller.f_lineno))
         
-    def debug(self, msg:str):
-        self._publish_log(msg=msg,log_level=LogLevels.Debug)
-    def info(self,msg:str):
-        self._publish_log(msg=msg,log_level=LogLevels.Info)
-    def warn(self,msg:str):
-        self._publish_log(msg=msg,log_level=LogLevels.Warn)
-    def error(self,msg:str):
-        self._publish_log(msg=msg,log_level=LogLevels.Error)
-    def critical(self,msg:str):
-        self._publish_log(msg=msg,log_level=LogLevels.Critical)
+    def debug(self, msg:str, *args):
+        self._publish_log(msg,LogLevels.Debug,args)
+    def info(self,msg:str, *args):
+        self._publish_log(msg,LogLevels.Info,args)
+    def warn(self,msg:str, *args):
+        self._publish_log(msg,LogLevels.Warn,args)
+    def error(self,msg:str, *args):
+        self._publish_log(msg,LogLevels.Error,args)
+    def critical(self,msg:str, *args):
+        self._publish_log(msg,LogLevels.Critical,args)
         
     def get_time(self) -> int:
         return int(time.time()*1000)
@@ -127,7 +357,25 @@ class BaseDDSModule:
     def _get_status(self) -> dict:
         raise NotImplementedError("Subclasses should implement this method")
     def _get_metrics(self) -> dict:
-        raise NotImplementedError("Subclasses should implement this method")
+        """
+        PerformanceMetrics fields from the "processed" rate and the "latency"
+        histogram over the last interval; called once per publish_metrics()
+        """
+        latency = self.metrics.histogram("latency").window()
+        return {
+            "timestamp": time.time_ns() // 1000,
+            "module_id": self.module_id,
+            "cpu_usage": self.metrics.process.cpu_percent,
+            "memory_usage": self.metrics.process.rss_bytes,
+            "processing_rate": self.metrics.rate("processed").rate,
+            "latency_ms": latency["mean_ms"],
+            "queue_size": self._get_queue_size(),
+            "latency_p50_ms": latency["p50_ms"],
+            "latency_p99_ms": latency["p99_ms"],
+            "missed_deadlines": self.metrics.counter("missed_deadlines").value
+        }
+    def _get_queue_size(self) -> int:
+        return 0
     
     
         
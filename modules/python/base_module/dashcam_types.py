@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Python mirrors of the structs in dds/idl/DashcamTypes.idl
+
+Importing this module requires CycloneDDS; callers import it inside their
+DDS import guard so they keep working in stub mode.
+"""
+
+from dataclasses import dataclass
+
+from cyclonedds.idl import IdlStruct, IdlEnum
+from cyclonedds.idl.types import uint8, uint32, uint64, int64, float64, sequence
+
+
+def _describe_as(datatype, twin):
+    """
+    Give datatype the XTypes description of twin, a struct with the same name
+    and wire layout. cyclonedds-python can serialise some Python types it
+    cannot describe in XTypes (bytes, for sequence<octet>).
+    """
+    twin.__idl__.populate()
+    twin.__idl__.fill_type_data()
+    datatype.__idl__._xt_data = twin.__idl__._xt_data
+    datatype.__idl__._xt_bytedata = twin.__idl__._xt_bytedata
+
+
+@dataclass
+class ImageMetadata(IdlStruct, typename="DashcamMessageTypes.ImageMetadata"):
+    timestamp: uint64
+    sensor_timestamp: uint64
+    sequence_id: uint32
+    width: uint32
+    height: uint32
+    channels: uint32
+    format: str
+    encoding: str
+    camera_exposure: float64
+    camera_gain: float64
+    source_module: str
+
+
+@dataclass
+class ImageData(IdlStruct, typename="DashcamMessageTypes.ImageData"):
+    metadata: ImageMetadata
+    # sequence<octet> on the wire. Declared as bytes, cyclonedds-python copies it
+    # in one block; sequence[uint8] would pack it element by element, hundreds of
+    # milliseconds per 1080p frame. Samples arrive with data as bytes.
+    data: bytes = b""
+
+
+@dataclass
+class _ImageDataWire(IdlStruct, typename="DashcamMessageTypes.ImageData"):
+    metadata: ImageMetadata
+    data: sequence[uint8]
+
+
+_describe_as(ImageData, _ImageDataWire)
+
+
+@dataclass
+class SharedImageDescriptor(IdlStruct, typename="DashcamMessageTypes.SharedImageDescriptor"):
+    metadata: ImageMetadata
+    segment: str
+    slot: uint32
+
+
+class CameraCommand(IdlEnum, typename="DashcamMessageTypes.CameraCommand"):
+    CMD_START_CAPTURE = 0
+    CMD_STOP_CAPTURE = 1
+    CMD_SET_RESOLUTION = 2
+    CMD_SET_FRAMERATE = 3
+    CMD_SET_EXPOSURE = 4
+    CMD_SET_GAIN = 5
+    CMD_CALIBRATE = 6
+    CMD_GET_STATUS = 7
+    CMD_TRIGGER_EVENT = 8
+
+
+@dataclass
+class CameraControl(IdlStruct, typename="DashcamMessageTypes.CameraControl"):
+    timestamp: uint64
+    command: CameraCommand
+    parameters: str
+    requesting_module: str
+
+
+class CameraStatus(IdlEnum, typename="DashcamMessageTypes.CameraStatus"):
+    STATUS_IDLE = 0
+    STATUS_CAPTURING = 1
+    STATUS_CALIBRATING = 2
+    STATUS_ERROR = 3
+
+
+@dataclass
+class CameraStatusInfo(IdlStruct, typename="DashcamMessageTypes.CameraStatusInfo"):
+    timestamp: uint64
+    status: CameraStatus
+    current_width: uint32
+    current_height: uint32
+    current_framerate: float64
+    current_exposure: float64
+    current_gain: float64
+    is_calibrated: bool
+    error_message: str
+
+
+@dataclass
+class PerformanceMetrics(IdlStruct, typename="DashcamMessageTypes.PerformanceMetrics"):
+    timestamp: uint64
+    module_id: str
+    cpu_usage: float64
+    memory_usage: uint32
+    processing_rate: float64
+    latency_ms: float64
+    queue_size: uint32
+    latency_p50_ms: float64
+    latency_p99_ms: float64
+    missed_deadlines: uint64
+
+
+@dataclass
+class SensorSample(IdlStruct, typename="DashcamMessageTypes.SensorSample"):
+    timestamp: uint64
+    fix_time: uint64
+    latitude: float64
+    longitude: float64
+    altitude_m: float64
+    speed_mps: float64
+    heading_deg: float64
+    hdop: float64
+    fix_quality: uint8
+    satellites: uint8
+    accel_x: float64
+    accel_y: float64
+    accel_z: float64
+    gyro_x: float64
+    gyro_y: float64
+    gyro_z: float64
+    source_module: str
+
+
+@dataclass
+class FrameSensorData(IdlStruct, typename="DashcamMessageTypes.FrameSensorData"):
+    sequence_id: uint32
+    timestamp: uint64
+    sample: SensorSample
+    interpolated: bool
+    offset_us: int64
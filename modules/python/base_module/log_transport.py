@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Asynchronous log transport shared by the Python modules
+
+Log calls on hot paths only do a level comparison, a repeat-rate check and an
+append to a bounded deque. Repeats are counted per call site, or per message
+template when no site is given, so a message formatted with changing values
+from one line is still rate limited; formatting, the DDS write and file I/O happen in
+batches on a background thread. When the queue is full the oldest records are
+dropped and counted rather than blocking the caller.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Tuple
+
+# (timestamp_ms, level, message, args)
+LogRecord = Tuple[int, int, str, tuple]
+
+LEVEL_NAMES = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+
+def level_from_name(name: Any, default: int = 1) -> int:
+    """Map a config level ("info", "WARN", 2) onto the LogLevels scale"""
+    if isinstance(name, int):
+        return name
+    name = str(name).upper()
+    if name == "WARN":
+        name = "WARNING"
+    return LEVEL_NAMES.index(name) if name in LEVEL_NAMES else default
+
+
+class RotatingFileSink:
+    """Append-only log file rotated by size, written one batch at a time"""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def write_batch(self, lines: List[str]):
+        data = "".join(lines)
+        if self.max_bytes and self._size + len(data) > self.max_bytes and self._size:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def close(self):
+        self._file.close()
+
+
+class AsyncLogTransport:
+    """Bounded, batched, rate-limited log pipeline with pluggable sinks
+
+    Levels follow base_module.LogLevels (0=Debug .. 4=Critical). Each sink is
+    called on the background thread with a list of records; records carry
+    their unformatted args so %-formatting happens off the caller's thread.
+    """
+
+    def __init__(self, module_id: str, level: int = 1, queue_size: int = 4096,
+                 batch_size: int = 256,
+                 rate_limit_burst: int = 10, rate_limit_window_s: float = 5.0):
+        self.module_id = module_id
+        self.level = level
+        self.batch_size = batch_size
+        self.rate_limit_burst = rate_limit_burst
+        self.rate_limit_window_s = rate_limit_window_s
+
+        # deque.append/popleft are atomic, so producers never take a lock
+        self._queue: Deque[LogRecord] = deque(maxlen=queue_size)
+        self._repeats: Dict[tuple, List[float]] = {}
+        self._sinks: List[Callable[[List[LogRecord]], None]] = []
+        self._running = True
+        self._busy = False
+        # Set by producers only while the drain thread is idle, so a busy logger takes no lock
+        self._wake = threading.Event()
+        self._flushed = threading.Condition()
+        self._thread = threading.Thread(target=self._drain_loop, name=f"{module_id}-log",
+                                        daemon=True)
+
+        self.dropped = 0
+        self.suppressed = 0
+        self.written = 0
+        self.sink_errors = 0
+        self._thread.start()
+
+    def add_sink(self, sink: Callable[[List[LogRecord]], None]):
+        self._sinks.append(sink)
+
+    def add_file_sink(self, path: str, max_size_mb: float = 50, backup_count: int = 3):
+        file_sink = RotatingFileSink(path, int(max_size_mb * (1 << 20)), backup_count)
+        self.add_sink(lambda records: file_sink.write_batch(
+            [self.format(record) + "\n" for record in records]))
+
+    def add_stream_sink(self, stream=None):
+        stream = stream or sys.stderr
+
+        def write(records: List[LogRecord]):
+            stream.write("".join(self.format(record) + "\n" for record in records))
+            stream.flush()
+        self.add_sink(write)
+
+    def emit(self, level: int, msg: str, args: tuple = (), site: Hashable = None) -> bool:
+        """Queue a record; returns False if it was filtered, rate limited or displaced
+
+        site identifies the logging call (e.g. code object and line number) and
+        keys the rate limit; without it the unformatted template is used.
+        """
+        if level < self.level:
+            return False
+
+        # Allow rate_limit_burst messages per site and window, then count the rest
+        key = (level, msg if site is None else site)
+        now = time.monotonic()
+        window = self._repeats.get(key)
+        if window is None or now - window[0] >= self.rate_limit_window_s:
+            if window is not None and window[2]:
+                self._enqueue(level, f"{msg} (suppressed {window[2]} repeats)", args)
+                self._repeats[key] = [now, 1, 0]
+                return True
+            if len(self._repeats) > 1024:
+                self._repeats.clear()
+            self._repeats[key] = [now, 1, 0]
+        elif window[1] >= self.rate_limit_burst:
+            window[2] += 1
+            self.suppressed += 1
+            return False
+        else:
+            window[1] += 1
+
+        self._enqueue(level, msg, args)
+        return True
+
+    def _enqueue(self, level: int, msg: str, args: tuple):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append((time.time_ns() // 1_000_000, level, msg, args))
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def format(self, record: LogRecord) -> str:
+        timestamp_ms, level, msg, args = record
+        seconds, millis = divmod(timestamp_ms, 1000)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+        return (f"{stamp},{millis:03d} [{LEVEL_NAMES[level]}] {self.module_id}: "
+                f"{self.render(record)}")
+
+    @staticmethod
+    def render(record: LogRecord) -> str:
+        msg, args = record[2], record[3]
+        if args:
+            try:
+                return msg % args
+            except (TypeError, ValueError):
+                return f"{msg} {args}"
+        return msg
+
+    def _drain_loop(self):
+        while True:
+            if not self._queue:
+                with self._flushed:
+                    self._flushed.notify_all()
+                if not self._running:
+                    break
+                # Clear before the re-check: a record queued after it sets the event again
+                self._wake.clear()
+                if not self._queue and self._running:
+                    self._wake.wait()
+                continue
+            self._busy = True
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            for sink in self._sinks:
+                try:
+                    sink(batch)
+                except Exception:
+                    self.sink_errors += 1
+            self.written += len(batch)
+            self._busy = False
+
+    def flush(self, timeout: float = 2.0):
+        """Block until everything queued so far has reached the sinks"""
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            while (self._queue or self._busy) and self._thread.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._flushed.wait(remaining)
+
+    def close(self, timeout: float = 2.0):
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+            "sink_errors": self.sink_errors,
+        }
+
+
+class AsyncLogHandler(logging.Handler):
+    """Routes a stdlib logger into an AsyncLogTransport
+
+    Disabled levels are already rejected by Logger.isEnabledFor before a
+    record is built; this handler defers formatting to the transport thread.
+    """
+
+    def __init__(self, transport: AsyncLogTransport):
+        super().__init__()
+        self.transport = transport
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = min(max(record.levelno // 10 - 1, 0), 4)
+            site = (record.name, record.pathname, record.lineno)
+            if record.exc_info:
+                msg = f"{record.getMessage()}\n{logging.Formatter().formatException(record.exc_info)}"
+                self.transport.emit(level, msg, site=site)
+            else:
+                self.transport.emit(level, record.msg if isinstance(record.msg, str) else str(record.msg),
+                                    record.args or (), site)
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Low-overhead metrics primitives shared by the Python modules
+
+Counters and LatencyHistogram keep one shard per recording thread, so the hot
+path takes no lock and never contends with other threads; shards are only
+summed when a snapshot is taken. Histograms are cumulative; window() gives
+the same summary over the samples recorded since its previous call. Rates are
+derived from counters once per publish interval (windowed rate plus an EWMA),
+and ProcessSampler reads CPU time and RSS for the current process.
+ModuleMetrics groups them per module.
+"""
+
+import os
+import time
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def _log_buckets(min_us: float, max_us: float, per_decade: int) -> List[float]:
+    bounds = []
+    value = min_us
+    step = 10 ** (1.0 / per_decade)
+    while value < max_us:
+        bounds.append(round(value, 3))
+        value *= step
+    bounds.append(max_us)
+    return bounds
+
+
+# 10us .. 10s, 8 buckets per decade (~33% resolution)
+DEFAULT_BOUNDS_US = _log_buckets(10.0, 10_000_000.0, 8)
+
+
+class Counter:
+    """Monotonic counter with per-thread shards"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._local = threading.local()
+        self._shards: List[List[int]] = []
+        self._shards_lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0]
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        shard[0] += amount
+
+    @property
+    def value(self) -> int:
+        with self._shards_lock:
+            return sum(shard[0] for shard in self._shards)
+
+
+class RateMeter:
+    """Events per second over the last tick window, plus an EWMA of those windows"""
+
+    def __init__(self, name: str, alpha: float = 0.3, clock=time.monotonic):
+        self.name = name
+        self.counter = Counter(name)
+        self.alpha = alpha
+        self._clock = clock
+        self._last_time = clock()
+        self._last_value = 0
+        self.rate = 0.0
+        self.ewma: Optional[float] = None
+
+    def mark(self, amount: int = 1):
+        self.counter.inc(amount)
+
+    @property
+    def total(self) -> int:
+        return self.counter.value
+
+    def tick(self) -> float:
+        """Close the current window; call from a single thread"""
+        now = self._clock()
+        value = self.counter.value
+        elapsed = now - self._last_time
+        if elapsed > 0:
+            self.rate = (value - self._last_value) / elapsed
+            self.ewma = self.rate if self.ewma is None else \
+                self.alpha * self.rate + (1.0 - self.alpha) * self.ewma
+        self._last_time = now
+        self._last_value = value
+        return self.rate
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "rate": round(self.rate, 2),
+            "ewma": round(self.ewma or 0.0, 2),
+        }
+
+
+class ProcessSampler:
+    """CPU utilisation and resident memory of the current process"""
+
+    def __init__(self):
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+        self.cpu_percent = 0.0
+        self.rss_bytes = 0
+
+    def sample(self) -> Dict[str, float]:
+        """CPU percent since the previous sample (100 = one full core) and current RSS"""
+        wall = time.monotonic()
+        cpu = time.process_time()
+        if wall > self._last_wall:
+            self.cpu_percent = 100.0 * (cpu - self._last_cpu) / (wall - self._last_wall)
+        self._last_wall, self._last_cpu = wall, cpu
+        self.rss_bytes = self._read_rss()
+        return {"cpu_percent": round(self.cpu_percent, 1), "rss_bytes": self.rss_bytes}
+
+    def _read_rss(self) -> int:
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (OSError, IndexError, ValueError):
+            import resource
+            # Peak rather than current RSS, in kilobytes on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with per-thread shards"""
+
+    def __init__(self, name: str, bounds_us: List[float] = DEFAULT_BOUNDS_US):
+        self.name = name
+        self.bounds = list(bounds_us)
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._shards_lock = threading.Lock()
+        # Merged counts and sum at the previous window() call
+        self._window_counts = [0] * (len(self.bounds) + 1)
+        self._window_total_us = 0.0
+
+    def _shard(self) -> List[float]:
+        # [bucket counts..., overflow count, sum_us, max_us, window max_us]
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0] * (len(self.bounds) + 1) + [0.0, 0.0, 0.0]
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, value_us: float):
+        shard = self._shard()
+        shard[bisect.bisect_left(self.bounds, value_us)] += 1
+        shard[-3] += value_us
+        if value_us > shard[-2]:
+            shard[-2] = value_us
+        if value_us > shard[-1]:
+            shard[-1] = value_us
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                for i in range(len(shard)):
+                    shard[i] = 0
+            self._window_counts = [0] * (len(self.bounds) + 1)
+            self._window_total_us = 0.0
+
+    def _merge(self, window: bool = False):
+        """Summed bucket counts, sum and max; window clears the window max as it is read"""
+        buckets = len(self.bounds) + 1
+        counts = [0] * buckets
+        total_us = 0.0
+        max_us = 0.0
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for i in range(buckets):
+                counts[i] += shard[i]
+            total_us += shard[-3]
+            if window:
+                # A sample recorded between the read and the clear is missed by the window max only
+                max_us = max(max_us, shard[-1])
+                shard[-1] = 0.0
+            else:
+                max_us = max(max_us, shard[-2])
+        return counts, total_us, max_us
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Merged counts and summary statistics in milliseconds, since creation or reset()"""
+        return self._summary(*self._merge())
+
+    def window(self) -> Dict[str, Any]:
+        """
+        Summary of the samples recorded since the previous window() call, in the
+        shape of snapshot(). Call from a single thread, once per reporting interval.
+        """
+        counts, total_us, max_us = self._merge(window=True)
+        window_counts = [count - base for count, base in zip(counts, self._window_counts)]
+        window_total_us = total_us - self._window_total_us
+        self._window_counts, self._window_total_us = counts, total_us
+        return self._summary(window_counts, window_total_us, max_us)
+
+    def _summary(self, counts: List[int], total_us: float, max_us: float) -> Dict[str, Any]:
+        count = sum(counts)
+        # Bucket upper bounds can overshoot the largest sample; clamp to it
+        percentile = lambda q: min(self._percentile(counts, count, q), max_us)
+        return {
+            "count": count,
+            "mean_ms": round(total_us / count / 1000.0, 3) if count else 0.0,
+            "p50_ms": round(percentile(0.50) / 1000.0, 3),
+            "p90_ms": round(percentile(0.90) / 1000.0, 3),
+            "p99_ms": round(percentile(0.99) / 1000.0, 3),
+            "max_ms": round(max_us / 1000.0, 3),
+        }
+
+    def _percentile(self, counts: List[int], count: int, quantile: float) -> float:
+        """Upper bound of the bucket containing the quantile"""
+        if not count:
+            return 0.0
+        target = quantile * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+
+class ModuleMetrics:
+    """Named counters, rates and histograms for one module"""
+
+    def __init__(self):
+        self.counters: Dict[str, Counter] = {}
+        self.rates: Dict[str, RateMeter] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.process = ProcessSampler()
+        self._lock = threading.Lock()
+
+    def counter(self, name: str) -> Counter:
+        with self._lock:
+            return self.counters.setdefault(name, Counter(name))
+
+    def rate(self, name: str) -> RateMeter:
+        with self._lock:
+            return self.rates.setdefault(name, RateMeter(name))
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        with self._lock:
+            return self.histograms.setdefault(name, LatencyHistogram(name))
+
+    def tick(self):
+        """Close the rate windows and sample the process; call once per interval"""
+        for rate in list(self.rates.values()):
+            rate.tick()
+        self.process.sample()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "counters": {name: counter.value for name, counter in self.counters.items()},
+            "rates": {name: rate.snapshot() for name, rate in self.rates.items()},
+            "latency": {name: hist.snapshot() for name, hist in self.histograms.items()},
+            "process": {"cpu_percent": round(self.process.cpu_percent, 1),
+                        "rss_bytes": self.process.rss_bytes},
+        }
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Timestamp join between sensor samples and camera frames
+
+SensorIndex keeps recent samples sorted by timestamp with bounded retention
+and answers "what was the sample at time t" with a single bisect: either the
+nearest sample, or a linear interpolation of the two samples around t.
+
+SensorJoin adds what a live stream needs. A frame newer than the latest
+sample cannot be interpolated yet, so instead of delaying the frame it is
+parked until the next sample arrives, or until max_wait passes, at which
+point the nearest sample is used. Both arms return the frames they resolved,
+so the caller publishes the joined data whenever it becomes available.
+
+GPS fixes arrive at a few Hz, IMU readings much faster, and a sample emitted
+for one leaves the other's fields empty. The GPS and IMU fields of a joined
+sample are therefore looked up in indexes holding only samples with a reading
+of that kind: GPS fields are interpolated between GPS epochs with their own,
+wider gap limit, IMU fields between IMU readings.
+Once GPS samples have been seen, a frame also waits for the first epoch after
+it, for at most max_gps_gap plus max_wait past the frame time, so a live frame
+is not joined with the last fix while the next one is still on its way.
+"""
+
+import math
+import time
+import bisect
+import threading
+from collections import deque
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Fields of a SensorSample that are interpolated; everything else comes from the nearest sample
+INTERPOLATED_FIELDS = ("fix_time", "latitude", "longitude", "altitude_m", "speed_mps", "hdop",
+                       "accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z")
+ANGULAR_FIELDS = ("heading_deg",)
+GPS_FIELDS = ("fix_time", "latitude", "longitude", "altitude_m", "speed_mps", "heading_deg",
+              "hdop", "fix_quality", "satellites")
+GPS_INTERPOLATED_FIELDS = tuple(field for field in INTERPOLATED_FIELDS if field in GPS_FIELDS)
+EMPTY_GPS = {field: 0 if field in ("fix_time", "fix_quality", "satellites") else float("nan")
+             for field in GPS_FIELDS}
+IMU_FIELDS = ("accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z")
+EMPTY_IMU = {field: float("nan") for field in IMU_FIELDS}
+
+Match = Tuple[Dict[str, Any], bool, int]  # (sample, interpolated, frame time - nearest sample time)
+
+
+def _has_reading(sample: Dict[str, Any], fields: Sequence[str]) -> bool:
+    """Whether a sample carries a reading in fields rather than empty (NaN, 0) values"""
+    for field in fields:
+        value = sample.get(field)
+        if value and not (isinstance(value, float) and math.isnan(value)):
+            return True
+    return False
+
+
+def _lerp_angle(a: float, b: float, weight: float) -> float:
+    """Interpolate degrees along the shorter arc"""
+    delta = (b - a + 180.0) % 360.0 - 180.0
+    return (a + delta * weight) % 360.0
+
+
+class SensorIndex:
+    """Samples sorted by timestamp (µs) with O(log n) lookup and bounded retention"""
+
+    def __init__(self, retention_us: int = 60_000_000, max_samples: int = 8192,
+                 fields: Sequence[str] = INTERPOLATED_FIELDS, angular: Sequence[str] = ANGULAR_FIELDS):
+        self.retention_us = int(retention_us)
+        self.max_samples = int(max_samples)
+        self.fields = tuple(fields)
+        self.angular = tuple(angular)
+        # Trimmed entries are skipped with _start and compacted in bulk, so
+        # retention costs O(1) amortised instead of a list shift per sample
+        self._times: List[int] = []
+        self._samples: List[Dict[str, Any]] = []
+        self._start = 0
+        self.out_of_order = 0
+
+    def __len__(self) -> int:
+        return len(self._times) - self._start
+
+    @property
+    def latest_timestamp(self) -> Optional[int]:
+        return self._times[-1] if len(self) else None
+
+    def add(self, timestamp: int, sample: Dict[str, Any]):
+        if not len(self) or timestamp >= self._times[-1]:
+            self._times.append(timestamp)
+            self._samples.append(sample)
+        else:
+            self.out_of_order += 1
+            i = bisect.bisect_right(self._times, timestamp, lo=self._start)
+            self._times.insert(i, timestamp)
+            self._samples.insert(i, sample)
+        self._trim()
+
+    def _trim(self):
+        cutoff = self._times[-1] - self.retention_us
+        start = bisect.bisect_left(self._times, cutoff, lo=self._start)
+        self._start = max(start, len(self._times) - self.max_samples)
+        if self._start >= 1024 and self._start * 2 >= len(self._times):
+            del self._times[:self._start]
+            del self._samples[:self._start]
+            self._start = 0
+
+    def lookup(self, timestamp: int, max_gap_us: int, interpolate: bool = True) -> Optional[Match]:
+        """
+        Sample at timestamp: interpolated between its neighbours when both are
+        within max_gap_us, else the nearest one within max_gap_us, else None
+        """
+        if not len(self):
+            return None
+        times = self._times
+        i = bisect.bisect_left(times, timestamp, lo=self._start)
+        before = i - 1 if i > self._start else None
+        after = i if i < len(times) else None
+
+        if before is None:
+            nearest = after
+        elif after is None:
+            nearest = before
+        else:
+            nearest = before if timestamp - times[before] <= times[after] - timestamp else after
+        offset = timestamp - times[nearest]
+        if abs(offset) > max_gap_us:
+            return None
+
+        if (interpolate and before is not None and after is not None
+                and timestamp - times[before] <= max_gap_us and times[after] - timestamp <= max_gap_us):
+            span = times[after] - times[before]
+            weight = (timestamp - times[before]) / span if span else 0.0
+            return self._interpolate(self._samples[before], self._samples[after], weight, nearest == after), \
+                True, offset
+        return self._samples[nearest], False, offset
+
+    def _interpolate(self, a: Dict[str, Any], b: Dict[str, Any], weight: float,
+                     nearest_is_b: bool) -> Dict[str, Any]:
+        sample = dict(b if nearest_is_b else a)
+        for field in self.fields:
+            va, vb = a.get(field), b.get(field)
+            if va is None or vb is None:
+                continue
+            value = va + (vb - va) * weight
+            sample[field] = int(round(value)) if isinstance(va, int) and isinstance(vb, int) else value
+        for field in self.angular:
+            va, vb = a.get(field), b.get(field)
+            if va is not None and vb is not None and not (math.isnan(va) or math.isnan(vb)):
+                sample[field] = _lerp_angle(va, vb, weight)
+        return sample
+
+
+class SensorJoin:
+    """Thread-safe streaming join of frame timestamps against a SensorIndex"""
+
+    def __init__(self, max_gap_us: int = 200_000, max_wait_us: int = 150_000, interpolate: bool = True,
+                 retention_us: int = 60_000_000, max_pending: int = 256, clock=None,
+                 max_gps_gap_us: int = 1_500_000):
+        self.index = SensorIndex(retention_us)
+        self.gps_index = SensorIndex(retention_us, fields=GPS_INTERPOLATED_FIELDS)
+        self.imu_index = SensorIndex(retention_us, fields=IMU_FIELDS, angular=())
+        self.max_gap_us = int(max_gap_us)
+        self.max_gps_gap_us = int(max_gps_gap_us)
+        self.max_wait_us = int(max_wait_us)
+        self.interpolate = interpolate
+        self.max_pending = int(max_pending)
+        self.clock = clock or (lambda: time.time_ns() // 1000)
+        self._pending: deque = deque()  # (key, timestamp, give_up_at_us, gps_give_up_at_us)
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.joined = 0
+        self.interpolated = 0
+        self.unmatched = 0
+        self.waited = 0
+
+    def add_sample(self, timestamp: int, sample: Dict[str, Any]) -> List[Tuple[Hashable, int, Optional[Match]]]:
+        """Index a sample; returns the parked frames it resolved"""
+        with self._lock:
+            self.index.add(timestamp, sample)
+            if _has_reading(sample, GPS_FIELDS):
+                self.gps_index.add(timestamp, sample)
+            if _has_reading(sample, IMU_FIELDS):
+                self.imu_index.add(timestamp, sample)
+            return self._resolve(self.clock())
+
+    def request(self, key: Hashable, timestamp: int) -> List[Tuple[Hashable, int, Optional[Match]]]:
+        """
+        Join a frame. Returns every frame resolved by this call, which includes
+        this one unless it has to wait for a later sample or GPS epoch.
+        """
+        with self._lock:
+            now = self.clock()
+            resolved = self._resolve(now)
+            entry = (key, timestamp, max(now, timestamp) + self.max_wait_us,
+                     timestamp + self.max_gps_gap_us + self.max_wait_us)
+            if not self._pending and self._ready(entry, now):
+                resolved.append(self._join(key, timestamp))
+            else:
+                self.waited += 1
+                self._pending.append(entry)
+                if len(self._pending) > self.max_pending:
+                    key, pending_timestamp = self._pending.popleft()[:2]
+                    resolved.append(self._join(key, pending_timestamp))
+            return resolved
+
+    def expire(self) -> List[Tuple[Hashable, int, Optional[Match]]]:
+        """Resolve frames that have waited max_wait_us; call periodically when frames stop"""
+        with self._lock:
+            return self._resolve(self.clock())
+
+    def _ready(self, entry: Tuple[Hashable, int, int, int], now: int) -> bool:
+        """
+        Whether a frame can be joined: a sample (an IMU reading, once seen) and,
+        once GPS has been seen, a GPS epoch at or after it, or each one's wait is over
+        """
+        _, timestamp, give_up_at, gps_give_up_at = entry
+        latest = (self.imu_index if len(self.imu_index) else self.index).latest_timestamp
+        if (latest is None or latest < timestamp) and now < give_up_at:
+            return False
+        gps_latest = self.gps_index.latest_timestamp
+        return gps_latest is None or gps_latest >= timestamp or now >= gps_give_up_at
+
+    def _resolve(self, now: int) -> List[Tuple[Hashable, int, Optional[Match]]]:
+        resolved = []
+        while self._pending and self._ready(self._pending[0], now):
+            key, timestamp = self._pending.popleft()[:2]
+            resolved.append(self._join(key, timestamp))
+        return resolved
+
+    def _join(self, key: Hashable, timestamp: int) -> Tuple[Hashable, int, Optional[Match]]:
+        match = self.index.lookup(timestamp, self.max_gap_us, self.interpolate)
+        if match is not None:
+            match = self._with_readings(match, timestamp)
+        if match is None:
+            self.unmatched += 1
+        else:
+            self.joined += 1
+            if match[1]:
+                self.interpolated += 1
+        return key, timestamp, match
+
+    def _with_readings(self, match: Match, timestamp: int) -> Match:
+        """
+        Replace the GPS and IMU fields of a match with the readings of that kind
+        around timestamp, or empty ones; interpolated if either group was
+        """
+        sample, _, offset = match
+        sample = dict(sample)
+        interpolated = False
+        for index, fields, empty, max_gap_us in ((self.gps_index, GPS_FIELDS, EMPTY_GPS, self.max_gps_gap_us),
+                                                 (self.imu_index, IMU_FIELDS, EMPTY_IMU, self.max_gap_us)):
+            reading = index.lookup(timestamp, max_gap_us, self.interpolate)
+            source = reading[0] if reading is not None else empty
+            for field in fields:
+                sample[field] = source.get(field, empty[field])
+            interpolated = interpolated or (reading is not None and reading[1])
+        return sample, interpolated, offset
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.index),
+            "gps_samples": len(self.gps_index),
+            "imu_samples": len(self.imu_index),
+            "pending": len(self._pending),
+            "joined": self.joined,
+            "interpolated": self.interpolated,
+            "unmatched": self.unmatched,
+            "waited": self.waited,
+            "out_of_order_samples": self.index.out_of_order,
+        }
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+asyncio vs thread-per-topic subscriber benchmark
+
+A publisher process writes the same message stream over N topics; the
+benchmark process subscribes once with one thread per topic blocking in its
+own WaitSet (the CameraInterface style) and once with AsyncDDSModule, which
+multiplexes every topic on a single event loop. Reports throughput, latency,
+subscriber CPU per message and thread count for each.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import statistics
+import multiprocessing as mp
+from dataclasses import dataclass
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+
+from async_module import AsyncDDSModule
+from cyclonedds.core import Qos, Policy, WaitSet, ReadCondition, SampleState, ViewState, InstanceState
+from cyclonedds.domain import DomainParticipant
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.types import uint32, uint64
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.topic import Topic
+from cyclonedds.util import duration
+
+
+@dataclass
+class BenchMsg(IdlStruct, typename="bench.Msg"):
+    seq: uint32
+    sent_ns: uint64
+    payload: str
+
+
+QOS = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepLast(256))
+
+
+def topic_names(topics):
+    return [f"bench/async/{i}" for i in range(topics)]
+
+
+def publish(domain, topics, messages, rate):
+    participant = DomainParticipant(domain)
+    writers = [DataWriter(participant, Topic(participant, name, BenchMsg), qos=QOS)
+               for name in topic_names(topics)]
+    time.sleep(1.5)  # discovery
+    payload = "x" * 256
+    interval = 1.0 / rate if rate else 0.0
+    next_time = time.monotonic()
+    for seq in range(messages):
+        for writer in writers:
+            writer.write(BenchMsg(seq=seq, sent_ns=time.monotonic_ns(), payload=payload))
+        if interval:
+            next_time += interval
+            time.sleep(max(0.0, next_time - time.monotonic()))
+    time.sleep(1.0)
+
+
+def run_threads(domain, topics, expected):
+    participant = DomainParticipant(domain)
+    latencies, received = [], [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def consume(name):
+        reader = DataReader(participant, Topic(participant, name, BenchMsg), qos=QOS)
+        waitset = WaitSet(participant)
+        condition = ReadCondition(reader, SampleState.NotRead | ViewState.Any | InstanceState.Any)
+        waitset.attach(condition)
+        while not done.is_set():
+            waitset.wait(duration(milliseconds=100))
+            samples = reader.take(N=64)
+            now = time.monotonic_ns()
+            with lock:
+                latencies.extend(now - s.sent_ns for s in samples)
+                received[0] += len(samples)
+                if received[0] >= expected:
+                    done.set()
+
+    threads = [threading.Thread(target=consume, args=(name,), daemon=True) for name in topic_names(topics)]
+    for thread in threads:
+        thread.start()
+    return done, lambda: (received[0], latencies)
+
+
+class BenchModule(AsyncDDSModule):
+    def __init__(self, domain, topics, expected):
+        super().__init__("bench_async", domain_id=domain)
+        self.topics = topics
+        self.expected = expected
+        self.received = 0
+        self.latencies = []
+        self.done = threading.Event()
+
+    async def main(self):
+        async def consume(reader):
+            async for sample in reader:
+                self.latencies.append(time.monotonic_ns() - sample.sent_ns)
+                self.received += 1
+                if self.received >= self.expected:
+                    self.done.set()
+                    self.request_stop()
+
+        for name in topic_names(self.topics):
+            self.spawn(consume(self.reader(name, BenchMsg, qos=QOS)))
+        await self._stop_event.wait()
+
+
+def run_asyncio(domain, topics, expected):
+    module = BenchModule(domain, topics, expected)
+    thread = threading.Thread(target=lambda: asyncio.run(module.run_async()), daemon=True)
+    thread.start()
+    return module.done, lambda: (module.received, module.latencies)
+
+
+def bench(style, domain, args):
+    expected = args.topics * args.messages
+    baseline_threads = threading.active_count()
+    done, result = (run_threads if style == "threads" else run_asyncio)(domain, args.topics, expected)
+    publisher = mp.get_context("spawn").Process(target=publish,
+                                                args=(domain, args.topics, args.messages, args.rate))
+    wall, cpu = time.monotonic(), time.process_time()
+    publisher.start()
+    threads = threading.active_count() - baseline_threads
+    done.wait(timeout=args.timeout)
+    elapsed = time.monotonic() - wall - 1.5  # minus the publisher's discovery sleep
+    cpu_s = time.process_time() - cpu
+    publisher.join()
+    received, latencies = result()
+    latencies_us = sorted(latency / 1000 for latency in latencies) or [0.0]
+    return {
+        "style": style,
+        "threads": threads,
+        "received": received,
+        "expected": expected,
+        "msgs_per_s": received / elapsed if elapsed > 0 else 0.0,
+        "cpu_us_per_msg": cpu_s * 1e6 / max(received, 1),
+        "p50_us": statistics.median(latencies_us),
+        "p99_us": latencies_us[int(len(latencies_us) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio vs thread-per-topic subscriber benchmark")
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=2000, help="Messages per topic")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Publish rounds per second (0 = as fast as flow control allows)")
+    parser.add_argument("--domain", type=int, default=53)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"{'style':<8} {'threads':>7} {'received':>14} {'msgs/s':>9} {'cpu us/msg':>11} "
+          f"{'p50 us':>9} {'p99 us':>9}")
+    for i, style in enumerate(["threads", "asyncio"]):
+        r = bench(style, args.domain + i, args)
+        print(f"{r['style']:<8} {r['threads']:>7} {r['received']:>6}/{r['expected']:<7} "
+              f"{r['msgs_per_s']:>9.0f} {r['cpu_us_per_msg']:>11.1f} {r['p50_us']:>9.0f} {r['p99_us']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
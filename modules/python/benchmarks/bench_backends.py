@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Camera backend request benchmark
+
+Drives every camera backend unpaced through request()/release(), as the
+capture loop does, and reports the time per frame and the full-frame copies
+the backend made for each one. Next to each is the path the capture loop used
+before backends handed out their own memory: capture_into() a capture slab,
+or Picamera2's capture_array() of an RGB888 stream. The V4L2 backend reads an MJPEG file here,
+so its time is mostly decoding; on a device the same read() dequeues a
+driver buffer.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "recorder"))
+
+import numpy as np
+import cv2
+
+from fake_picamera import FakePicamera2, FakeMappedArray
+from frame_dump import FrameDumpWriter
+from frame_pool import FrameBuffer, FramePool
+from picamera_backend import PicameraBackend
+from replay_camera import ReplayCamera
+from segment_store import SegmentWriter
+from synthetic_camera import SyntheticCamera
+from v4l2_camera import V4L2Camera
+from camera_interface import MockCamera
+
+START_US = 1_700_000_000_000_000
+
+
+def write_clips(workdir, resolution, frames):
+    width, height = resolution
+    camera = SyntheticCamera({"resolution": resolution, "bank_frames": 16, "pace": False})
+    dump = FrameDumpWriter(os.path.join(workdir, "clip.frames"), (height, width, 3))
+    segment = SegmentWriter(os.path.join(workdir, "clip.seg"), 0, 64 << 20)
+    video_path = os.path.join(workdir, "clip.avi")
+    video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 30, resolution)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    for i in range(frames):
+        camera.capture_into(frame)
+        timestamp = START_US + i * 33333
+        dump.write(frame, timestamp, timestamp * 1000, i)
+        segment.write_frame(timestamp, i, cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1])
+        video.write(frame)
+    dump.close()
+    segment.close(sync=False)
+    video.release()
+    return {"dump": dump.base + ".frames", "segment": segment.path, "video": video_path}
+
+
+def backends(resolution, clips):
+    """(name, factory) for every backend, each factory returning a new camera"""
+    def mock():
+        camera = MockCamera()
+        camera.resolution = resolution
+        return camera
+
+    def picamera(fmt):
+        camera = FakePicamera2(pace=False)
+        backend = PicameraBackend(camera, {"format": fmt, "buffer_count": 6}, mapped_array=FakeMappedArray)
+        camera.configure(backend.create_configuration(resolution))
+        return backend
+
+    yield "mock", mock
+    yield "synthetic", lambda: SyntheticCamera({"resolution": resolution, "pace": False})
+    for kind in ("dump", "segment", "video"):
+        yield f"replay {kind}", lambda kind=kind: ReplayCamera({"path": clips[kind], "speed": 0})
+    yield "v4l2 (mjpeg file)", lambda: V4L2Camera({"device": clips["video"], "resolution": resolution})
+    yield "picamera RGB888", lambda: picamera("RGB888")
+    yield "picamera YUV420", lambda: picamera("YUV420")
+
+
+def run(camera, pool, frames, legacy):
+    if legacy and (camera.format != "RGB888" if isinstance(camera, PicameraBackend)
+                   else not hasattr(camera, "capture_into")):
+        return None  # no previous path to compare with: a new backend or stream format
+    camera.start()
+    start = time.perf_counter()
+    for _ in range(frames):
+        if not legacy:
+            frame = camera.request(pool)
+        elif isinstance(camera, PicameraBackend):
+            frame = FrameBuffer.wrap(camera.camera.capture_array())
+        else:
+            frame = pool.checkout()
+            camera.capture_into(frame.array)
+        frame.array  # a lazily converted frame materialises here, as it does for a BGR consumer
+        frame.release()
+    ms = (time.perf_counter() - start) / frames * 1000
+    camera.stop()
+    return ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera backend request benchmark")
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+    resolution = tuple(int(v) for v in args.resolution.split("x"))
+    width, height = resolution
+
+    with tempfile.TemporaryDirectory() as workdir:
+        clips = write_clips(workdir, resolution, args.frames)
+        print(f"{args.frames} frames at {args.resolution}, BGR read by the consumer\n")
+        print(f"{'backend':<20} {'previous ms':>11} {'request ms':>10} {'copies/frame':>12}  capabilities")
+        for name, factory in backends(resolution, clips):
+            pool = FramePool("capture", (height, width, 3), 4)
+            legacy_ms = run(factory(), pool, args.frames, legacy=True)
+            camera = factory()
+            request_ms = run(camera, pool, args.frames, legacy=False)
+            stats = camera.backend_stats()
+            flags = [flag for flag, value in stats["capabilities"].items() if value is True]
+            legacy = f"{legacy_ms:.2f}" if legacy_ms is not None else "-"
+            print(f"{name:<20} {legacy:>11} {request_ms:>10.2f} {stats['copies_per_frame']:>12.2f}  "
+                  f"{', '.join(flags) or '-'}")
+            if hasattr(camera, "close"):
+                camera.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Calibration benchmark
+
+Renders synthetic chessboard views through a known lens (random board poses
+plus radial/tangential distortion), then compares serial full-resolution
+corner detection against ChessboardCalibrator's process pool with downscaled
+search and full-resolution subpixel refinement. Reports detection time,
+recovered intrinsics against the ground truth, and the cost of the
+vectorised reprojection error against a per-view cv2.projectPoints loop.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+import cv2
+
+from calibration import ChessboardCalibrator, board_object_points, reprojection_errors, FIND_FLAGS
+
+BOARD = (9, 6)
+SQUARE_MM = 25.0
+
+
+def ground_truth(resolution):
+    width, height = resolution
+    focal = 0.75 * width
+    camera_matrix = np.array([[focal, 0, width / 2 + 7.5],
+                              [0, focal, height / 2 - 4.5],
+                              [0, 0, 1]], dtype=np.float64)
+    distortion_coeffs = np.array([-0.22, 0.06, 0.0008, -0.0005, 0.0])
+    return camera_matrix, distortion_coeffs
+
+
+def distortion_maps(resolution, camera_matrix, distortion_coeffs):
+    """For every distorted output pixel, where to sample the ideal pinhole render"""
+    width, height = resolution
+    grid = np.mgrid[0:height, 0:width][::-1].reshape(2, -1).T.astype(np.float32)
+    ideal = cv2.undistortPoints(grid.reshape(-1, 1, 2), camera_matrix, distortion_coeffs,
+                                P=camera_matrix).reshape(height, width, 2)
+    return ideal[..., 0].copy(), ideal[..., 1].copy()
+
+
+def render_views(resolution, count, seed):
+    """Chessboard images at random poses through the ground-truth lens"""
+    rng = np.random.default_rng(seed)
+    camera_matrix, distortion_coeffs = ground_truth(resolution)
+    map_x, map_y = distortion_maps(resolution, camera_matrix, distortion_coeffs)
+
+    # Board texture with a white margin, 40 px per square
+    px = 40
+    columns, rows = BOARD[0] + 1, BOARD[1] + 1
+    texture = np.full(((rows + 2) * px, (columns + 2) * px), 255, np.uint8)
+    for r in range(rows):
+        for c in range(columns):
+            if (r + c) % 2 == 0:
+                texture[(r + 1) * px:(r + 2) * px, (c + 1) * px:(c + 2) * px] = 0
+    # Texture pixel -> board plane (mm); the first inner corner is the origin
+    to_board = np.array([[SQUARE_MM / px, 0, -2 * SQUARE_MM],
+                         [0, SQUARE_MM / px, -2 * SQUARE_MM],
+                         [0, 0, 1]])
+
+    views = []
+    board_w, board_h = (BOARD[0] - 1) * SQUARE_MM, (BOARD[1] - 1) * SQUARE_MM
+    while len(views) < count:
+        rvec = rng.uniform(-0.45, 0.45, 3) * np.array([1.0, 1.0, 0.5])
+        distance = rng.uniform(350, 650)
+        tvec = np.array([rng.uniform(-120, 120) - board_w / 2, rng.uniform(-80, 80) - board_h / 2, distance])
+        rotation, _ = cv2.Rodrigues(rvec)
+        plane_to_image = camera_matrix @ np.column_stack([rotation[:, 0], rotation[:, 1], tvec])
+        homography = plane_to_image @ to_board
+        ideal = cv2.warpPerspective(texture, homography, resolution, borderValue=200)
+        image = cv2.remap(ideal, map_x, map_y, cv2.INTER_LINEAR, borderValue=200)
+        # Reject poses where the board leaves the frame
+        corners = board_object_points(BOARD, SQUARE_MM)
+        projected, _ = cv2.projectPoints(corners, rvec, tvec, camera_matrix, distortion_coeffs)
+        projected = projected.reshape(-1, 2)
+        margin = 2 * px
+        if (projected.min(axis=0) < margin).any() or (projected.max(axis=0) > np.array(resolution) - margin).any():
+            continue
+        image = cv2.GaussianBlur(image, (3, 3), 0)
+        noise = rng.normal(0, 3.0, image.shape)
+        views.append(np.clip(image + noise, 0, 255).astype(np.uint8))
+    return views, camera_matrix, distortion_coeffs
+
+
+def serial_detect(paths):
+    found = 0
+    for path in paths:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        ok, corners = cv2.findChessboardCorners(gray, BOARD, None, FIND_FLAGS)
+        if ok:
+            cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1),
+                             (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01))
+            found += 1
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration benchmark")
+    parser.add_argument("--views", type=int, default=24)
+    parser.add_argument("--resolution", type=int, nargs=2, default=[1920, 1080])
+    parser.add_argument("--detect-width", type=int, default=640)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    resolution = tuple(args.resolution)
+
+    directory = tempfile.mkdtemp(prefix="bench_calibration_")
+    try:
+        start = time.perf_counter()
+        views, camera_matrix, distortion_coeffs = render_views(resolution, args.views, args.seed)
+        paths = []
+        for i, view in enumerate(views):
+            paths.append(os.path.join(directory, f"view_{i:03d}.png"))
+            cv2.imwrite(paths[-1], view)
+        print(f"rendered {len(views)} {resolution[0]}x{resolution[1]} views "
+              f"in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        serial_found = serial_detect(paths)
+        serial_s = time.perf_counter() - start
+
+        calibrator = ChessboardCalibrator(BOARD, SQUARE_MM, detect_width=args.detect_width,
+                                          workers=args.workers, min_views=6, max_views=args.views)
+        start = time.perf_counter()
+        calibrator.add_directory(directory)
+        pool_s = time.perf_counter() - start
+
+        # A second run over the same directory is served from the corner cache
+        cached = ChessboardCalibrator(BOARD, SQUARE_MM, detect_width=args.detect_width,
+                                      workers=args.workers, min_views=6, max_views=args.views)
+        start = time.perf_counter()
+        cached.add_directory(directory)
+        cached_s = time.perf_counter() - start
+        calibrator.stop()
+
+        print(f"{'detection':<28} {'seconds':>8} {'views':>6}")
+        print(f"{'serial, full resolution':<28} {serial_s:>8.2f} {serial_found:>6}")
+        print(f"{f'pool x{calibrator.workers}, {args.detect_width} px':<28} "
+              f"{pool_s:>8.2f} {len(calibrator.views):>6}")
+        print(f"{'corner cache':<28} {cached_s:>8.2f} {len(cached.views):>6}")
+
+        result = calibrator.calibrate()
+        fx_error = abs(result.camera_matrix[0, 0] - camera_matrix[0, 0]) / camera_matrix[0, 0] * 100
+        print(f"rms reprojection error {result.rms_error:.3f} px, "
+              f"fx {result.camera_matrix[0, 0]:.1f} (truth {camera_matrix[0, 0]:.1f}, {fx_error:.2f}%), "
+              f"k1 {result.distortion_coeffs.ravel()[0]:.3f} (truth {distortion_coeffs[0]:.3f})")
+
+        # Reprojection error: vectorised over all views vs a projectPoints loop
+        object_points = calibrator.object_points
+        image_points = np.stack(calibrator.views)
+        _, K, dist, rvecs, tvecs = cv2.calibrateCamera(
+            [object_points] * len(image_points), list(image_points.reshape(len(image_points), -1, 1, 2)),
+            resolution, None, None)
+        iterations = 200
+        start = time.perf_counter()
+        for _ in range(iterations):
+            vectorised, _ = reprojection_errors(object_points, image_points, np.array(rvecs),
+                                                np.array(tvecs), K, dist)
+        vectorised_ms = (time.perf_counter() - start) / iterations * 1000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            total = 0.0
+            for i in range(len(image_points)):
+                projected, _ = cv2.projectPoints(object_points, rvecs[i], tvecs[i], K, dist)
+                total += np.sum((projected.reshape(-1, 2) - image_points[i]) ** 2)
+            looped = np.sqrt(total / image_points[..., 0].size)
+        looped_ms = (time.perf_counter() - start) / iterations * 1000
+        print(f"reprojection error: vectorised {vectorised_ms:.3f} ms, projectPoints loop {looped_ms:.3f} ms "
+              f"(rms {vectorised:.4f} vs {looped:.4f})")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+DDS image publishing benchmark
+
+Runs CameraInterface with the mock camera on a local DDS domain and subscribes
+to both the inline ImageData topic and the shared-memory descriptor topic in
+the same process. Reports achieved fps and capture-to-receive latency for each,
+and fails if samples arrive malformed or out of order (a loopback check).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+
+import camera_interface
+from camera_interface import CameraInterface
+from shm_transport import FrameDescriptor, SharedFrameReader
+
+if not camera_interface.HAS_DDS:
+    sys.exit("CycloneDDS is required for this benchmark")
+
+from cyclonedds.sub import DataReader
+from cyclonedds.topic import Topic
+from cyclonedds.core import Listener
+from dashcam_types import ImageData, SharedImageDescriptor
+
+
+class TopicProbe:
+    """Collects arrival statistics for one image topic"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies_us = []
+        self.last_sequence = -1
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def record(self, metadata, payload_size=None):
+        now_us = time.time_ns() // 1000
+        with self.lock:
+            self.latencies_us.append(now_us - metadata.timestamp)
+            if metadata.sequence_id <= self.last_sequence:
+                self.errors.append(f"out of order: {metadata.sequence_id} after {self.last_sequence}")
+            self.last_sequence = metadata.sequence_id
+            expected = metadata.width * metadata.height * metadata.channels
+            if payload_size is not None and payload_size != expected:
+                self.errors.append(f"frame {metadata.sequence_id}: {payload_size} bytes, expected {expected}")
+
+    def report(self, duration):
+        latencies = np.array(self.latencies_us or [0]) / 1000.0
+        return {
+            "topic": self.name,
+            "frames": len(self.latencies_us),
+            "fps": len(self.latencies_us) / duration,
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p99": float(np.percentile(latencies, 99)),
+            "errors": len(self.errors),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DDS image publishing benchmark")
+    parser.add_argument("--domain", type=int, default=42)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--framerate", type=int, default=30)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.split("x"))
+    config = {
+        "camera": {"resolution": [width, height], "framerate": args.framerate},
+        "dds": {
+            "domain_id": args.domain,
+            "image_topic": "bench/raw_images",
+            "descriptor_topic": "bench/raw_images/shm",
+            "control_topic": "bench/control",
+            "status_topic": "bench/status"
+        },
+        "calibration": {"auto_load": False},
+        "shared_memory": {"enabled": True, "slots": 8, "inline_fallback": "auto"}
+    }
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(config, f)
+        config_file = f.name
+
+    camera = CameraInterface(config_file)
+    if not camera.initialize():
+        sys.exit("Failed to initialize camera interface")
+
+    inline = TopicProbe("inline")
+    shared = TopicProbe("shared_memory")
+    frame_reader = SharedFrameReader()
+
+    def on_inline(reader):
+        for sample in reader.take(N=8):
+            inline.record(sample.metadata, len(sample.data))
+
+    def on_descriptor(reader):
+        for sample in reader.take(N=8):
+            metadata = sample.metadata
+            frame = frame_reader.view(FrameDescriptor(
+                sample.segment, sample.slot, metadata.sequence_id, metadata.timestamp,
+                (metadata.height, metadata.width, metadata.channels), metadata.format))
+            shared.record(metadata, None if frame is None else frame.nbytes)
+
+    participant = camera.dds_participant
+    qos = camera._image_qos()
+    readers = [
+        DataReader(participant, Topic(participant, "bench/raw_images", ImageData),
+                   qos=qos, listener=Listener(on_data_available=on_inline)),
+        DataReader(participant, Topic(participant, "bench/raw_images/shm", SharedImageDescriptor),
+                   qos=qos, listener=Listener(on_data_available=on_descriptor)),
+    ]
+
+    camera.start()
+    time.sleep(args.duration)
+    camera.stop()
+    frame_reader.close()
+    os.unlink(config_file)
+
+    results = [inline.report(args.duration), shared.report(args.duration)]
+    print(json.dumps({"resolution": args.resolution, "framerate": args.framerate,
+                      "results": results}, indent=2))
+    for probe in (inline, shared):
+        for error in probe.errors[:5]:
+            print(f"{probe.name}: {error}", file=sys.stderr)
+    del readers
+    sys.exit(1 if inline.errors or shared.errors or not inline.latencies_us else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Module executor harness
+
+Runs several BaseDDSModule instances in one process on one local DDS domain,
+each spinning its executor on its own thread, and a monitor participant that
+listens to /heartbeat and /metrics and sends /{module_id}/config messages.
+Reports idle CPU, config wake-up latency (and that configure_callback ran on
+the executor thread) and the heartbeat/metrics rate seen by the monitor.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+
+from base_module import BaseDDSModule, ModuleState, configmsg, heartbeat
+from dashcam_types import PerformanceMetrics
+from cyclonedds.core import Qos, Policy
+from cyclonedds.domain import DomainParticipant
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.topic import Topic
+
+
+class EchoModule(BaseDDSModule):
+    """Records when and on which thread each config message is dispatched"""
+
+    def __init__(self, module_id: str, domain_id: int):
+        super().__init__(module_id, domain_id=domain_id)
+        self.received = []
+        self.thread = None
+
+    def configure_callback(self, data: dict) -> None:
+        self.received.append((time.perf_counter_ns() - data["sent_ns"],
+                              threading.get_ident() == self.executor.thread_id))
+
+    def start(self) -> None:
+        self.status = ModuleState.Running
+        self.thread = threading.Thread(target=self.spin, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.request_stop()
+        self.thread.join(timeout=2.0)
+        self.status = ModuleState.Stopped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Module executor harness")
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--domain", type=int, default=51)
+    parser.add_argument("--idle-s", type=float, default=3.0)
+    parser.add_argument("--pings", type=int, default=50)
+    args = parser.parse_args()
+
+    modules = [EchoModule(f"echo_{i}", args.domain) for i in range(args.modules)]
+
+    monitor = DomainParticipant(args.domain)
+    history = Qos(Policy.History.KeepLast(1000))
+    heartbeats = DataReader(monitor, Topic(monitor, "/heartbeat", heartbeat), qos=history)
+    metrics = DataReader(monitor, Topic(monitor, "/metrics", PerformanceMetrics), qos=history)
+    config_writers = [DataWriter(monitor, Topic(monitor, f"/{m.module_id}/config", configmsg))
+                      for m in modules]
+
+    for module in modules:
+        module.start()
+    time.sleep(0.5)  # discovery
+    heartbeats.take(N=1000)
+    metrics.take(N=1000)
+
+    wall, cpu = time.monotonic(), time.process_time()
+    time.sleep(args.idle_s)
+    idle_cpu = 100.0 * (time.process_time() - cpu) / (time.monotonic() - wall)
+    heartbeat_count = len(heartbeats.take(N=1000))
+    metrics_count = len(metrics.take(N=1000))
+
+    for _ in range(args.pings):
+        for writer in config_writers:
+            writer.write(configmsg(config_json=json.dumps({"sent_ns": time.perf_counter_ns()})))
+        time.sleep(0.02)
+    time.sleep(0.2)
+
+    for module in modules:
+        module.stop()
+
+    latencies_us = sorted(latency / 1000 for m in modules for latency, _ in m.received)
+    on_executor = all(ok for m in modules for _, ok in m.received)
+    expected = args.modules * args.idle_s
+    print(f"modules: {args.modules}")
+    print(f"idle cpu: {idle_cpu:.2f}% of one core")
+    print(f"heartbeats: {heartbeat_count} (expected ~{expected:.0f}), metrics: {metrics_count}")
+    print(f"config dispatched: {len(latencies_us)}/{args.modules * args.pings}, "
+          f"on executor thread: {on_executor}")
+    if latencies_us:
+        print(f"config latency us: p50 {statistics.median(latencies_us):.0f} "
+              f"p99 {latencies_us[int(len(latencies_us) * 0.99) - 1]:.0f} max {latencies_us[-1]:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Raw frame dump benchmark
+
+Measures write throughput of FrameDumpWriter at a few resolutions, then
+builds a long dump index (the frames file is sparse, so only the index takes
+real space) and compares selecting a time range by binary search over the
+np.memmap'd index against loading the index and scanning it with a mask.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+
+from frame_dump import FrameDumpWriter, FrameDump, INDEX_DTYPE, DATA_OFFSET, FRAMES_SUFFIX, INDEX_SUFFIX
+
+START_US = 1_700_000_000_000_000
+
+
+def bench_write(workdir, resolution, frames):
+    width, height = resolution
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    writer = FrameDumpWriter(os.path.join(workdir, f"write_{width}x{height}"), frame.shape)
+    start = time.perf_counter()
+    for i in range(frames):
+        writer.write(frame, START_US + i * 33_333, i * 33_333_000, i, 0.0, 1.0)
+    writer.flush(sync=True)
+    elapsed = time.perf_counter() - start
+    writer.close()
+    megabytes = writer.bytes_written / (1 << 20)
+    print(f"write {width}x{height}: {frames / elapsed:7.1f} fps, {megabytes / elapsed:7.1f} MB/s "
+          f"(30 fps needs {megabytes / frames * 30:.0f} MB/s)")
+    os.remove(writer.base + FRAMES_SUFFIX)
+    os.remove(writer.base + INDEX_SUFFIX)
+
+
+def build_long_dump(workdir, frames, resolution=(1920, 1080)):
+    """Index for a long capture; the frames file is sized but never written"""
+    width, height = resolution
+    writer = FrameDumpWriter(os.path.join(workdir, "long"), (height, width, 3))
+    writer.close()
+    index = np.zeros(frames, dtype=INDEX_DTYPE)
+    index["timestamp"] = START_US + np.arange(frames, dtype=np.uint64) * 33_333
+    index["sequence_id"] = np.arange(frames)
+    index.tofile(writer.base + INDEX_SUFFIX)
+    with open(writer.base + FRAMES_SUFFIX, "r+b") as f:
+        f.truncate(DATA_OFFSET + frames * writer.stride)
+    return writer.base
+
+
+def bench_query(base, queries):
+    rng = np.random.default_rng(1)
+    start = time.perf_counter()
+    dump = FrameDump(base)
+    open_ms = (time.perf_counter() - start) * 1000
+    span = int(dump.index["timestamp"][-1] - dump.index["timestamp"][0])
+    ranges = [(START_US + int(t), START_US + int(t) + 10_000_000) for t in rng.integers(0, span, queries)]
+
+    start = time.perf_counter()
+    found = [dump.find(a, b) for a, b in ranges]
+    search_us = (time.perf_counter() - start) / queries * 1e6
+
+    start = time.perf_counter()
+    index = np.fromfile(base + INDEX_SUFFIX, dtype=INDEX_DTYPE)
+    load_ms = (time.perf_counter() - start) * 1000
+    linear = ranges[:max(1, queries // 20)]
+    start = time.perf_counter()
+    for (a, b), (first, last) in zip(linear, found):
+        matches = np.flatnonzero((index["timestamp"] >= a) & (index["timestamp"] < b))
+        assert matches[0] == first and matches[-1] == last - 1
+    scan_us = (time.perf_counter() - start) / len(linear) * 1e6
+
+    hours = span / 3.6e9
+    print(f"\nindex of {len(dump):,} frames ({hours:.1f} h at 30 fps, "
+          f"{os.path.getsize(base + INDEX_SUFFIX) / (1 << 20):.0f} MB)")
+    print(f"  memmap open          {open_ms:8.2f} ms")
+    print(f"  binary search range  {search_us:8.1f} us per query")
+    print(f"  load index           {load_ms:8.2f} ms")
+    print(f"  linear mask scan     {scan_us:8.1f} us per query ({scan_us / search_us:.0f}x)")
+
+    first, last = found[0]
+    frames, records = dump.time_range(*ranges[0])
+    print(f"  10 s range -> frames {first}..{last - 1}, view {frames.shape}, "
+          f"first sequence_id {int(records['sequence_id'][0])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw frame dump benchmark")
+    parser.add_argument("--frames", type=int, default=120, help="Frames written per resolution")
+    parser.add_argument("--index-frames", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_frame_dump_") as workdir:
+        for resolution in ((640, 480), (1280, 720), (1920, 1080)):
+            bench_write(workdir, resolution, args.frames)
+        bench_query(build_long_dump(workdir, args.index_frames), args.queries)
+
+
+if __name__ == "__main__":
+    main()
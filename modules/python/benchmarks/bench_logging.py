@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Log call cost benchmark
+
+Measures the caller-side cost of log calls through AsyncLogTransport
+(filtered out, accepted, rate limited) and through a stdlib logger routed to
+it, against a synchronous stdlib FileHandler, and checks that the rotating
+file sink keeps the file within max_size_mb.
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+
+from log_transport import AsyncLogTransport, AsyncLogHandler
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log call cost benchmark")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="dashcam_bench_log_")
+
+    try:
+        transport = AsyncLogTransport("bench", level=1, queue_size=1 << 16,
+                                      rate_limit_burst=10, rate_limit_window_s=60.0)
+        transport.add_file_sink(os.path.join(directory, "async.log"), max_size_mb=1, backup_count=2)
+
+        async_logger = logging.getLogger("bench.async")
+        async_logger.propagate = False
+        async_logger.handlers = [AsyncLogHandler(transport)]
+        async_logger.setLevel(logging.INFO)
+
+        sync_logger = logging.getLogger("bench.sync")
+        sync_logger.propagate = False
+        sync_logger.handlers = [logging.FileHandler(os.path.join(directory, "sync.log"))]
+        sync_logger.setLevel(logging.INFO)
+
+        results = [
+            ("transport debug (filtered)", per_call_ns(lambda i: transport.emit(0, "frame %d", (i,)), args.calls)),
+            ("transport info", per_call_ns(lambda i: transport.emit(1, "frame %d", (i,)), args.calls)),
+            ("transport repeated error", per_call_ns(lambda i: transport.emit(3, "Failed to capture frame: timeout"), args.calls)),
+            ("stdlib->async debug (filtered)", per_call_ns(lambda i: async_logger.debug("frame %d", i), args.calls)),
+            ("stdlib->async info", per_call_ns(lambda i: async_logger.info("frame %d", i), args.calls)),
+            ("stdlib FileHandler info", per_call_ns(lambda i: sync_logger.info("frame %d", i), args.calls // 4)),
+        ]
+        transport.flush(timeout=30.0)
+
+        print(f"{'call':<32} {'ns/call':>10}")
+        for name, ns in results:
+            print(f"{name:<32} {ns:>10.0f}")
+        sizes = sorted((name, os.path.getsize(os.path.join(directory, name)))
+                       for name in os.listdir(directory) if name.startswith("async.log"))
+        print(f"transport: {transport.stats()}")
+        print(f"rotated files: {sizes}")
+        transport.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Output stream rendering benchmark
+
+Renders a set of declared output streams from synthetic frames with
+OutputStreams (one shared half-resolution pyramid per frame) and compares it
+with every consumer resizing the full BGR frame itself, as each subscriber
+would have to without derived streams. Also reports how far the pyramid output
+is from a direct INTER_AREA resize of the full frame (PSNR).
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+import cv2
+
+from frame_pool import FrameBuffer
+from outputs import OutputSpec, OutputStreams, plan_output, _CONVERSIONS
+from synthetic_camera import SyntheticCamera
+
+STREAMS = [
+    {"name": "preview", "resolution": [640, 360]},
+    {"name": "thumbnail", "resolution": [320, 180]},
+    {"name": "road", "crop": [0.0, 0.35, 1.0, 0.5], "resolution": [512, 160], "format": "GRAY"},
+    {"name": "plate", "crop": [0.4, 0.6, 0.2, 0.2], "resolution": [192, 108], "format": "GRAY"},
+    {"name": "detector", "resolution": [416, 234], "format": "RGB"},
+]
+
+
+def naive_render(frame, spec):
+    """What a subscriber does with the full frame: crop, INTER_AREA resize, convert"""
+    height, width = frame.shape[:2]
+    x, y, w, h = spec.crop or (0.0, 0.0, 1.0, 1.0)
+    region = frame[round(y * height):round((y + h) * height), round(x * width):round((x + w) * width)]
+    size = spec.resolution or region.shape[1::-1]
+    out = cv2.resize(region, size, interpolation=cv2.INTER_AREA)
+    conversion = _CONVERSIONS.get(spec.format)
+    return cv2.cvtColor(out, conversion) if conversion is not None else out
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float32) - b.astype(np.float32)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Output stream rendering benchmark")
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--subscribers", type=int, default=2,
+                        help="Subscribers per stream for the naive case")
+    args = parser.parse_args()
+    resolution = tuple(int(v) for v in args.resolution.split("x"))
+
+    camera = SyntheticCamera({"resolution": resolution, "bank_frames": 8, "pace": False})
+    frames = []
+    for _ in range(8):
+        frame = np.empty((resolution[1], resolution[0], 3), dtype=np.uint8)
+        camera.capture_into(frame)
+        frames.append(frame)
+    specs = [OutputSpec.from_config(stream) for stream in STREAMS]
+    streams = OutputStreams(specs, slabs=4)
+
+    print(f"{len(specs)} streams from {args.resolution}")
+    for spec in specs:
+        plan = plan_output(spec, frames[0].shape)
+        print(f"  {spec.name:<10} {plan.size[0]:>4}x{plan.size[1]:<4} {spec.format:<4} from level {plan.level}")
+
+    start = time.perf_counter()
+    for i in range(args.frames):
+        for _, output in streams.render(FrameBuffer.wrap(frames[i % len(frames)]), i):
+            output.release()
+    shared_ms = (time.perf_counter() - start) / args.frames * 1000
+
+    start = time.perf_counter()
+    for i in range(args.frames):
+        frame = frames[i % len(frames)]
+        for spec in specs:
+            naive_render(frame, spec)
+    naive_ms = (time.perf_counter() - start) / args.frames * 1000
+
+    print(f"\nshared pyramid        {shared_ms:7.2f} ms/frame ({streams.levels_built:.0f} levels)")
+    print(f"per-stream resize     {naive_ms:7.2f} ms/frame ({naive_ms / shared_ms:.1f}x)")
+    print(f"per-subscriber x{args.subscribers}     {naive_ms * args.subscribers:7.2f} ms/frame "
+          f"({naive_ms * args.subscribers / shared_ms:.1f}x)")
+
+    print("\nPSNR against direct INTER_AREA from the full frame")
+    rendered = streams.render(FrameBuffer.wrap(frames[0]), 0)
+    for spec, output in rendered:
+        print(f"  {spec.name:<10} {psnr(output.array, naive_render(frames[0], spec)):6.1f} dB")
+        output.release()
+
+
+if __name__ == "__main__":
+    main()
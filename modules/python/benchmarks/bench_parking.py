@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Parking mode benchmark
+
+First measures the cost of one MotionDetector check against differencing the
+full-resolution grayscale frame. Then runs CameraInterface on the
+SyntheticCamera, each scenario in a fresh process: continuous capture with
+parking mode off, parked with a static scene (stays idle), and parked with a
+moving scene (motion switches it to active). Reports throughput, process CPU
+(one core = 100%) and the parking mode's own per-state CPU accounting.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+import cv2
+
+from motion import MotionDetector
+
+# name -> (parking mode enabled, synthetic bank frames); one frame is a static scene
+SCENARIOS = {
+    "continuous": (False, 8),
+    "parked_static": (True, 1),
+    "parked_motion": (True, 8),
+}
+
+
+def bench_detector(resolution, iterations=300):
+    width, height = resolution
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    detector = MotionDetector()
+    detector.score(frames[0])
+    start = time.perf_counter()
+    for i in range(iterations):
+        detector.score(frames[i % len(frames)])
+    downsampled = (time.perf_counter() - start) / iterations * 1000
+
+    background = cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY).astype(np.float32)
+    start = time.perf_counter()
+    for i in range(iterations // 10):
+        gray = cv2.cvtColor(frames[i % len(frames)], cv2.COLOR_BGR2GRAY)
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(background))
+        cv2.countNonZero(cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(gray, background, 0.05)
+    full = (time.perf_counter() - start) / (iterations // 10) * 1000
+    print(f"{width}x{height}: {downsampled:.3f} ms per check at {detector.width}px wide, "
+          f"{full:.2f} ms at full resolution ({full / downsampled:.0f}x)")
+
+
+def run_scenario(name, config_path, warmup_s, duration_s):
+    """Runs in a fresh process: drive CameraInterface and return one result row"""
+    import logging
+    from camera_interface import CameraInterface
+
+    logging.getLogger("camera_interface").setLevel(logging.WARNING)
+    camera = CameraInterface(config_path)
+    if not camera.initialize() or not camera.start():
+        return {"name": name, "error": "failed to start"}
+    try:
+        time.sleep(warmup_s)
+        published = camera.published.total
+        cpu = os.times()
+        start = time.monotonic()
+        time.sleep(duration_s)
+        elapsed = time.monotonic() - start
+        cpu_end = os.times()
+        parking = camera.parking.stats()
+        return {
+            "name": name,
+            "fps": round((camera.published.total - published) / elapsed, 2),
+            "cpu_percent": round(100.0 * ((cpu_end.user - cpu.user) + (cpu_end.system - cpu.system)) / elapsed, 1),
+            "state": parking["state"],
+            "motion_events": parking["motion_events"],
+            "check_ms": parking["check_ms"],
+            "cpu_percent_idle": parking["cpu_percent_idle"],
+            "cpu_percent_active": parking["cpu_percent_active"],
+        }
+    finally:
+        camera.stop()
+
+
+def build_config(name, parked, bank_frames, resolution, domain_id, workdir):
+    config = {
+        "module_id": f"bench_{name}",
+        "camera": {"resolution": list(resolution), "framerate": 30},
+        "synthetic_camera": {"enabled": True, "bank_frames": bank_frames, "pace": True, "seed": 0},
+        "parking_mode": {"enabled": parked, "idle_fps": 2, "hold_s": 10},
+        "dds": {"domain_id": domain_id},
+        "calibration": {"auto_load": False, "map_cache_dir": None},
+        "logging": {"level": "WARNING", "file": None},
+    }
+    path = os.path.join(workdir, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump(config, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parking mode benchmark")
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--domain", type=int, default=70)
+    args = parser.parse_args()
+    resolution = tuple(int(v) for v in args.resolution.split("x"))
+
+    for size in ((1280, 720), resolution):
+        bench_detector(size)
+
+    print(f"\n{'scenario':<15} {'fps':>6} {'cpu %':>7} {'state':>7} {'events':>7} "
+          f"{'cpu % idle':>11} {'cpu % active':>13}")
+    with tempfile.TemporaryDirectory(prefix="bench_parking_") as workdir:
+        for i, (name, (parked, bank_frames)) in enumerate(SCENARIOS.items()):
+            config_path = build_config(name, parked, bank_frames, resolution, args.domain + i, workdir)
+            with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                row = pool.submit(run_scenario, name, config_path, args.warmup, args.duration).result()
+            if "error" in row:
+                print(f"{name:<15} {row['error']}")
+                continue
+            print(f"{name:<15} {row['fps']:>6.1f} {row['cpu_percent']:>7.1f} {row['state']:>7} "
+                  f"{row['motion_events']:>7} {row['cpu_percent_idle'] or '-':>11} "
+                  f"{row['cpu_percent_active'] or '-':>13}")
+
+
+if __name__ == "__main__":
+    main()
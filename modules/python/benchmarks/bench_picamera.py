@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Picamera2 stream configuration benchmark
+
+Drives PicameraBackend with FakePicamera2 (unpaced) and measures the CPU time
+consumers spend per frame on a typical set of derived work: a parking-mode
+motion check, a 640x360 preview, a greyscale road crop, and optionally the
+full-resolution BGR frame. The fake's buffers stand in for the ISP's output,
+so only work done on the CPU is timed. Configurations:
+
+  capture_array  the previous path: a copied RGB888 main frame, all derived
+                 work from BGR
+  rgb+lores      RGB888 main mapped in place, YUV420 lores for the derived work
+  yuv+lores      YUV420 main and lores, BGR converted only where requested
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+from fake_picamera import FakePicamera2, FakeMappedArray
+from frame_pool import FrameBuffer, FramePool
+from motion import MotionDetector
+from outputs import OutputSpec, OutputStreams
+from picamera_backend import PicameraBackend
+
+STREAMS = [
+    {"name": "preview", "resolution": [640, 360]},
+    {"name": "road", "crop": [0.0, 0.35, 1.0, 0.5], "resolution": [512, 160], "format": "GRAY"},
+]
+
+
+def run(resolution, fmt, lores, frames, need_main):
+    camera = FakePicamera2(pace=False)
+    backend = PicameraBackend(camera, {"format": fmt, "lores_resolution": lores, "buffer_count": 6},
+                              mapped_array=FakeMappedArray)
+    camera.configure(backend.create_configuration(resolution))
+    camera.start()
+    width, height = resolution
+    pool = FramePool("capture", (height, width, 3), 4)
+    streams = OutputStreams([OutputSpec.from_config(stream) for stream in STREAMS], slabs=4)
+    detector = MotionDetector()
+    legacy = lores is None
+
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    for i in range(frames):
+        if legacy:
+            buffer = FrameBuffer.wrap(camera.capture_array())
+        else:
+            buffer = backend.request(pool)
+        luma = getattr(buffer, "luma", None)
+        detector.score(luma if luma is not None else buffer.array)
+        if need_main:
+            buffer.array
+        for _, output in streams.render(buffer, i, planes=not legacy):
+            output.release()
+        buffer.release()
+    wall_ms = (time.perf_counter() - start) / frames * 1000
+    cpu_ms = (time.process_time() - start_cpu) / frames * 1000
+    camera.stop()
+    stats = backend.stats()
+    main_bytes = camera.camera_config["main"]["framesize"]
+    return wall_ms, cpu_ms, stats["bgr_conversions"], main_bytes, streams.sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Picamera2 stream configuration benchmark")
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--lores", default="640x360")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    resolution = tuple(int(v) for v in args.resolution.split("x"))
+    lores = [int(v) for v in args.lores.split("x")]
+
+    print(f"main {args.resolution}, lores {args.lores}, {args.frames} frames\n")
+    print(f"{'configuration':<16} {'main BGR':<9} {'ms/frame':>9} {'cpu ms':>7} {'main MB':>8}  conversions (main/lores), sources")
+    for name, fmt, lores_size in (("capture_array", "RGB888", None), ("rgb+lores", "RGB888", lores),
+                                  ("yuv+lores", "YUV420", lores)):
+        for need_main in (False, True):
+            wall_ms, cpu_ms, conversions, main_bytes, sources = run(resolution, fmt, lores_size,
+                                                                    args.frames, need_main)
+            print(f"{name:<16} {'yes' if need_main else 'no':<9} {wall_ms:>9.2f} {cpu_ms:>7.2f} "
+                  f"{main_bytes / (1 << 20):>8.2f}  {conversions['main']}/{conversions['lores']}, "
+                  f"{', '.join(f'{k}<-{v}' for k, v in sources.items())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+End-to-end CameraInterface pipeline benchmark
+
+Runs CameraInterface on the deterministic SyntheticCamera for each named
+configuration, each in a fresh process so CPU, RSS and DDS state do not leak
+between runs. After a warm-up the latency histograms and counters are reset
+and the pipeline is measured for a fixed duration. Reports throughput,
+p50/p99 capture-to-publish latency, dropped frames (sensor, queue and missed
+deadlines), CPU (including encoder worker processes) and RSS per
+configuration.
+
+--output writes the results as JSON; --compare checks a run against such a
+file and exits non-zero when throughput, p99 latency or CPU regress by more
+than --tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, "..", "camera_interface"))
+
+import numpy as np
+import cv2
+
+# name -> overrides merged into the generated camera config
+CONFIGURATIONS = {
+    "720p30": {"camera": {"resolution": [1280, 720], "framerate": 30}},
+    "1080p30": {"camera": {"resolution": [1920, 1080], "framerate": 30}},
+    "720p60": {"camera": {"resolution": [1280, 720], "framerate": 60}},
+    "1080p30_undistort": {"camera": {"resolution": [1920, 1080], "framerate": 30}, "undistort": True},
+    "720p30_jpeg": {"camera": {"resolution": [1280, 720], "framerate": 30},
+                    "compression": {"enabled": True, "quality": 85, "workers": 2,
+                                    "preview_resolution": [640, 360]}},
+    "720p30_jitter_drops": {"camera": {"resolution": [1280, 720], "framerate": 30},
+                            "synthetic_camera": {"jitter_ms": 2.0, "drop_rate": 0.02}},
+    "720p240_unpaced": {"camera": {"resolution": [1280, 720], "framerate": 240},
+                        "synthetic_camera": {"pace": False}},
+}
+
+# metric -> +1 when higher is better, -1 when lower is better
+COMPARED = {"fps": +1, "p99_ms": -1, "cpu_percent": -1}
+
+
+def write_calibration(path, resolution):
+    """Plausible wide-angle calibration so the undistort stage has work to do"""
+    width, height = resolution
+    focal = 0.8 * width
+    camera_matrix = np.array([[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]])
+    distortion_coeffs = np.array([[-0.28, 0.09, 0.0005, -0.0003, -0.012]])
+    optimal, roi = cv2.getOptimalNewCameraMatrix(camera_matrix, distortion_coeffs, resolution, 0, resolution)
+    with open(path, "w") as f:
+        json.dump({"camera_matrix": camera_matrix.tolist(), "distortion_coeffs": distortion_coeffs.tolist(),
+                   "optimal_camera_matrix": optimal.tolist(), "roi": list(roi),
+                   "resolution": list(resolution)}, f)
+
+
+def build_config(name, overrides, domain_id, workdir):
+    synthetic = {"enabled": True, "bank_frames": 8, "pace": True, "seed": 0}
+    synthetic.update(overrides.get("synthetic_camera", {}))
+    camera = dict(overrides["camera"])
+    calibration_file = os.path.join(workdir, f"{name}_calibration.json")
+    if overrides.get("undistort"):
+        write_calibration(calibration_file, tuple(camera["resolution"]))
+    config = {
+        "module_id": f"bench_{name}",
+        "camera": camera,
+        "synthetic_camera": synthetic,
+        "dds": {"domain_id": domain_id},
+        "calibration": {"auto_load": bool(overrides.get("undistort")), "file": calibration_file,
+                        "map_cache_dir": None},
+        "compression": overrides.get("compression", {"enabled": False}),
+        "logging": {"level": "WARNING", "file": None},
+    }
+    path = os.path.join(workdir, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump(config, f)
+    return path
+
+
+def _children_cpu_s():
+    """utime + stime of the live child processes (the JPEG encoder pool)"""
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0.0
+    for child in mp.active_children():
+        try:
+            with open(f"/proc/{child.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+def run_configuration(name, config_path, warmup_s, duration_s):
+    """Runs in a fresh process: drive CameraInterface and return one result row"""
+    import logging
+    from camera_interface import CameraInterface
+
+    logging.getLogger("camera_interface").setLevel(logging.WARNING)
+    camera = CameraInterface(config_path)
+    if not camera.initialize() or not camera.start():
+        return {"name": name, "error": "failed to start"}
+    try:
+        time.sleep(warmup_s)
+
+        for histogram in camera.latency.values():
+            histogram.reset()
+        published = camera.published.total
+        captured = camera.sequence_id
+        queue_drops = camera.process_queue.dropped + camera.publish_queue.dropped
+        sensor_drops = camera.camera.dropped
+        missed = camera.scheduler.missed_deadlines
+        cpu = os.times()
+        children_cpu = _children_cpu_s()
+        start = time.monotonic()
+
+        time.sleep(duration_s)
+
+        elapsed = time.monotonic() - start
+        cpu_end = os.times()
+        cpu_s = (cpu_end.user - cpu.user) + (cpu_end.system - cpu.system) + _children_cpu_s() - children_cpu
+        status = camera.get_status()
+        end_to_end = camera.latency["end_to_end"].snapshot()
+        frames = camera.published.total - published
+        return {
+            "name": name,
+            "resolution": status["resolution"],
+            "framerate": status["settings"]["framerate"],
+            "duration_s": round(elapsed, 2),
+            "frames": frames,
+            "fps": round(frames / elapsed, 2),
+            "captured": camera.sequence_id - captured,
+            "p50_ms": end_to_end["p50_ms"],
+            "p99_ms": end_to_end["p99_ms"],
+            "max_ms": end_to_end["max_ms"],
+            "process_p50_ms": camera.latency["process"].snapshot()["p50_ms"],
+            "jitter_p99_ms": camera.latency["jitter"].snapshot()["p99_ms"],
+            "dropped_sensor": camera.camera.dropped - sensor_drops,
+            "dropped_queue": camera.process_queue.dropped + camera.publish_queue.dropped - queue_drops,
+            "missed_deadlines": camera.scheduler.missed_deadlines - missed,
+            "cpu_percent": round(100.0 * cpu_s / elapsed, 1),
+            "rss_mb": round(camera.metrics.process.rss_bytes / (1 << 20), 1),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+    finally:
+        camera.stop()
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                  capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ""
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": revision,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print the change against a baseline file; returns the list of regressions"""
+    with open(baseline_path) as f:
+        baseline = {row["name"]: row for row in json.load(f)["results"]}
+    regressions = []
+    print(f"\nvs {baseline_path} (tolerance {tolerance:.0%})")
+    for row in results:
+        before = baseline.get(row["name"])
+        if before is None or "error" in row or "error" in before:
+            continue
+        changes = []
+        for metric, direction in COMPARED.items():
+            old, new = before[metric], row[metric]
+            change = (new - old) / old if old else 0.0
+            worse = -direction * change > tolerance
+            changes.append(f"{metric} {old:g} -> {new:g} ({change:+.0%}){' REGRESSION' if worse else ''}")
+            if worse:
+                regressions.append((row["name"], metric))
+        print(f"  {row['name']:<22} " + ", ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end CameraInterface pipeline benchmark")
+    parser.add_argument("--configs", default=",".join(CONFIGURATIONS),
+                        help=f"Comma separated subset of: {', '.join(CONFIGURATIONS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per configuration")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--domain", type=int, default=60, help="First DDS domain id; one per configuration")
+    parser.add_argument("--output", "-o", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON from a previous --output")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.configs.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CONFIGURATIONS]
+    if unknown:
+        parser.error(f"unknown configuration(s): {', '.join(unknown)}")
+
+    results = []
+    print(f"{'config':<22} {'fps':>7} {'p50 ms':>8} {'p99 ms':>8} {'drop s/q/d':>11} {'cpu %':>7} {'rss MB':>7}")
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+        for i, name in enumerate(names):
+            config_path = build_config(name, CONFIGURATIONS[name], args.domain + i, workdir)
+            # One process per configuration; spawn so nothing is inherited from the parent
+            with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                row = pool.submit(run_configuration, name, config_path, args.warmup, args.duration).result()
+            results.append(row)
+            if "error" in row:
+                print(f"{name:<22} {row['error']}")
+                continue
+            drops = f"{row['dropped_sensor']}/{row['dropped_queue']}/{row['missed_deadlines']}"
+            print(f"{name:<22} {row['fps']:>7.1f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+                  f"{drops:>11} {row['cpu_percent']:>7.1f} {row['rss_mb']:>7.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Loop recorder storage benchmark
+
+Writes synthetic JPEG-sized frames through SegmentStore into a target directory
+(a tmpfs by default; point --path at a loop device mount to include real block
+I/O) and reports sustained throughput, segment rotation/cleanup counts and
+fsync latency for several fsync policies.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "recorder"))
+
+import numpy as np
+
+from segment_store import SegmentStore
+
+
+def run(path, frames, frame_bytes, fsync_interval_s, preallocate_mb, quota_mb, segment_s, fps):
+    store = SegmentStore(path, quota_mb << 20, segment_s,
+                         preallocate_bytes=preallocate_mb << 20,
+                         fsync_interval_s=fsync_interval_s)
+    payload = np.random.default_rng(0).integers(0, 255, frame_bytes, dtype=np.uint8).tobytes()
+    frame_us = int(1_000_000 / fps)
+    start = time.perf_counter()
+    for i in range(frames):
+        store.write_frame(i * frame_us, i, payload)
+    store.close()
+    elapsed = time.perf_counter() - start
+    stats = store.stats()
+    return {
+        "fsync_interval_s": fsync_interval_s,
+        "preallocate_mb": preallocate_mb,
+        "MB_per_s": stats["bytes_written"] / elapsed / 1e6,
+        "frames_per_s": frames / elapsed,
+        "segments_kept": stats["segments"],
+        "segments_deleted": stats["segments_deleted"],
+        "fsync_count": stats["fsync_count"],
+        "fsync_max_ms": stats["fsync_max_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loop recorder storage benchmark")
+    parser.add_argument("--path", default="/dev/shm" if os.path.isdir("/dev/shm") else None,
+                        help="Directory to write into (default: tmpfs)")
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--frame-kb", type=int, default=200)
+    parser.add_argument("--quota-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'fsync s':>8} {'prealloc MB':>12} {'MB/s':>9} {'frames/s':>9} "
+          f"{'kept':>5} {'deleted':>8} {'fsyncs':>7} {'fsync max ms':>13}")
+    for fsync_interval_s, preallocate_mb in [(0.0, 0), (0.0, 64), (1.0, 64), (0.1, 64)]:
+        directory = tempfile.mkdtemp(prefix="dashcam_bench_", dir=args.path)
+        try:
+            # 30 fps, 10 s segments -> ~60 MB per segment at 200 KB/frame
+            result = run(directory, args.frames, args.frame_kb * 1024, fsync_interval_s,
+                         preallocate_mb, args.quota_mb, segment_s=10, fps=30)
+        finally:
+            shutil.rmtree(directory)
+        print(f"{result['fsync_interval_s']:>8} {result['preallocate_mb']:>12} "
+              f"{result['MB_per_s']:>9.1f} {result['frames_per_s']:>9.1f} "
+              f"{result['segments_kept']:>5} {result['segments_deleted']:>8} "
+              f"{result['fsync_count']:>7} {result['fsync_max_ms']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
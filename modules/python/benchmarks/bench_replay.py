@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Replay source benchmark
+
+Writes the same synthetic clip as a raw frame dump, a recorder segment of
+JPEGs and an MJPEG video, then for each source reports the time to open it
+(building the frame index), random seek+read latency, unpaced sequential
+throughput, and the realtime factor ReplayCamera achieves at 1x and 4x speed.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "recorder"))
+
+import numpy as np
+import cv2
+
+from frame_dump import FrameDumpWriter
+from replay_camera import ReplayCamera, open_source
+from segment_store import SegmentWriter
+from synthetic_camera import SyntheticCamera
+
+START_US = 1_700_000_000_000_000
+
+
+def write_sources(workdir, resolution, frames, framerate):
+    width, height = resolution
+    camera = SyntheticCamera({"resolution": resolution, "bank_frames": 16, "pace": False})
+    period_us = int(1e6 / framerate)
+    dump = FrameDumpWriter(os.path.join(workdir, "clip.frames"), (height, width, 3))
+    segment = SegmentWriter(os.path.join(workdir, "clip.seg"), 0, 4 << 20)
+    video_path = os.path.join(workdir, "clip.avi")
+    video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), framerate, resolution)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    for i in range(frames):
+        camera.capture_into(frame)
+        timestamp = START_US + i * period_us
+        dump.write(frame, timestamp, timestamp * 1000, i)
+        segment.write_frame(timestamp, i, cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1])
+        video.write(frame)
+    dump.close()
+    segment.close(sync=False)
+    video.release()
+    return {"dump": dump.base + ".frames", "segment": segment.path, "video": video_path}
+
+
+def bench_source(path, resolution):
+    width, height = resolution
+    dst = np.empty((height, width, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    source = open_source(path)
+    open_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(0)
+    seeks = [rng.randrange(len(source)) for _ in range(50)]
+    start = time.perf_counter()
+    for i in seeks:
+        source.read(i, dst)
+    seek_ms = (time.perf_counter() - start) / len(seeks) * 1000
+
+    start = time.perf_counter()
+    for i in range(len(source)):
+        source.read(i, dst)
+    fps = len(source) / (time.perf_counter() - start)
+    source.close()
+    return open_ms, seek_ms, fps
+
+
+def realtime_factor(path, speed, seconds):
+    camera = ReplayCamera({"path": path, "speed": speed, "loop": True})
+    width, height = camera.resolution
+    dst = np.empty((height, width, 3), dtype=np.uint8)
+    camera.start()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        camera.capture_into(dst)
+    stats = camera.stats()
+    camera.close()
+    return stats["realtime_factor"], stats["late"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay source benchmark")
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--framerate", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Wall time per paced replay run")
+    args = parser.parse_args()
+    resolution = tuple(int(v) for v in args.resolution.split("x"))
+
+    with tempfile.TemporaryDirectory(prefix="bench_replay_") as workdir:
+        paths = write_sources(workdir, resolution, args.frames, args.framerate)
+        print(f"{args.frames} frames at {args.resolution}\n")
+        print(f"{'source':<8} {'MB':>7} {'open ms':>8} {'seek ms':>8} {'read fps':>9} "
+              f"{'1x':>6} {'4x':>6} {'late 4x':>8}")
+        for name, path in paths.items():
+            size_mb = os.path.getsize(path) / (1 << 20)
+            open_ms, seek_ms, fps = bench_source(path, resolution)
+            factor_1x, _ = realtime_factor(path, 1.0, args.seconds)
+            factor_4x, late = realtime_factor(path, 4.0, args.seconds)
+            print(f"{name:<8} {size_mb:>7.1f} {open_ms:>8.2f} {seek_ms:>8.3f} {fps:>9.0f} "
+                  f"{factor_1x:>6.2f} {factor_4x:>6.2f} {late:>8}")
+
+
+if __name__ == "__main__":
+    main()
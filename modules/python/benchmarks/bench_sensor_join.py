@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Sensor join benchmark
+
+Generates an NMEA log (1-10 Hz GPS epochs plus $PIMU at 100 Hz) along a
+known track, measures the parse rate of NmeaFusion, then joins a 30 fps frame
+stream against the resulting samples. Reports the per-frame join cost with
+SensorIndex's bisect against a linear scan over the same retention window,
+for growing index sizes, and the position error of nearest-sample and
+interpolated joins against the ground-truth track.
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+from functools import reduce
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "sensor_module"))
+
+from nmea import NmeaFusion
+from sensor_join import SensorIndex, SensorJoin
+
+START_US = 1_700_000_000_000_000
+SPEED_MPS = 15.0
+METRES_PER_DEG = 111_320.0
+
+
+def track(t_us):
+    """Ground truth: constant speed on a circle of radius 500 m"""
+    angle = SPEED_MPS * (t_us - START_US) / 1e6 / 500.0
+    north, east = 500.0 * math.sin(angle), 500.0 * (1 - math.cos(angle))
+    lat = -33.8688 + north / METRES_PER_DEG
+    lon = 151.2093 + east / (METRES_PER_DEG * math.cos(math.radians(lat)))
+    return lat, lon, math.degrees(angle) % 360.0
+
+
+def _sentence(body):
+    return f"${body}*{reduce(lambda acc, c: acc ^ ord(c), body, 0):02X}\n"
+
+
+def _dm(value, width):
+    degrees = int(abs(value))
+    return f"{degrees:0{width}d}{(abs(value) - degrees) * 60:07.4f}"
+
+
+def nmea_log(seconds, gps_hz, imu_hz):
+    """(timestamp_us, line) pairs in arrival order"""
+    lines = []
+    gps_period, imu_period = int(1e6 / gps_hz), int(1e6 / imu_hz)
+    for t in range(START_US, START_US + int(seconds * 1e6), imu_period):
+        lines.append((t, _sentence("PIMU,0.120,-0.030,9.810,0.10,-0.05,1.72")))
+        if (t - START_US) % gps_period == 0:
+            lat, lon, heading = track(t)
+            clock = time.gmtime(t // 1_000_000)
+            hms = time.strftime("%H%M%S", clock) + f".{(t // 10_000) % 100:02d}"
+            ns, ew = "S" if lat < 0 else "N", "W" if lon < 0 else "E"
+            lines.append((t, _sentence(f"GPGGA,{hms},{_dm(lat, 2)},{ns},{_dm(lon, 3)},{ew},1,9,0.9,42.0,M,,M,,")))
+            lines.append((t, _sentence(f"GPRMC,{hms},A,{_dm(lat, 2)},{ns},{_dm(lon, 3)},{ew},"
+                                       f"{SPEED_MPS / 0.514444:.2f},{heading:.1f},{time.strftime('%d%m%y', clock)},,,A")))
+    return lines
+
+
+def bench_parse(lines):
+    fusion = NmeaFusion()
+    samples = []
+    start = time.perf_counter()
+    for t, line in lines:
+        sample = fusion.update(line)
+        if sample is not None:
+            sample["timestamp"] = t
+            samples.append(sample)
+    elapsed = time.perf_counter() - start
+    print(f"parse: {len(lines) / elapsed:,.0f} sentences/s, {len(samples)} samples, "
+          f"{fusion.rejected} rejected")
+    return samples
+
+
+def linear_lookup(times, samples, timestamp, max_gap_us):
+    """Reference: nearest sample by scanning the whole window"""
+    best, best_gap = None, max_gap_us + 1
+    for t, sample in zip(times, samples):
+        gap = abs(timestamp - t)
+        if gap < best_gap:
+            best, best_gap = sample, gap
+    return best
+
+
+def bench_lookup(samples, frames, max_gap_us):
+    print(f"\n{'index size':>10} {'bisect us':>10} {'lerp us':>9} {'linear us':>10} {'speedup':>8}")
+    for size in (100, 1000, 10000, 60000):
+        if size > len(samples):
+            break
+        window = samples[-size:]
+        index = SensorIndex(retention_us=1 << 62, max_samples=size)
+        for sample in window:
+            index.add(sample["timestamp"], sample)
+        lo, hi = window[0]["timestamp"], window[-1]["timestamp"]
+        probes = [lo + (hi - lo) * i // frames for i in range(frames)]
+
+        timings = []
+        for interpolate in (False, True):
+            start = time.perf_counter()
+            for t in probes:
+                index.lookup(t, max_gap_us, interpolate)
+            timings.append((time.perf_counter() - start) / frames * 1e6)
+
+        times = [sample["timestamp"] for sample in window]
+        linear_probes = probes[::max(1, len(probes) // 200)]
+        start = time.perf_counter()
+        for t in linear_probes:
+            linear_lookup(times, window, t, max_gap_us)
+        linear = (time.perf_counter() - start) / len(linear_probes) * 1e6
+        print(f"{size:>10} {timings[0]:>10.2f} {timings[1]:>9.2f} {linear:>10.1f} {linear / timings[0]:>7.0f}x")
+
+
+def bench_accuracy(lines, max_gap_us, framerate, seconds):
+    """Join a frame stream against GPS-only samples; metres from the true track"""
+    fusion = NmeaFusion(emit_on=("RMC",))
+    gps = []
+    for t, line in lines:
+        sample = fusion.update(line)
+        if sample is not None:
+            sample["timestamp"] = t
+            gps.append(sample)
+
+    print(f"\n{'join':>12} {'mean m':>8} {'max m':>8} {'frames':>7}")
+    frame_times = [START_US + int(i * 1e6 / framerate) for i in range(int(seconds * framerate))]
+    for interpolate in (False, True):
+        join = SensorJoin(max_gap_us=max_gap_us, interpolate=interpolate, retention_us=1 << 62,
+                          clock=lambda: 0)
+        for sample in gps:
+            join.add_sample(sample["timestamp"], sample)
+        errors = []
+        for i, t in enumerate(frame_times):
+            for _, timestamp, match in join.request(i, t):
+                if match is None:
+                    continue
+                lat, lon, _ = track(timestamp)
+                north = (match[0]["latitude"] - lat) * METRES_PER_DEG
+                east = (match[0]["longitude"] - lon) * METRES_PER_DEG * math.cos(math.radians(lat))
+                errors.append(math.hypot(north, east))
+        name = "interpolated" if interpolate else "nearest"
+        print(f"{name:>12} {sum(errors) / len(errors):>8.2f} {max(errors):>8.2f} {len(errors):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor join benchmark")
+    parser.add_argument("--seconds", type=float, default=600.0, help="Length of the generated log")
+    parser.add_argument("--gps-hz", type=int, default=10)
+    parser.add_argument("--imu-hz", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=30 * 60, help="Frames joined per index size")
+    parser.add_argument("--max-gap-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    lines = nmea_log(args.seconds, args.gps_hz, args.imu_hz)
+    samples = bench_parse(lines)
+    max_gap_us = int(args.max_gap_ms * 1000)
+    bench_lookup(samples, args.frames, max_gap_us)
+    bench_accuracy(lines, max(max_gap_us, int(2e6 / args.gps_hz)), 30, min(args.seconds, 60.0))
+
+
+if __name__ == "__main__":
+    main()
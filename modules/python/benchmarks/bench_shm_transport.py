@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Frame transport benchmark
+
+Sends frames to a reader process either inline (the full pixel buffer is
+serialised, as ImageData.data would be) or through the shared-memory ring where
+only a FrameDescriptor crosses the process boundary. A multiprocessing pipe
+stands in for the DDS topic in both cases.
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+
+from shm_transport import FrameDescriptor, SharedFrameRing, SharedFrameReader
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+
+def inline_reader(conn):
+    checksum = 0
+    while True:
+        message = conn.recv_bytes()
+        if not message:
+            break
+        frame = np.frombuffer(message, dtype=np.uint8)
+        checksum += int(frame[0])
+    conn.send(checksum)
+
+
+def shm_reader(conn):
+    reader = SharedFrameReader()
+    checksum = 0
+    stale = 0
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        descriptor = FrameDescriptor.from_dict(message)
+        frame = reader.view(descriptor)
+        if frame is None:
+            stale += 1
+            continue
+        checksum += int(frame[0, 0, 0])
+        del frame
+    reader.close()
+    conn.send(checksum)
+
+
+def run(reader_fn, send, frames, iterations):
+    parent, child = mp.Pipe()
+    process = mp.Process(target=reader_fn, args=(child,))
+    process.start()
+    start = time.perf_counter()
+    for i in range(iterations):
+        send(parent, frames[i % len(frames)], i)
+    send(parent, None, iterations)
+    parent.recv()
+    elapsed = time.perf_counter() - start
+    process.join()
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame transport benchmark")
+    parser.add_argument("--iterations", "-n", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'resolution':>12} {'inline fps':>11} {'shm fps':>9} {'MB/frame':>9}")
+    for width, height in RESOLUTIONS:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+
+        def send_inline(conn, frame, _):
+            conn.send_bytes(b"" if frame is None else frame.tobytes())
+
+        inline_fps = run(inline_reader, send_inline, frames, args.iterations)
+
+        ring = SharedFrameRing(f"dashcam_bench_{os.getpid()}", (height, width, 3), slots=16)
+
+        def send_shm(conn, frame, sequence_id):
+            if frame is None:
+                conn.send(None)
+                return
+            conn.send(ring.write(frame, sequence_id, time.time_ns() // 1000).to_dict())
+
+        try:
+            shm_fps = run(shm_reader, send_shm, frames, args.iterations)
+        finally:
+            ring.close()
+
+        print(f"{width:>6}x{height:<5} {inline_fps:>11.1f} {shm_fps:>9.1f} "
+              f"{frames[0].nbytes / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Undistortion benchmark
+
+Compares the per-frame cost of cv2.undistort against the precomputed remap
+tables used by CameraInterface, on MockCamera frames at common resolutions.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import numpy as np
+import cv2
+
+from camera_interface import MockCamera
+from undistort import UndistortMapCache
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+
+def synthetic_calibration(resolution):
+    """Plausible wide-angle intrinsics for a given resolution"""
+    width, height = resolution
+    focal = 0.8 * width
+    camera_matrix = np.array([[focal, 0, width / 2],
+                              [0, focal, height / 2],
+                              [0, 0, 1]], dtype=np.float64)
+    distortion_coeffs = np.array([-0.28, 0.09, 0.0005, -0.0003, -0.012])
+    optimal_camera_matrix, roi = cv2.getOptimalNewCameraMatrix(
+        camera_matrix, distortion_coeffs, resolution, 0, resolution)
+    return camera_matrix, distortion_coeffs, optimal_camera_matrix, roi
+
+
+def time_per_frame(fn, frames, iterations):
+    fn(frames[0])
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(frames[i % len(frames)])
+    return (time.perf_counter() - start) / iterations * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Undistortion benchmark")
+    parser.add_argument("--iterations", "-n", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'resolution':>12} {'undistort ms':>14} {'build ms':>10} {'remap ms':>10} {'speedup':>8}")
+    for resolution in RESOLUTIONS:
+        camera = MockCamera()
+        camera.resolution = resolution
+        frames = [camera.capture_array() for _ in range(4)]
+        camera_matrix, dist, optimal, roi = synthetic_calibration(resolution)
+
+        def baseline(frame):
+            undistorted = cv2.undistort(frame, camera_matrix, dist, None, optimal)
+            x, y, w, h = roi
+            return undistorted[y:y + h, x:x + w]
+
+        start = time.perf_counter()
+        maps = UndistortMapCache().get(camera_matrix, dist, optimal, resolution, roi)
+        build_ms = (time.perf_counter() - start) * 1000.0
+
+        before = time_per_frame(baseline, frames, args.iterations)
+        after = time_per_frame(maps.apply, frames, args.iterations)
+        print(f"{resolution[0]:>6}x{resolution[1]:<5} {before:>14.2f} {build_ms:>10.2f} "
+              f"{after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
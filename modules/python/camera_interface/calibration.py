@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Chessboard calibration for the camera interface
+
+Corner detection is the expensive part of calibration, so it runs in a
+process pool: each image is searched at a reduced width, where
+findChessboardCorners is several times faster, and the corners found are
+then scaled back and refined with cornerSubPix on the full-resolution
+image. Views come either from a directory of images (detections are cached
+next to them, so adding images only processes the new ones) or from frames
+offered by the live capture pipeline. Reprojection error is computed for all
+views at once with numpy, and the result is written as the JSON that
+CameraInterface._load_calibration reads.
+"""
+
+import os
+import json
+import time
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import cv2
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+CORNER_CACHE_FILE = ".calibration_corners.json"
+
+FIND_FLAGS = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE | cv2.CALIB_CB_FAST_CHECK
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+
+
+def board_object_points(board_size: Tuple[int, int], square_size: float) -> np.ndarray:
+    """Inner-corner coordinates of the board in its own plane (z = 0), row-major"""
+    columns, rows = board_size
+    points = np.zeros((columns * rows, 3), np.float32)
+    points[:, :2] = np.mgrid[0:columns, 0:rows].T.reshape(-1, 2) * square_size
+    return points
+
+
+def detect_corners(source: Union[str, np.ndarray], board_size: Tuple[int, int],
+                   detect_width: int = 640) -> Optional[Tuple[np.ndarray, Tuple[int, int]]]:
+    """
+    Find the board's inner corners in an image path or array. Returns
+    (corners as an (N, 2) float32 array, (width, height)) or None when the
+    board is not visible. Runs in the detection pool, so it must stay a
+    module-level function.
+    """
+    if isinstance(source, str):
+        gray = cv2.imread(source, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return None
+    elif source.ndim == 3:
+        gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = source
+    height, width = gray.shape[:2]
+
+    scale = min(1.0, detect_width / width) if detect_width else 1.0
+    small = gray if scale == 1.0 else cv2.resize(
+        gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    found, corners = cv2.findChessboardCorners(small, tuple(board_size), None, FIND_FLAGS)
+    if not found:
+        return None
+
+    # Scale back up and refine against the full-resolution pixels; the search
+    # window has to cover the error introduced by the downscale
+    corners = corners / scale
+    half_window = max(5, int(round(2.0 / scale)))
+    cv2.cornerSubPix(gray, corners, (half_window, half_window), (-1, -1), SUBPIX_CRITERIA)
+    return corners.reshape(-1, 2).astype(np.float32), (width, height)
+
+
+def _rodrigues(rvecs: np.ndarray) -> np.ndarray:
+    """Rotation matrices for a (V, 3) batch of rotation vectors"""
+    theta = np.linalg.norm(rvecs, axis=1)
+    axis = rvecs / np.where(theta > 1e-12, theta, 1.0)[:, None]
+    x, y, z = axis.T
+    zero = np.zeros_like(x)
+    k = np.stack([zero, -z, y, z, zero, -x, -y, x, zero], axis=1).reshape(-1, 3, 3)
+    sin, cos = np.sin(theta)[:, None, None], np.cos(theta)[:, None, None]
+    return np.eye(3) + sin * k + (1.0 - cos) * (k @ k)
+
+
+def project_points(object_points: np.ndarray, rvecs: np.ndarray, tvecs: np.ndarray,
+                   camera_matrix: np.ndarray, distortion_coeffs: np.ndarray) -> np.ndarray:
+    """
+    Project the same (N, 3) board points through V poses at once, with the
+    5-coefficient OpenCV distortion model. Returns a (V, N, 2) array.
+    """
+    rvecs = np.asarray(rvecs, dtype=np.float64).reshape(-1, 3)
+    tvecs = np.asarray(tvecs, dtype=np.float64).reshape(-1, 1, 3)
+    camera = object_points.astype(np.float64) @ _rodrigues(rvecs).transpose(0, 2, 1) + tvecs
+    xy = camera[..., :2] / camera[..., 2:3]
+
+    k1, k2, p1, p2, k3 = (list(np.ravel(distortion_coeffs)[:5]) + [0.0] * 5)[:5]
+    x, y = xy[..., 0], xy[..., 1]
+    r2 = x * x + y * y
+    radial = 1.0 + r2 * (k1 + r2 * (k2 + r2 * k3))
+    xd = x * radial + 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x)
+    yd = y * radial + p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y
+
+    fx, fy = camera_matrix[0, 0], camera_matrix[1, 1]
+    cx, cy, skew = camera_matrix[0, 2], camera_matrix[1, 2], camera_matrix[0, 1]
+    return np.stack([fx * xd + skew * yd + cx, fy * yd + cy], axis=-1)
+
+
+def reprojection_errors(object_points: np.ndarray, image_points: np.ndarray,
+                        rvecs, tvecs, camera_matrix: np.ndarray,
+                        distortion_coeffs: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Overall and per-view RMS reprojection error in pixels for (V, N, 2) image_points"""
+    projected = project_points(object_points, rvecs, tvecs, camera_matrix, distortion_coeffs)
+    squared = np.sum((projected - image_points) ** 2, axis=-1)
+    return float(np.sqrt(squared.mean())), np.sqrt(squared.mean(axis=1))
+
+
+class CalibrationResult:
+    """Intrinsics produced by a calibration run, serialisable to the calibration file"""
+
+    def __init__(self, camera_matrix: np.ndarray, distortion_coeffs: np.ndarray,
+                 optimal_camera_matrix: np.ndarray, roi: Tuple[int, int, int, int],
+                 resolution: Tuple[int, int], rms_error: float, view_errors: np.ndarray,
+                 board_size: Tuple[int, int], square_size: float):
+        self.camera_matrix = camera_matrix
+        self.distortion_coeffs = distortion_coeffs
+        self.optimal_camera_matrix = optimal_camera_matrix
+        self.roi = tuple(int(v) for v in roi)
+        self.resolution = tuple(int(v) for v in resolution)
+        self.rms_error = rms_error
+        self.view_errors = view_errors
+        self.board_size = tuple(board_size)
+        self.square_size = square_size
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "camera_matrix": self.camera_matrix.tolist(),
+            "distortion_coeffs": self.distortion_coeffs.tolist(),
+            "optimal_camera_matrix": self.optimal_camera_matrix.tolist(),
+            "roi": list(self.roi),
+            "resolution": list(self.resolution),
+            "rms_error": round(self.rms_error, 4),
+            "view_errors": [round(float(e), 4) for e in self.view_errors],
+            "views": len(self.view_errors),
+            "board_size": list(self.board_size),
+            "square_size_mm": self.square_size,
+            "calibrated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+
+    def save(self, path: str):
+        """Write the calibration file atomically so a reader never sees half of it"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class ChessboardCalibrator:
+    """Collects chessboard views from images or live frames and solves the intrinsics"""
+
+    def __init__(self, board_size: Tuple[int, int] = (9, 6), square_size: float = 20.0,
+                 detect_width: int = 640, workers: int = 0, min_views: int = 10,
+                 max_views: int = 40, min_motion_px: float = 20.0, alpha: float = 0.0, logger=None):
+        self.board_size = (int(board_size[0]), int(board_size[1]))
+        self.square_size = float(square_size)
+        self.detect_width = int(detect_width)
+        self.workers = int(workers) or os.cpu_count() or 1
+        self.min_views = int(min_views)
+        self.max_views = int(max_views)
+        self.min_motion_px = float(min_motion_px)
+        self.alpha = float(alpha)
+        self.logger = logger
+        self.object_points = board_object_points(self.board_size, self.square_size)
+        self.views: List[np.ndarray] = []
+        self.image_size: Optional[Tuple[int, int]] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        # Statistics
+        self.offered = 0
+        self.searched = 0
+        self.rejected_similar = 0
+        self.detect_ms = 0.0
+
+    def start(self):
+        if self._executor is None:
+            # spawn rather than fork: the parent holds DDS and camera threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=mp.get_context("spawn"))
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def complete(self) -> bool:
+        return len(self.views) >= self.max_views
+
+    def add_directory(self, directory: str) -> int:
+        """Detect the board in every image in directory; returns the number of views added"""
+        names = sorted(name for name in os.listdir(directory)
+                       if name.lower().endswith(IMAGE_EXTENSIONS))
+        cache_path = os.path.join(directory, CORNER_CACHE_FILE)
+        cache = self._load_corner_cache(cache_path)
+
+        pending = [name for name in names if self._cache_entry(cache, directory, name) is None]
+        if pending:
+            self.start()
+            start = time.perf_counter()
+            paths = [os.path.join(directory, name) for name in pending]
+            chunksize = max(1, len(paths) // (self.workers * 4))
+            detections = self._executor.map(detect_corners, paths,
+                                            [self.board_size] * len(paths),
+                                            [self.detect_width] * len(paths), chunksize=chunksize)
+            for name, detection in zip(pending, detections):
+                stat = os.stat(os.path.join(directory, name))
+                cache["images"][name] = {
+                    "mtime": stat.st_mtime, "size": stat.st_size,
+                    "corners": detection[0].tolist() if detection else None,
+                    "resolution": list(detection[1]) if detection else None,
+                }
+            self.searched += len(pending)
+            self.detect_ms += (time.perf_counter() - start) * 1000.0
+            self._save_corner_cache(cache_path, cache)
+
+        added = 0
+        for name in names:
+            entry = cache["images"][name]
+            if entry["corners"] is not None and self._add_view(
+                    np.array(entry["corners"], dtype=np.float32), tuple(entry["resolution"])):
+                added += 1
+        self._log(f"Calibration: {added} views from {len(names)} images in {directory} "
+                  f"({len(pending)} searched, {len(names) - len(pending)} cached)")
+        return added
+
+    def offer(self, frame: np.ndarray) -> bool:
+        """
+        Queue a live frame for detection without blocking the caller. Frames are
+        dropped while every worker is busy; only the grey plane is shipped to
+        the pool.
+        """
+        if self._executor is None or self.complete:
+            return False
+        with self._lock:
+            if self._in_flight >= self.workers:
+                return False
+            self._in_flight += 1
+            self.offered += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame.copy()
+        submitted_at = time.perf_counter()
+        try:
+            future = self._executor.submit(detect_corners, gray, self.board_size, self.detect_width)
+        except Exception as e:
+            # Never let a broken pool take the frame down with it
+            with self._lock:
+                self._in_flight -= 1
+            self._log(f"Chessboard detection unavailable: {e}")
+            return False
+        future.add_done_callback(lambda f: self._on_detected(f, submitted_at))
+        return True
+
+    def _on_detected(self, future, submitted_at: float):
+        with self._lock:
+            self._in_flight -= 1
+            self.searched += 1
+            self.detect_ms += (time.perf_counter() - submitted_at) * 1000.0
+        try:
+            detection = future.result()
+        except Exception as e:
+            self._log(f"Chessboard detection failed: {e}")
+            return
+        if detection is not None:
+            self._add_view(*detection)
+
+    def _add_view(self, corners: np.ndarray, image_size: Tuple[int, int]) -> bool:
+        with self._lock:
+            if self.image_size is None:
+                self.image_size = tuple(image_size)
+            elif tuple(image_size) != self.image_size:
+                self._log(f"Ignoring {image_size[0]}x{image_size[1]} view, calibrating at "
+                          f"{self.image_size[0]}x{self.image_size[1]}")
+                return False
+            if self.complete:
+                return False
+            # A held-still board gives the solver nothing new
+            if self.views and self.min_motion_px > 0:
+                motion = np.abs(np.stack(self.views) - corners).mean(axis=(1, 2))
+                if motion.min() < self.min_motion_px:
+                    self.rejected_similar += 1
+                    return False
+            self.views.append(corners)
+            return True
+
+    def calibrate(self) -> CalibrationResult:
+        """Solve the intrinsics from the collected views"""
+        with self._lock:
+            views = list(self.views)
+        if len(views) < self.min_views:
+            raise ValueError(f"Need at least {self.min_views} chessboard views, have {len(views)}")
+
+        image_points = np.stack(views)
+        object_points = [self.object_points] * len(views)
+        _, camera_matrix, distortion_coeffs, rvecs, tvecs = cv2.calibrateCamera(
+            object_points, list(image_points.reshape(len(views), -1, 1, 2)), self.image_size, None, None)
+        rms, view_errors = reprojection_errors(self.object_points, image_points,
+                                               np.array(rvecs), np.array(tvecs),
+                                               camera_matrix, distortion_coeffs)
+        optimal_camera_matrix, roi = cv2.getOptimalNewCameraMatrix(
+            camera_matrix, distortion_coeffs, self.image_size, self.alpha, self.image_size)
+        self._log(f"Calibrated {self.image_size[0]}x{self.image_size[1]} from {len(views)} views, "
+                  f"RMS reprojection error {rms:.3f} px")
+        return CalibrationResult(camera_matrix, distortion_coeffs, optimal_camera_matrix, roi,
+                                 self.image_size, rms, view_errors, self.board_size, self.square_size)
+
+    def _cache_entry(self, cache: Dict[str, Any], directory: str, name: str) -> Optional[Dict[str, Any]]:
+        entry = cache["images"].get(name)
+        if entry is None:
+            return None
+        stat = os.stat(os.path.join(directory, name))
+        if entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+            return None
+        return entry
+
+    def _load_corner_cache(self, path: str) -> Dict[str, Any]:
+        empty = {"board_size": list(self.board_size), "detect_width": self.detect_width, "images": {}}
+        try:
+            with open(path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        # Detections depend on the board and on the search resolution
+        if cache.get("board_size") != empty["board_size"] or cache.get("detect_width") != self.detect_width:
+            return empty
+        return cache
+
+    def _save_corner_cache(self, path: str, cache: Dict[str, Any]):
+        try:
+            with open(path, "w") as f:
+                json.dump(cache, f)
+        except OSError as e:
+            self._log(f"Failed to persist chessboard corners: {e}")
+
+    def _log(self, message: str):
+        if self.logger is not None:
+            self.logger.info(message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "views": len(self.views),
+            "target_views": self.max_views,
+            "offered": self.offered,
+            "searched": self.searched,
+            "rejected_similar": self.rejected_similar,
+            "avg_detect_ms": round(self.detect_ms / self.searched, 2) if self.searched else 0.0,
+        }
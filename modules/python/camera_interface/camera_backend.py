@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Camera backend protocol for the camera interface
+
+Every frame source (Picamera2, V4L2 devices through OpenCV, the mock and
+synthetic cameras, replay) is a CameraBackend. The capture loop asks for a
+frame with request(pool) and gets a FrameBuffer holding one reference; the
+memory behind it (a pool slab, a camera request's mapped buffers, a read-only
+view of a bank or a mapped dump) goes back to its owner when the last stage
+of the pipeline releases it. Otherwise backends take the calls Picamera2 does
+(configure, set_controls, start, stop). Nothing downstream needs to know which
+backend produced a frame, and a backend that can hand out its own memory never
+has to copy it into a slab first.
+
+Frames are writable unless capabilities.read_only_frames is set; the pipeline
+copies a read-only frame before modifying it in place (software flips).
+
+Backends count the full-frame copies of pixel data they make between their
+source and the frame they hand out, so copies per frame can be measured for
+each one (stats()["copies_per_frame"]). Work that produces the frame rather
+than moving it (decoding, colour conversion, scaling) is not a copy; neither
+is anything done inside the driver or OpenCV that Python cannot see.
+
+Capabilities describe what a backend can do, so CameraInterface can decide
+without checking types: whether it paces its own frames, the highest frame
+rate the source can deliver, whether frame timestamps come from the sensor or
+recording rather than the capture loop.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+from frame_pool import FrameBuffer, FramePool
+
+
+@dataclass(frozen=True)
+class BackendCapabilities:
+    """What a backend can deliver"""
+    formats: Tuple[str, ...] = ("BGR",)  # pixel formats the source produces
+    max_fps: Optional[float] = None  # None when the source sets no limit or does not report one
+    hardware_timestamps: bool = False  # frame_timestamps() reports sensor or recorded times
+    zero_copy: bool = False  # frames can be the source's own memory, handed out without a copy
+    read_only_frames: bool = False  # frames are views the pipeline must not modify
+    self_paced: bool = False  # request() blocks until the source's next frame is due
+
+
+class CameraBackend:
+    """Base class for the frame sources CameraInterface captures from"""
+
+    name = "camera"
+    capabilities = BackendCapabilities()
+
+    # Copy accounting; class defaults so subclasses need not call an initialiser
+    requests = 0
+    copies = 0
+
+    def request(self, pool: FramePool) -> FrameBuffer:
+        """
+        Next frame, holding one reference the caller must release. pool is the
+        capture pool, for backends that fill a slab; its shape is the
+        configured resolution. Raises EOFError when a finite source ends.
+        """
+        raise NotImplementedError
+
+    def frame_timestamps(self) -> Optional[Tuple[int, int]]:
+        """(Unix us, monotonic or sensor ns) of the last frame, or None to use capture time"""
+        return None
+
+    def _count(self, copies: int):
+        """Record one frame handed out and the copies made for it"""
+        self.requests += 1
+        self.copies += copies
+
+    def backend_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "capabilities": asdict(self.capabilities),
+            "requests": self.requests,
+            "copies": self.copies,
+            "copies_per_frame": round(self.copies / self.requests, 3) if self.requests else 0.0,
+        }
@@ -14,19 +14,49 @@ import threading
 import json
 import logging
 from dataclasses import dataclass, asdict
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 import signal
 
 import numpy as np
 import cv2
 
+from undistort import UndistortMapCache, scale_camera_matrix
+from pipeline import RingBuffer, ReorderBuffer, DROP_OLDEST, BLOCK
+from frame_pool import FrameBuffer, FramePool
+from camera_backend import CameraBackend
+from shm_transport import SharedFrameRing
+from encoder import CompressedOutput
+from preroll import PrerollBuffer
+from scheduler import FrameScheduler, FrameTiming
+from quality import QualityController, CpuLoadSource, ThermalSource, LatencySource
+from calibration import ChessboardCalibrator
+from synthetic_camera import SyntheticCamera
+from replay_camera import ReplayCamera
+from frame_dump import DumpRecorder
+from motion import MotionDetector, ParkingMode
+from outputs import OutputSpec, OutputStreams
+from picamera_backend import PicameraBackend
+from v4l2_camera import V4L2Camera
+from fake_picamera import FakePicamera2, FakeMappedArray
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+
+from metrics import ModuleMetrics
+from sensor_join import SensorJoin
+from log_transport import AsyncLogTransport, AsyncLogHandler, level_from_name
+
 # DDS imports (with fallback for development)
 try:
-    import cyclonedx
-    from cyclonedx.domain import DomainParticipant
-    from cyclonedx.topic import Topic
-    from cyclonedx.pub import DataWriter
-    from cyclonedx.sub import DataReader
+    from cyclonedds.domain import DomainParticipant
+    from cyclonedds.topic import Topic
+    from cyclonedds.pub import DataWriter
+    from cyclonedds.sub import DataReader
+    from cyclonedds.core import Qos, Policy, Listener
+    from cyclonedds.util import duration
+    from dashcam_types import (ImageMetadata, ImageData, SharedImageDescriptor,
+                               CameraCommand, CameraControl, CameraStatus, CameraStatusInfo,
+                               PerformanceMetrics, SensorSample, FrameSensorData)
+    from base_module import configmsg
     HAS_DDS = True
 except ImportError:
     print("Warning: CycloneDDS not available, running in stub mode")
@@ -54,9 +84,61 @@ class CameraSettings:
     saturation: int = 0
     sharpness: int = 0
     digital_gain: float = 1.0
+    exposure_time_us: int = 0  # manual exposure modes; 0 uses the whole frame period
     rotation: int = 0
     hflip: bool = False
     vflip: bool = False
+    
+    def __post_init__(self):
+        # JSON configuration gives lists; compare equal to the tuples updates produce
+        self.resolution = tuple(int(v) for v in self.resolution)
+
+
+# exposure_mode values: libcamera AeExposureMode with auto exposure on, or
+# None for manual exposure (AeEnable off, ExposureTime from exposure_time_us)
+EXPOSURE_MODES = {
+    "auto": 0, "normal": 0,
+    "short": 1, "sport": 1,
+    "long": 2, "night": 2,
+    "manual": None, "off": None,
+}
+
+
+# How much of the running pipeline a settings change disturbs, cheapest first.
+# Immediate changes are sensor controls or software flips applied between
+# frames; rebuild changes reallocate pools and remap tables while capture is
+# paused; restart changes also reconfigure the camera stream.
+CHANGE_IMMEDIATE = "immediate"
+CHANGE_REBUILD = "rebuild"
+CHANGE_RESTART = "restart"
+
+SETTING_CHANGE_CLASS = {
+    "exposure_mode": CHANGE_IMMEDIATE,
+    "white_balance": CHANGE_IMMEDIATE,
+    "iso": CHANGE_IMMEDIATE,
+    "brightness": CHANGE_IMMEDIATE,
+    "contrast": CHANGE_IMMEDIATE,
+    "saturation": CHANGE_IMMEDIATE,
+    "sharpness": CHANGE_IMMEDIATE,
+    "digital_gain": CHANGE_IMMEDIATE,
+    "exposure_time_us": CHANGE_IMMEDIATE,
+    "framerate": CHANGE_IMMEDIATE,
+    "hflip": CHANGE_IMMEDIATE,
+    "vflip": CHANGE_IMMEDIATE,
+    "resolution": CHANGE_REBUILD,
+    "rotation": CHANGE_RESTART,
+}
+
+_CHANGE_ORDER = [CHANGE_IMMEDIATE, CHANGE_REBUILD, CHANGE_RESTART]
+
+# System configuration holding recording.quality_profiles; relative to this module
+SYSTEM_CONFIG_FILE = "../../../orchestrator/config/default_config.json"
+
+
+def classify_settings(keys) -> Optional[str]:
+    """Most disruptive change class needed for the given setting names"""
+    classes = [SETTING_CHANGE_CLASS.get(key, CHANGE_IMMEDIATE) for key in keys]
+    return max(classes, key=_CHANGE_ORDER.index) if classes else None
 
 
 @dataclass
@@ -66,36 +148,68 @@ class CameraCalibration:
     distortion_coeffs: Optional[np.ndarray] = None
     optimal_camera_matrix: Optional[np.ndarray] = None
     roi: Optional[Tuple[int, int, int, int]] = None
+    resolution: Optional[Tuple[int, int]] = None
     calibrated: bool = False
 
 
-class MockCamera:
+class MockCamera(CameraBackend):
     """Mock camera for development without hardware"""
+
+    name = "mock"
+
     def __init__(self):
         self.resolution = (640, 480)
         self.framerate = 30
+        self.rotation = 0
         self.running = False
+        self._pattern = None
     
     def configure(self, config):
         pass
     
+    def set_controls(self, controls):
+        pass
+    
     def start(self):
         self.running = True
     
     def stop(self):
         self.running = False
     
-    def capture_array(self):
-        # Generate a test pattern
+    def _test_pattern(self) -> np.ndarray:
+        # Static part of the test pattern, rebuilt only when the resolution changes
         height, width = self.resolution[1], self.resolution[0]
-        image = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # Add some pattern
-        cv2.rectangle(image, (50, 50), (width-50, height-50), (0, 255, 0), 2)
-        cv2.putText(image, f"Mock Camera {time.time():.1f}", 
+        if self._pattern is None or self._pattern.shape[:2] != (height, width):
+            self._pattern = np.zeros((height, width, 3), dtype=np.uint8)
+            cv2.rectangle(self._pattern, (50, 50), (width-50, height-50), (0, 255, 0), 2)
+        return self._pattern
+    
+    def capture_into(self, dst: np.ndarray) -> np.ndarray:
+        """Render the test pattern into a caller-provided buffer"""
+        np.copyto(dst, self._test_pattern())
+        cv2.putText(dst, f"Mock Camera {time.time():.1f}", 
                    (60, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        
-        return image
+        if self.rotation == 180:
+            cv2.flip(dst, -1, dst=dst)
+        return dst
+    
+    def capture_array(self):
+        height, width = self.resolution[1], self.resolution[0]
+        return self.capture_into(np.empty((height, width, 3), dtype=np.uint8))
+    
+    def request(self, pool: FramePool) -> FrameBuffer:
+        """Render into a capture slab: one copy, of the static pattern"""
+        buffer = pool.checkout((self.resolution[1], self.resolution[0], 3))
+        try:
+            self.capture_into(buffer.array)
+        except Exception:
+            buffer.release()
+            raise
+        self._count(1)
+        return buffer
+    
+    def stats(self) -> Dict[str, Any]:
+        return self.backend_stats()
 
 
 class CameraInterface:
@@ -106,38 +220,190 @@ class CameraInterface:
         self.running = False
         self.camera = None
         self.capture_thread = None
+        self.worker_threads = []
+        self.publish_thread = None
         
         # Load configuration
         self.config = self._load_config(config_file)
+        self.log_transport = self._init_log_transport()
         self.camera_settings = CameraSettings(**self.config.get("camera", {}))
         self.calibration = CameraCalibration()
+        self.undistort_cache = UndistortMapCache(
+            self.config["calibration"].get("map_cache_dir"), self.logger
+        )
         
         # DDS setup
         self.dds_participant = None
         self.image_writer = None
         self.status_writer = None
         self.control_reader = None
+        self.config_reader = None
+        self.descriptor_writer = None
+        self.compressed_writer = None
+        self.preview_writer = None
+        self.metrics_writer = None
+        self.sensor_reader = None
+        self.frame_sensor_writer = None
+        self.output_writers: Dict[str, Tuple[Any, Any]] = {}  # stream -> (image, descriptor) writers
+        self.output_rings: Dict[str, Optional[SharedFrameRing]] = {}
+        
+        # Same-host frame transport; only descriptors travel over DDS
+        self.shm_config = self.config.get("shared_memory", {})
+        self.shm_ring: Optional[SharedFrameRing] = None
+        self.inline_frames = 0
+        self.shm_frames = 0
+        self.main_skipped = 0  # lazily captured frames nobody needed at full resolution
+        self.flip_copies = 0  # read-only frames flipped into a capture slab
+        self._inline_subscribers: Dict[Any, Tuple[bool, float]] = {}  # writer -> (matched, checked_at)
+        
+        # Optional in-memory pre-roll of compressed frames for event clips
+        preroll_config = self.config.get("preroll", {})
+        self.preroll: Optional[PrerollBuffer] = None
+        if preroll_config.get("enabled", False):
+            self.preroll = PrerollBuffer(
+                seconds=float(preroll_config.get("seconds", 10)),
+                max_bytes=int(preroll_config.get("max_memory_mb", 64) * (1 << 20)),
+                clip_path=preroll_config.get("clip_path", "/var/dashcam/events"),
+                post_seconds=float(preroll_config.get("post_seconds", 10)),
+                clip_queue_frames=int(preroll_config.get("clip_queue_frames", 120)),
+                logger=self.logger
+            )
+        
+        # Optional JPEG output stage, also required to feed the pre-roll
+        self.compression_config = self.config.get("compression", {})
+        self.compressed_output: Optional[CompressedOutput] = None
+        if self.compression_config.get("enabled", False) or self.preroll is not None:
+            self.compressed_output = CompressedOutput(
+                self.compression_config, self._publish_compressed, self.logger)
+        
+        # Pipeline: capture -> process_queue -> workers -> publish_queue -> publisher
+        performance = self.config.get("performance", {})
+        drop_policy = performance.get("drop_policy", DROP_OLDEST) \
+            if performance.get("enable_frame_dropping", True) else BLOCK
+        self.num_workers = max(1, int(performance.get("worker_threads", 2)))
+        self.process_queue = RingBuffer("process", int(performance.get("buffer_size", 10)), drop_policy)
+        self.publish_queue = RingBuffer("publish", int(performance.get("max_queue_size", 100)), drop_policy)
+        # With several workers frames finish out of order; the publisher restores capture order
+        self.reorder = ReorderBuffer(int(performance.get("reorder_window", 2 * self.num_workers)),
+                                     float(performance.get("reorder_max_ms", 100)) / 1000.0)
+        
+        # Reusable frame slabs: raw captures and undistorted output
+        pool_size = int(performance.get("frame_pool_size",
+                                        self.process_queue.capacity + self.num_workers + 2))
+        width, height = self.camera_settings.resolution
+        self.frame_pool_size = pool_size
+        self.capture_pool = FramePool("capture", (height, width, 3), pool_size)
+        self.output_pool: Optional[FramePool] = None  # allocated once calibration maps exist
+        
+        # Declared derived streams (previews, crops, greyscale) rendered by the workers
+        self.output_streams = self._init_output_streams()
+        
+        # Timing telemetry
+        self.scheduler: Optional[FrameScheduler] = None
+        self.metrics = ModuleMetrics()
+        self.latency = {
+            stage: self.metrics.histogram(stage)
+            for stage in ("jitter", "capture", "process", "publish", "end_to_end")
+        }
+        self.published = self.metrics.rate("published")
+        self.last_fps_time = time.monotonic()
+        # End-to-end latency over the last metrics window, as PerformanceMetrics reports it
+        self.window_latency = self.latency["end_to_end"].window()
+        
+        # Live reconfiguration: the capture gate is held around every capture so
+        # a rebuild/restart can pause capture between two frames
+        self._settings_lock = threading.Lock()
+        self._capture_gate = threading.Lock()
+        self._last_captured_ns = 0
+        self._gap_from_ns = 0
+        self.reconfig_stats = {
+            "count": 0, "last_class": None, "last_switch_ms": 0.0,
+            "last_gap_ms": 0.0, "max_gap_ms": 0.0
+        }
+        
+        # Calibration run in progress (fed live frames by the workers) and the last result
+        self.calibrator: Optional[ChessboardCalibrator] = None
+        self.calibration_thread = None
+        self.last_calibration: Optional[Dict[str, Any]] = None
+        self._calibration_next_offer = 0
+        self._calibration_interval_s = 1.0
+        
+        # Optional GPS/IMU join: frames are tagged on a side topic as samples
+        # arrive, so publishing a frame never waits for the sensor
+        sensor_config = self.config.get("sensor_join", {})
+        self.sensor_join: Optional[SensorJoin] = None
+        if sensor_config.get("enabled", False):
+            self.sensor_join = SensorJoin(
+                max_gap_us=int(sensor_config.get("max_gap_ms", 200) * 1000),
+                max_gps_gap_us=int(sensor_config.get("max_gps_gap_ms", 1500) * 1000),
+                max_wait_us=int(sensor_config.get("max_wait_ms", 150) * 1000),
+                interpolate=bool(sensor_config.get("interpolate", True)),
+                retention_us=int(sensor_config.get("retention_s", 60) * 1_000_000))
+        
+        # Adaptive quality: steps resolution/framerate/undistortion under load
+        self.undistort_enabled = True
+        self.quality = self._init_quality_controller()
+        if self.quality is not None:
+            # Start at the initial profile's settings, not the camera block's
+            self._apply_quality_profile(*self.quality.profiles[self.quality.level])
+        
+        # Capture-to-disk of the exact published frames and metadata
+        dump_config = self.config.get("frame_dump", {})
+        self.frame_dump = DumpRecorder(
+            dump_config.get("path", "/var/dashcam/dumps"),
+            every_n=int(dump_config.get("every_n", 1)),
+            max_frames_per_file=int(dump_config.get("max_frames_per_file", 9000)),
+            max_total_bytes=int(dump_config.get("max_total_gb", 8) * (1 << 30)),
+            queue_size=int(dump_config.get("queue_size", 8)),
+            logger=self.logger)
+        
+        # Parking mode: idle framerate until motion is seen in downsampled frames
+        self.parking = self._init_parking_mode()
+        self.parking.set_enabled(bool(self.config.get("parking_mode", {}).get("enabled", False)))
         
         # State
-        self.frame_count = 0
-        self.last_fps_time = time.time()
-        self.current_fps = 0.0
+        self.sequence_id = 0
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
     
     def _setup_logging(self) -> logging.Logger:
-        """Setup logging configuration"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-            handlers=[
-                logging.StreamHandler(),
-                logging.FileHandler('/var/log/dashcam/camera_interface.log')
-            ]
-        )
-        return logging.getLogger('camera_interface')
+        """Console logging until the configuration has been loaded"""
+        logger = logging.getLogger('camera_interface')
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        return logger
+    
+    def _init_log_transport(self) -> AsyncLogTransport:
+        """Move console and file output onto the asynchronous, rate-limited log thread"""
+        log_config = self.config.get("logging", {})
+        level = level_from_name(log_config.get("level", "INFO"))
+        transport = AsyncLogTransport(
+            "camera_interface", level=level,
+            queue_size=log_config.get("queue_size", 4096),
+            rate_limit_burst=log_config.get("rate_limit_burst", 10),
+            rate_limit_window_s=log_config.get("rate_limit_window_s", 5.0))
+        transport.add_stream_sink()
+        if log_config.get("file"):
+            try:
+                transport.add_file_sink(log_config["file"], log_config.get("max_size_mb", 50),
+                                        log_config.get("backup_count", 3))
+            except OSError as e:
+                self.logger.warning(f"Cannot open log file {log_config['file']}: {e}")
+        self.logger.handlers = [AsyncLogHandler(transport)]
+        # Matching the logger level lets isEnabledFor reject filtered calls before a record is built
+        self.logger.setLevel((level + 1) * 10)
+        return transport
+    
+    def set_log_level(self, level: int):
+        """Change the log level (LogLevels scale, 0=Debug) of the logger and its transport"""
+        self.log_transport.level = level
+        self.logger.setLevel((level + 1) * 10)
     
     def _load_config(self, config_file: Optional[str]) -> Dict[str, Any]:
         """Load configuration from file"""
@@ -152,12 +418,100 @@ class CameraInterface:
             "dds": {
                 "domain_id": 0,
                 "image_topic": "camera/raw_images",
+                "descriptor_topic": "camera/raw_images/shm",
                 "control_topic": "camera/control",
-                "status_topic": "camera/status"
+                "status_topic": "camera/status",
+                "metrics_topic": "camera/metrics"
+            },
+            "shared_memory": {
+                "enabled": True,
+                "slots": 8,
+                "inline_fallback": "auto"
+            },
+            "compression": {
+                # The recorder and the web preview subscribe to the JPEG topics
+                "enabled": True,
+                "quality": 85,
+                "workers": 0,
+                "preview_resolution": [640, 360],
+                "topic": "camera/compressed_images",
+                "preview_topic": "camera/preview_images"
+            },
+            "preroll": {
+                "enabled": False,
+                "seconds": 10,
+                "post_seconds": 10,
+                "max_memory_mb": 64,
+                "clip_queue_frames": 120,
+                "clip_path": "/var/dashcam/events"
+            },
+            "sensor_join": {
+                "enabled": False,
+                "topic": "sensor/samples",
+                "output_topic": "camera/frame_sensor",
+                "max_gap_ms": 200,
+                "max_gps_gap_ms": 1500,
+                "max_wait_ms": 150,
+                "retention_s": 60,
+                "interpolate": True
+            },
+            "replay": {
+                "enabled": False,
+                "path": None,
+                "speed": 1.0,
+                "loop": True,
+                "preserve_timestamps": True,
+                "start_frame": 0,
+                "max_gap_s": 1.0,
+                "native_resolution": True
+            },
+            "frame_dump": {
+                "enabled": False,
+                "path": "/var/dashcam/dumps",
+                "every_n": 1,
+                "max_frames_per_file": 9000,
+                "max_total_gb": 8,
+                "queue_size": 8
+            },
+            "outputs": {
+                "enabled": False,
+                "streams": []
+            },
+            "v4l2": {
+                "enabled": False,
+                "device": "/dev/video0",
+                "fourcc": "MJPG",
+                "buffer_count": 2,
+                "max_fps": None
+            },
+            "picamera": {
+                "format": "RGB888",
+                "lores_resolution": None,
+                "buffer_count": 6,
+                "fake": False
+            },
+            "parking_mode": {
+                "enabled": False,
+                "idle_fps": 2,
+                "check_fps": 5,
+                "hold_s": 10,
+                "motion_width": 160,
+                "background_alpha": 0.05,
+                "pixel_threshold": 25,
+                "min_area": 0.005,
+                "trigger_clip": True,
+                "clip_post_seconds": None
             },
             "calibration": {
                 "auto_load": True,
-                "file": "/etc/dashcam/camera_calibration.json"
+                "file": "/etc/dashcam/camera_calibration.json",
+                "map_cache_dir": "/var/cache/dashcam"
+            },
+            "logging": {
+                "level": "INFO",
+                "file": "/var/log/dashcam/camera_interface.log",
+                "max_size_mb": 50,
+                "backup_count": 3
             }
         }
         
@@ -202,16 +556,47 @@ class CameraInterface:
     def _init_camera(self) -> bool:
         """Initialize the camera hardware"""
         try:
-            if HAS_CAMERA:
-                self.camera = Picamera2()
-                config = self.camera.create_preview_configuration(
-                    main={"size": tuple(self.camera_settings.resolution)}
-                )
-                self.camera.configure(config)
-                self.logger.info("Picamera2 initialized")
+            synthetic_config = self.config.get("synthetic_camera", {})
+            replay_config = self.config.get("replay", {})
+            picamera_config = self.config.get("picamera", {})
+            v4l2_config = self.config.get("v4l2", {})
+            if replay_config.get("enabled", False):
+                self.camera = ReplayCamera(replay_config)
+                if replay_config.get("native_resolution", True) \
+                        and tuple(self.camera_settings.resolution) != self.camera.resolution:
+                    # Reproduce the recording as it was captured
+                    self.camera_settings.resolution = self.camera.resolution
+                    width, height = self.camera.resolution
+                    self.capture_pool.resize((height, width, 3))
+                self.camera.resolution = tuple(self.camera_settings.resolution)
+                self.camera.rotation = self.camera_settings.rotation
+                self.logger.info(f"Replay camera initialized: {self.camera.total} frames from "
+                                 f"{replay_config['path']} at {self.camera.speed:g}x")
+            elif synthetic_config.get("enabled", False):
+                self.camera = SyntheticCamera(synthetic_config)
+                self.camera.resolution = tuple(self.camera_settings.resolution)
+                self.camera.framerate = self._capture_framerate()
+                self.camera.rotation = self.camera_settings.rotation
+                self.logger.info("Synthetic camera initialized")
+            elif v4l2_config.get("enabled", False):
+                self.camera = V4L2Camera(v4l2_config)
+                self.camera.resolution = tuple(self.camera_settings.resolution)
+                self.camera.framerate = self._capture_framerate()
+                self.camera.rotation = self.camera_settings.rotation
+                self.logger.info(f"V4L2 camera initialized ({self.camera.device}, {self.camera.fourcc})")
+            elif HAS_CAMERA or picamera_config.get("fake", False):
+                if picamera_config.get("fake", False):
+                    self.camera = PicameraBackend(FakePicamera2(), picamera_config, mapped_array=FakeMappedArray)
+                else:
+                    self.camera = PicameraBackend(Picamera2(), picamera_config)
+                self.camera.configure(self._camera_configuration())
+                self.camera.set_controls(self._camera_controls())
+                self.logger.info(f"{type(self.camera.camera).__name__} initialized ({self.camera.describe()})")
             else:
                 self.camera = MockCamera()
                 self.camera.resolution = tuple(self.camera_settings.resolution)
+                self.camera.framerate = self._capture_framerate()
+                self.camera.rotation = self.camera_settings.rotation
                 self.logger.info("Mock camera initialized")
             
             return True
@@ -227,25 +612,225 @@ class CameraInterface:
             return True
         
         try:
+            dds_config = self.config["dds"]
+            
             # Create domain participant
-            domain_id = self.config["dds"]["domain_id"]
+            domain_id = dds_config.get("domain_id", 0)
             self.dds_participant = DomainParticipant(domain_id)
             
             # Create topics and writers/readers
-            image_topic_name = self.config["dds"]["image_topic"]
-            status_topic_name = self.config["dds"]["status_topic"]
-            control_topic_name = self.config["dds"]["control_topic"]
+            image_topic_name = dds_config.get("image_topic", "camera/raw_images")
+            descriptor_topic_name = dds_config.get("descriptor_topic", f"{image_topic_name}/shm")
+            status_topic_name = dds_config.get("status_topic", "camera/status")
+            control_topic_name = dds_config.get("control_topic", "camera/control")
+            metrics_topic_name = dds_config.get("metrics_topic", "camera/metrics")
+            
+            image_topic = Topic(self.dds_participant, image_topic_name, ImageData)
+            descriptor_topic = Topic(self.dds_participant, descriptor_topic_name, SharedImageDescriptor)
+            status_topic = Topic(self.dds_participant, status_topic_name, CameraStatusInfo)
+            control_topic = Topic(self.dds_participant, control_topic_name, CameraControl)
+            
+            image_qos = self._image_qos()
+            self.image_writer = DataWriter(self.dds_participant, image_topic, qos=image_qos)
+            self.descriptor_writer = DataWriter(self.dds_participant, descriptor_topic, qos=image_qos)
+            
+            if self.compression_config.get("enabled", False):
+                compressed_topic = Topic(
+                    self.dds_participant,
+                    self.compression_config.get("topic", "camera/compressed_images"), ImageData)
+                self.compressed_writer = DataWriter(self.dds_participant, compressed_topic, qos=image_qos)
+                if self.compressed_output.preview_size is not None:
+                    preview_topic = Topic(
+                        self.dds_participant,
+                        self.compression_config.get("preview_topic", "camera/preview_images"), ImageData)
+                    self.preview_writer = DataWriter(self.dds_participant, preview_topic, qos=image_qos)
+            
+            # Status and control are low rate and must not be lost
+            control_qos = Qos(
+                Policy.Reliability.Reliable(duration(seconds=1)),
+                Policy.History.KeepLast(10)
+            )
+            self.status_writer = DataWriter(self.dds_participant, status_topic, qos=control_qos)
+            metrics_topic = Topic(self.dds_participant, metrics_topic_name, PerformanceMetrics)
+            self.metrics_writer = DataWriter(self.dds_participant, metrics_topic, qos=control_qos)
+            self.control_reader = DataReader(
+                self.dds_participant, control_topic, qos=control_qos,
+                listener=Listener(on_data_available=self._on_control_available)
+            )
+            # Same per-module config topic BaseDDSModule subscribes to
+            config_topic = Topic(self.dds_participant, f"/{self.config['module_id']}/config", configmsg)
+            self.config_reader = DataReader(
+                self.dds_participant, config_topic, qos=control_qos,
+                listener=Listener(on_data_available=self._on_config_available)
+            )
             
-            # For now, we'll use simplified DDS integration
-            # In a full implementation, this would use the generated IDL types
+            if self.output_streams is not None:
+                # Same transport as the main stream: descriptors for same-host readers,
+                # inline ImageData only while a remote reader is matched
+                for spec in self.output_streams.specs:
+                    self.output_writers[spec.name] = (
+                        DataWriter(self.dds_participant,
+                                   Topic(self.dds_participant, spec.topic, ImageData), qos=image_qos),
+                        DataWriter(self.dds_participant,
+                                   Topic(self.dds_participant, f"{spec.topic}/shm", SharedImageDescriptor),
+                                   qos=image_qos))
             
-            self.logger.info("DDS initialized (stub implementation)")
+            if self.sensor_join is not None:
+                sensor_config = self.config.get("sensor_join", {})
+                sensor_topic = Topic(self.dds_participant, sensor_config.get("topic", "sensor/samples"),
+                                     SensorSample)
+                frame_sensor_topic = Topic(self.dds_participant,
+                                           sensor_config.get("output_topic", "camera/frame_sensor"),
+                                           FrameSensorData)
+                sensor_qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepLast(64))
+                self.frame_sensor_writer = DataWriter(self.dds_participant, frame_sensor_topic, qos=sensor_qos)
+                self.sensor_reader = DataReader(
+                    self.dds_participant, sensor_topic, qos=sensor_qos,
+                    listener=Listener(on_data_available=self._on_sensor_available)
+                )
+            
+            self.logger.info(f"DDS initialized on domain {domain_id}, publishing {image_topic_name}")
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to initialize DDS: {e}")
             return False
     
+    def _image_qos(self) -> "Qos":
+        """
+        QoS for image topics: best-effort, keep-last-N and volatile, so a slow
+        subscriber only loses samples instead of backpressuring capture. This is
+        also the combination CycloneDDS requires to use its shared-memory path.
+        """
+        depth = int(self.config["dds"].get("image_history_depth", 2))
+        return Qos(
+            Policy.Reliability.BestEffort,
+            Policy.History.KeepLast(depth),
+            Policy.Durability.Volatile,
+            Policy.WriterDataLifecycle(autodispose=False)
+        )
+    
+    def _on_control_available(self, reader):
+        """Listener callback for CameraControl commands"""
+        try:
+            for sample in reader.take(N=16):
+                self._handle_control(sample)
+        except Exception as e:
+            self.logger.error(f"Failed to handle camera control: {e}")
+    
+    def _handle_control(self, control: "CameraControl"):
+        """Dispatch a single CameraControl command"""
+        parameters = json.loads(control.parameters) if control.parameters else {}
+        command = control.command
+        self.logger.info(f"Control command {command.name} from {control.requesting_module}")
+        
+        if command == CameraCommand.CMD_START_CAPTURE:
+            self.start()
+        elif command == CameraCommand.CMD_STOP_CAPTURE:
+            self.stop()
+        elif command == CameraCommand.CMD_SET_RESOLUTION:
+            self.update_settings({"resolution": tuple(parameters["resolution"])})
+        elif command == CameraCommand.CMD_SET_FRAMERATE:
+            self.update_settings({"framerate": int(parameters["framerate"])})
+        elif command in (CameraCommand.CMD_SET_EXPOSURE, CameraCommand.CMD_SET_GAIN):
+            self.update_settings(parameters)
+        elif command == CameraCommand.CMD_CALIBRATE:
+            self.calibrate(parameters)
+        elif command == CameraCommand.CMD_GET_STATUS:
+            self._publish_status()
+        elif command == CameraCommand.CMD_TRIGGER_EVENT:
+            self.trigger_event(parameters.get("post_seconds"),
+                               parameters.get("reason", control.requesting_module))
+        else:
+            self.logger.warning(f"Unsupported camera command {command.name}")
+    
+    def _on_sensor_available(self, reader):
+        """Listener callback for SensorSample; publishes the frames each sample resolves"""
+        try:
+            for sample in reader.take(N=32):
+                self._publish_frame_sensor(self.sensor_join.add_sample(sample.timestamp, asdict(sample)))
+        except Exception as e:
+            self.logger.error(f"Failed to join sensor sample: {e}")
+    
+    def _publish_frame_sensor(self, resolved):
+        """Publish FrameSensorData for joined frames; frames with no sample in range are skipped"""
+        if not (HAS_DDS and self.frame_sensor_writer):
+            return
+        for sequence_id, timestamp, match in resolved:
+            if match is None:
+                continue
+            sample, interpolated, offset_us = match
+            self.frame_sensor_writer.write(FrameSensorData(
+                sequence_id=sequence_id, timestamp=timestamp, sample=SensorSample(**sample),
+                interpolated=interpolated, offset_us=offset_us))
+    
+    def _on_config_available(self, reader):
+        """Listener callback for /{module_id}/config messages"""
+        for sample in reader.take(N=16):
+            try:
+                self.configure_callback(json.loads(sample.config_json))
+            except ValueError as e:
+                self.logger.warning(f"Ignoring malformed configuration message: {e}")
+    
+    def configure_callback(self, data: Dict[str, Any]):
+        """Apply a configuration message; settings may be nested under "camera" as in config.json"""
+        parking = data.get("parking_mode")
+        if isinstance(parking, dict) and "enabled" in parking:
+            self.set_parking_mode(bool(parking["enabled"]))
+        dump = data.get("frame_dump")
+        if isinstance(dump, dict) and "enabled" in dump:
+            self.set_frame_dump(bool(dump["enabled"]))
+        settings = data.get("camera", {key: value for key, value in data.items()
+                                       if key not in ("parking_mode", "frame_dump")})
+        if settings:
+            self.update_settings(settings)
+    
+    def _publish_status(self, error_message: str = ""):
+        """Publish CameraStatusInfo"""
+        if not (HAS_DDS and self.status_writer):
+            return
+        width, height = self.camera_settings.resolution
+        if error_message:
+            status = CameraStatus.STATUS_ERROR
+        elif self.calibrator is not None:
+            status = CameraStatus.STATUS_CALIBRATING
+        elif self.running:
+            status = CameraStatus.STATUS_CAPTURING
+        else:
+            status = CameraStatus.STATUS_IDLE
+        self.status_writer.write(CameraStatusInfo(
+            timestamp=int(time.time() * 1_000_000),
+            status=status,
+            current_width=width,
+            current_height=height,
+            current_framerate=float(self.published.rate),
+            current_exposure=0.0,
+            current_gain=float(self.camera_settings.digital_gain),
+            is_calibrated=self.calibration.calibrated,
+            error_message=error_message
+        ))
+    
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """Frame pipeline metrics in the shape of the PerformanceMetrics struct"""
+        end_to_end = self.window_latency
+        return {
+            "timestamp": time.time_ns() // 1000,
+            "module_id": self.config["module_id"],
+            "cpu_usage": self.metrics.process.cpu_percent,
+            "memory_usage": self.metrics.process.rss_bytes,
+            "processing_rate": self.published.rate,
+            "latency_ms": end_to_end["mean_ms"],
+            "queue_size": len(self.process_queue) + len(self.publish_queue),
+            "latency_p50_ms": end_to_end["p50_ms"],
+            "latency_p99_ms": end_to_end["p99_ms"],
+            "missed_deadlines": self.scheduler.missed_deadlines if self.scheduler else 0
+        }
+    
+    def _publish_metrics(self):
+        """Publish PerformanceMetrics"""
+        if HAS_DDS and self.metrics_writer:
+            self.metrics_writer.write(PerformanceMetrics(**self.get_performance_metrics()))
+    
     def _load_calibration(self):
         """Load camera calibration parameters"""
         if not self.config["calibration"]["auto_load"]:
@@ -257,17 +842,136 @@ class CameraInterface:
                 with open(calib_file, 'r') as f:
                     calib_data = json.load(f)
                 
-                self.calibration.camera_matrix = np.array(calib_data["camera_matrix"])
-                self.calibration.distortion_coeffs = np.array(calib_data["distortion_coeffs"])
-                self.calibration.optimal_camera_matrix = np.array(calib_data["optimal_camera_matrix"])
-                self.calibration.roi = tuple(calib_data["roi"])
-                self.calibration.calibrated = True
-                
+                self._apply_calibration(calib_data)
                 self.logger.info("Camera calibration loaded successfully")
                 
             except Exception as e:
                 self.logger.warning(f"Failed to load calibration: {e}")
     
+    def _apply_calibration(self, calib_data: Dict[str, Any]):
+        """Install calibration parameters (in the calibration file format) and their remap tables"""
+        self.calibration.camera_matrix = np.array(calib_data["camera_matrix"])
+        self.calibration.distortion_coeffs = np.array(calib_data["distortion_coeffs"])
+        self.calibration.optimal_camera_matrix = np.array(calib_data["optimal_camera_matrix"])
+        self.calibration.roi = tuple(calib_data["roi"])
+        if "resolution" in calib_data:
+            self.calibration.resolution = tuple(calib_data["resolution"])
+        self.calibration.calibrated = True
+        
+        self._build_undistort_maps()
+    
+    def calibrate(self, parameters: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Start a background calibration run. parameters may set "directory" to
+        calibrate from saved images instead of the live stream, and override
+        the board_size, square_size_mm, views, interval_s and timeout_s
+        defaults from the calibration config.
+        """
+        if self.calibration_thread is not None and self.calibration_thread.is_alive():
+            self.logger.warning("Calibration already in progress")
+            return False
+        parameters = parameters or {}
+        if "directory" not in parameters and not self.running:
+            self.logger.warning("Live calibration needs the camera running")
+            return False
+        self.calibration_thread = threading.Thread(target=self._run_calibration, args=(parameters,),
+                                                   name="camera_calibration", daemon=True)
+        self.calibration_thread.start()
+        return True
+    
+    def _run_calibration(self, parameters: Dict[str, Any]):
+        """Collect chessboard views, solve, save the calibration file and switch to it"""
+        calib_config = self.config["calibration"]
+        views = int(parameters.get("views", calib_config.get("calibration_views", 20)))
+        calibrator = ChessboardCalibrator(
+            board_size=parameters.get("board_size", calib_config.get("calibration_board_size", [9, 6])),
+            square_size=parameters.get("square_size_mm", calib_config.get("calibration_square_size_mm", 20.0)),
+            detect_width=int(calib_config.get("detect_width", 640)),
+            workers=int(calib_config.get("workers", 0)),
+            min_views=min(views, int(calib_config.get("min_views", 10))),
+            max_views=views,
+            logger=self.logger
+        )
+        directory = parameters.get("directory")
+        try:
+            if directory:
+                calibrator.add_directory(directory)
+            else:
+                interval_s = float(parameters.get("interval_s", calib_config.get("interval_s", 1.0)))
+                deadline = time.monotonic() + float(parameters.get("timeout_s", calib_config.get("timeout_s", 120.0)))
+                self.logger.info(f"Calibrating from the live stream: {views} views, "
+                                 f"one search every {interval_s:.1f} s")
+                calibrator.start()
+                self._calibration_interval_s = interval_s
+                self.calibrator = calibrator
+                self._publish_status()
+                while self.running and not calibrator.complete and time.monotonic() < deadline:
+                    time.sleep(0.2)
+                self.calibrator = None
+            
+            result = calibrator.calibrate()
+            result.save(calib_config["file"])
+            with self._settings_lock:
+                self._apply_calibration(result.to_dict())
+            self.last_calibration = {
+                "rms_error": round(result.rms_error, 4),
+                "views": len(result.view_errors),
+                "resolution": list(result.resolution),
+                "file": calib_config["file"],
+                "time": time.time()
+            }
+            self.logger.info(f"Calibration saved to {calib_config['file']}")
+        except Exception as e:
+            self.logger.error(f"Calibration failed: {e}")
+            self.last_calibration = {"error": str(e), "time": time.time()}
+        finally:
+            self.calibrator = None
+            calibrator.stop()
+            self._publish_status()
+    
+    def _build_undistort_maps(self, resolution: Optional[Tuple[int, int]] = None, install: bool = True):
+        """
+        Build (or load cached) remap tables for resolution (default: the current
+        one). With install=False the maps are only prepared; install them and
+        resize the output pool with _install_undistort_maps.
+        """
+        if not self.calibration.calibrated:
+            return None
+        
+        resolution = tuple(resolution or self.camera_settings.resolution)
+        calib_resolution = self.calibration.resolution or resolution
+        camera_matrix = scale_camera_matrix(
+            self.calibration.camera_matrix, calib_resolution, resolution)
+        optimal_camera_matrix = scale_camera_matrix(
+            self.calibration.optimal_camera_matrix, calib_resolution, resolution)
+        
+        roi = self.calibration.roi
+        if roi is not None and calib_resolution != resolution:
+            sx = resolution[0] / calib_resolution[0]
+            sy = resolution[1] / calib_resolution[1]
+            roi = (round(roi[0] * sx), round(roi[1] * sy),
+                   round(roi[2] * sx), round(roi[3] * sy))
+        
+        maps = self.undistort_cache.get(
+            camera_matrix,
+            self.calibration.distortion_coeffs,
+            optimal_camera_matrix,
+            resolution,
+            roi,
+            install=install
+        )
+        if install:
+            self._install_undistort_maps(maps)
+        return maps
+    
+    def _install_undistort_maps(self, maps):
+        """Make maps current and size the output pool for them"""
+        self.undistort_cache.install(maps)
+        if self.output_pool is None:
+            self.output_pool = FramePool("output", maps.output_shape + (3,), self.frame_pool_size)
+        else:
+            self.output_pool.resize(maps.output_shape + (3,))
+    
     def start(self) -> bool:
         """Start the camera interface"""
         if self.running:
@@ -281,10 +985,32 @@ class CameraInterface:
             if hasattr(self.camera, 'start'):
                 self.camera.start()
             
-            # Start capture thread
+            self._init_shared_memory()
+            if self.compressed_output is not None:
+                self.compressed_output.start()
+            
+            # Start pipeline threads, consumers first
             self.running = True
+            self.process_queue.reopen()
+            self.publish_queue.reopen()
+            self.reorder.reset(self.sequence_id)
+            self.publish_thread = threading.Thread(target=self._publish_loop, daemon=True)
+            self.publish_thread.start()
+            self.worker_threads = [
+                threading.Thread(target=self._processing_loop, name=f"camera_worker_{i}", daemon=True)
+                for i in range(self.num_workers)
+            ]
+            for worker in self.worker_threads:
+                worker.start()
             self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
             self.capture_thread.start()
+            self.parking.reset_stats()
+            if self.config.get("frame_dump", {}).get("enabled", False):
+                self.frame_dump.start()
+            
+            if self.config["calibration"].get("auto_calibrate_on_startup", False) \
+                    and not self.calibration.calibrated:
+                self.calibrate()
             
             self.logger.info("Camera interface started successfully")
             return True
@@ -301,9 +1027,36 @@ class CameraInterface:
         self.logger.info("Stopping camera interface...")
         self.running = False
         
-        # Wait for capture thread to finish
+        # Wait for pipeline threads to finish, producers first
         if self.capture_thread and self.capture_thread.is_alive():
             self.capture_thread.join(timeout=5.0)
+        self.process_queue.close()
+        for worker in self.worker_threads:
+            if worker.is_alive():
+                worker.join(timeout=5.0)
+        self.publish_queue.close()
+        if self.publish_thread and self.publish_thread.is_alive():
+            self.publish_thread.join(timeout=5.0)
+        for item in self.process_queue.drain():
+            item[0].release()
+        for item in self.publish_queue.drain():
+            self._release_processed(item)
+        
+        self.frame_dump.stop()
+        
+        # Encoders may still be reading shared-memory slots
+        if self.compressed_output is not None:
+            self.compressed_output.stop()
+        if self.preroll is not None:
+            self.preroll.close()
+        
+        if self.shm_ring is not None:
+            self.shm_ring.close()
+            self.shm_ring = None
+        for ring in self.output_rings.values():
+            if ring is not None:
+                ring.close()
+        self.output_rings = {}
         
         # Stop camera
         if self.camera and hasattr(self.camera, 'stop'):
@@ -312,148 +1065,749 @@ class CameraInterface:
             except:
                 pass
         
-        # Cleanup DDS
-        if self.dds_participant:
-            # In full implementation, cleanup DDS resources
-            pass
+        self._publish_status()
         
         self.logger.info("Camera interface stopped")
+        self.log_transport.flush()
     
     def _capture_loop(self):
         """Main capture loop running in separate thread"""
         self.logger.info("Starting capture loop")
         
-        frame_interval = 1.0 / self.camera_settings.framerate
-        last_capture_time = 0
+        self.scheduler = FrameScheduler(self._capture_framerate())
+        self_paced = self.camera.capabilities.self_paced
         
         while self.running:
             try:
-                current_time = time.time()
-                
-                # Maintain framerate
-                time_since_last = current_time - last_capture_time
-                if time_since_last < frame_interval:
-                    time.sleep(frame_interval - time_since_last)
-                    continue
+                # Pace against absolute monotonic deadlines, unless the camera paces
+                # itself (a V4L2 device's frame clock, replay's recorded timestamps)
+                if self_paced:
+                    deadline_ns = time.monotonic_ns()
+                else:
+                    framerate = self._capture_framerate()
+                    if self.scheduler.framerate != framerate:
+                        self.scheduler.set_framerate(framerate)
+                    deadline_ns = self.scheduler.wait()
+                start_ns = time.monotonic_ns()
+                wall_us = time.time_ns() // 1000
+                self.latency["jitter"].record((start_ns - deadline_ns) / 1000.0)
                 
-                # Capture frame
-                frame = self._capture_frame()
+                # Capture frame and hand it to the processing workers
+                with self._capture_gate:
+                    frame = self._capture_frame()
                 if frame is not None:
-                    self._process_and_publish_frame(frame, current_time)
-                    last_capture_time = time.time()
-                    
-                    # Update FPS calculation
-                    self._update_fps()
+                    captured_ns = time.monotonic_ns()
+                    if self._gap_from_ns:
+                        self._record_capture_gap(captured_ns)
+                    self._last_captured_ns = captured_ns
+                    self.latency["capture"].record((captured_ns - start_ns) / 1000.0)
+                    # Unless the camera reports timestamps (libcamera's SensorTimestamp, or the
+                    # recorded ones on replay) the monotonic capture start is the closest stand-in
+                    sensor_ns = start_ns
+                    recorded = self.camera.frame_timestamps()
+                    if recorded is not None:
+                        wall_us, sensor_ns = recorded
+                    timing = FrameTiming(sensor_ns=sensor_ns, wall_us=wall_us,
+                                         deadline_ns=deadline_ns, captured_ns=captured_ns)
+                    dropped = self.process_queue.put((frame, timing, self.sequence_id),
+                                                     timeout=self.scheduler.period_ns / 1e9)
+                    if dropped is not None:
+                        dropped[0].release()
+                        self.reorder.abandon(dropped[2])
+                    self.sequence_id += 1
                 
+            except EOFError as e:
+                self.logger.info(f"{e}, capture stopped")
+                break
             except Exception as e:
                 self.logger.error(f"Error in capture loop: {e}")
                 time.sleep(0.1)  # Brief pause before retrying
         
         self.logger.info("Capture loop finished")
     
-    def _capture_frame(self) -> Optional[np.ndarray]:
-        """Capture a single frame from the camera"""
+    def _capture_frame(self) -> Optional[FrameBuffer]:
+        """
+        Request a frame from the camera backend. It holds the backend's memory (a
+        capture slab, mapped request buffers, a read-only view) until released
+        """
         try:
-            if hasattr(self.camera, 'capture_array'):
-                return self.camera.capture_array()
-            else:
-                # Mock implementation
-                return self.camera.capture_array()
+            return self.camera.request(self.capture_pool)
+        except EOFError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to capture frame: {e}")
             return None
     
-    def _process_and_publish_frame(self, frame: np.ndarray, timestamp: float):
-        """Process and publish a captured frame"""
+    def _processing_loop(self):
+        """Worker loop: undistort captured frames and queue them for publishing"""
+        while True:
+            item = self.process_queue.get(timeout=0.5)
+            if item is None:
+                if not self.running:
+                    break
+                continue
+            
+            processed = self._process_frame(*item)
+            if processed is None:
+                self.reorder.abandon(item[2])
+                continue
+            dropped = self.publish_queue.put(processed, timeout=0.5)
+            if dropped is not None:
+                self._release_processed(dropped)
+                self.reorder.abandon(dropped[1]["sequence_id"])
+    
+    def _publish_loop(self):
+        """Publisher loop: publish processed frames in capture order as they become available"""
+        while True:
+            item = self.publish_queue.get(timeout=self.reorder.wait_s(0.5))
+            if item is None:
+                # Stragglers waited for long enough: publish what follows the gap
+                for ready in self.reorder.expire():
+                    self._publish_processed(ready)
+                if self.sensor_join is not None:
+                    self._publish_frame_sensor(self.sensor_join.expire())
+                # Status and metrics keep their interval when no frames arrive (stalled
+                # camera, parking mode); the rate then reads zero
+                self._update_fps()
+                if not self.running:
+                    break
+                continue
+            
+            # Workers finish out of order; dumps, sensor joins and the pre-roll expect capture order
+            ready, late = self.reorder.push(item[1]["sequence_id"], item)
+            if late is not None:
+                self._release_processed(late)
+            for ready_item in ready:
+                self._publish_processed(ready_item)
+        
+        for item in self.reorder.drain():
+            self._release_processed(item)
+    
+    def _publish_processed(self, item):
+        """Publish one processed frame and release it"""
+        buffer, metadata, timing, outputs = item
+        try:
+            publish_start_ns = time.monotonic_ns()
+            if getattr(buffer, "converted", True):
+                self._publish_image(buffer.array, metadata)
+            else:
+                self.main_skipped += 1
+            if outputs:
+                self._publish_outputs(outputs, metadata)
+            published_ns = time.monotonic_ns()
+            self.latency["publish"].record((published_ns - publish_start_ns) / 1000.0)
+            self.latency["end_to_end"].record((published_ns - timing.captured_ns) / 1000.0)
+            self.published.mark()
+            self._update_fps()
+            if self.sensor_join is not None:
+                self._publish_frame_sensor(
+                    self.sensor_join.request(metadata["sequence_id"], metadata["timestamp"]))
+            self.frame_dump.offer(buffer, metadata)
+        except Exception as e:
+            self.logger.error(f"Failed to publish frame: {e}")
+        finally:
+            self._release_processed(item)
+    
+    @staticmethod
+    def _release_processed(item):
+        """Drop the references a processed item holds: its frame and rendered outputs"""
+        item[0].release()
+        for _, output in item[3]:
+            output.release()
+    
+    def _process_frame(self, buffer: FrameBuffer, timing: FrameTiming,
+                       sequence_id: int) -> Optional[Tuple[FrameBuffer, Dict[str, Any], FrameTiming, List]]:
+        """Process a captured frame and build its metadata. Takes ownership of buffer"""
         try:
-            # Apply calibration if available
-            if self.calibration.calibrated:
-                frame = self._undistort_frame(frame)
+            process_start_ns = time.monotonic_ns()
+            # Calibration needs the raw, still distorted frames
+            calibrator = self.calibrator
+            if calibrator is not None and process_start_ns >= self._calibration_next_offer:
+                if calibrator.offer(buffer.array):
+                    self._calibration_next_offer = process_start_ns + int(self._calibration_interval_s * 1e9)
+            luma = getattr(buffer, "luma", None)
+            self.parking.observe(luma if luma is not None else buffer.array)
             
+            # Apply calibration if available, writing into a pooled output slab
+            undistort = self.undistort_enabled and self.calibration.calibrated and self.output_pool is not None
+            flip_code = self._flip_code()
+            # A frame still in camera request buffers converts to BGR only when something
+            # needs it: corrections and full-resolution consumers do, luma/lores outputs don't
+            planes = getattr(buffer, "lazy", False) and not undistort and flip_code is None
+            if not planes or self._main_required():
+                if undistort:
+                    output = self.output_pool.checkout()
+                    undistorted = self._undistort_frame(buffer.array, output.array)
+                    if undistorted is output.array:
+                        buffer.release()
+                        buffer = output
+                    else:
+                        output.release()
+                
+                frame = buffer.array  # converted here, on the workers, rather than by the publisher
+                if flip_code is not None:
+                    if not frame.flags.writeable:
+                        # A view of the backend's own frame: flip into a slab of our own instead
+                        output = self.capture_pool.checkout(frame.shape)
+                        cv2.flip(frame, flip_code, dst=output.array)
+                        buffer.release()
+                        buffer = output
+                        self.flip_copies += 1
+                    else:
+                        cv2.flip(frame, flip_code, dst=frame)
+            shape = buffer.shape
             # Create image metadata
             metadata = {
-                "timestamp": int(timestamp * 1_000_000),  # microseconds
-                "sequence_id": self.frame_count,
-                "width": frame.shape[1],
-                "height": frame.shape[0],
-                "channels": frame.shape[2] if len(frame.shape) > 2 else 1,
+                "timestamp": timing.wall_us,  # Unix microseconds
+                "sensor_timestamp": timing.sensor_ns,  # monotonic nanoseconds
+                "sequence_id": sequence_id,
+                "width": shape[1],
+                "height": shape[0],
+                "channels": shape[2] if len(shape) > 2 else 1,
                 "format": "BGR",
                 "encoding": "uint8",
+                "camera_exposure": 0.0,
+                "camera_gain": float(self.camera_settings.digital_gain),
                 "source_module": self.config["module_id"]
             }
             
-            # Publish via DDS (stub implementation)
-            self._publish_image(frame, metadata)
+            # Every declared stream from one shared pyramid, whatever its subscriber count
+            outputs = self.output_streams.render(buffer, sequence_id, planes) if self.output_streams else []
             
-            self.frame_count += 1
+            timing.processed_ns = time.monotonic_ns()
+            self.latency["process"].record((timing.processed_ns - process_start_ns) / 1000.0)
+            return buffer, metadata, timing, outputs
             
         except Exception as e:
             self.logger.error(f"Failed to process frame: {e}")
+            buffer.release()
+            return None
     
-    def _undistort_frame(self, frame: np.ndarray) -> np.ndarray:
-        """Apply camera calibration to undistort the frame"""
+    def _undistort_frame(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """Apply camera calibration to undistort the frame, into dst when it fits"""
         try:
-            return cv2.undistort(
-                frame,
-                self.calibration.camera_matrix,
-                self.calibration.distortion_coeffs,
-                None,
-                self.calibration.optimal_camera_matrix
-            )
+            maps = self.undistort_cache.maps
+            if maps is None:
+                maps = self._build_undistort_maps()
+            if maps is None or maps.resolution != (frame.shape[1], frame.shape[0]):
+                # Captured before a resolution switch; pass it through rather than
+                # rebuilding the old maps on a worker thread
+                return frame
+            if dst is not None and dst.shape[:2] != maps.output_shape:
+                dst = None
+            return maps.apply(frame, dst)
         except Exception as e:
             self.logger.warning(f"Failed to undistort frame: {e}")
             return frame
     
+    def _init_shared_memory(self, frame_shape: Optional[Tuple[int, ...]] = None):
+        """(Re)create the shared-memory frame ring sized for the current resolution"""
+        if not self.shm_config.get("enabled", False):
+            return
+        if frame_shape is None:
+            width, height = self.camera_settings.resolution
+            frame_shape = (height, width, 3)
+        if self.shm_ring is not None:
+            self.shm_ring.close()
+            self.shm_ring = None
+        try:
+            self.shm_ring = SharedFrameRing(
+                f"dashcam_{self.config['module_id']}",
+                frame_shape,
+                int(self.shm_config.get("slots", 8))
+            )
+            self.logger.info(f"Shared memory frame ring {self.shm_ring.name} "
+                             f"({self.shm_ring.slots} x {self.shm_ring.stride} bytes)")
+        except Exception as e:
+            self.logger.warning(f"Shared memory transport unavailable, publishing inline: {e}")
+    
+    def _inline_required(self, writer=None) -> bool:
+        """Whether frames must also be sent inline as ImageData.data (on writer, default the main topic)"""
+        fallback = self.shm_config.get("inline_fallback", "auto")
+        if fallback == "always":
+            return True
+        if fallback == "never":
+            return False
+        return self._has_subscribers(writer or self.image_writer)
+    
+    def _has_subscribers(self, writer) -> bool:
+        """
+        True if anything subscribes to writer's topic, checked at most once a
+        second. Same-host readers use the descriptor topics, so readers of an
+        inline image topic are the remote ones.
+        """
+        if not (HAS_DDS and writer):
+            return False
+        now = time.monotonic()
+        matched, checked_at = self._inline_subscribers.get(writer, (False, 0.0))
+        if now - checked_at >= 1.0:
+            matched = writer.get_publication_matched_status().current_count > 0
+            self._inline_subscribers[writer] = (matched, now)
+        return matched
+    
+    def _main_required(self) -> bool:
+        """Whether anything consumes full-resolution BGR frames right now"""
+        if self.compressed_output is not None or self.frame_dump.active or self.calibrator is not None:
+            return True
+        if not (HAS_DDS and self.image_writer):
+            return True  # stub mode: keep publishing (logging) the main stream
+        return self._has_subscribers(self.descriptor_writer) or self._has_subscribers(self.image_writer)
+    
+    def _output_ring(self, name: str, shape: Tuple[int, ...]) -> Optional[SharedFrameRing]:
+        """Shared-memory ring of an output stream, (re)created for its frame shape"""
+        if not self.shm_config.get("enabled", False):
+            return None
+        ring = self.output_rings.get(name)
+        if ring is not None and ring.fits(shape):
+            return ring
+        if ring is None and name in self.output_rings:
+            return None  # creation already failed
+        if ring is not None:
+            ring.close()
+        try:
+            ring = SharedFrameRing(f"dashcam_{self.config['module_id']}_{name}", shape,
+                                   int(self.shm_config.get("slots", 8)))
+        except Exception as e:
+            self.logger.warning(f"Shared memory unavailable for output {name}, publishing inline: {e}")
+            ring = None
+        self.output_rings[name] = ring
+        return ring
+    
     def _publish_image(self, frame: np.ndarray, metadata: Dict[str, Any]):
-        """Publish image frame via DDS"""
+        """Publish image frame via shared memory and/or inline DDS"""
+        descriptor = None
+        if self.shm_ring is not None:
+            if not self.shm_ring.fits(frame.shape):
+                self._init_shared_memory(frame.shape)
+            if self.shm_ring is not None:
+                descriptor = self.shm_ring.write(frame, metadata["sequence_id"],
+                                                 metadata["timestamp"], metadata["format"])
+                self._publish_descriptor(descriptor, metadata)
+                self.shm_frames += 1
+        
+        if self.compressed_output is not None:
+            # With a descriptor the encoders read the slot instead of a pickled copy
+            self.compressed_output.submit(frame, metadata, descriptor)
+        
+        if descriptor is None or self._inline_required():
+            self._publish_inline(frame, metadata)
+            self.inline_frames += 1
+    
+    def _publish_compressed(self, data: bytes, metadata: Dict[str, Any], preview: bool):
+        """Publish a JPEG encoded frame (called from the encoder pool's callback thread)"""
+        if self.preroll is not None and not preview:
+            self.preroll.add(metadata["timestamp"], metadata["sequence_id"], data)
+        writer = self.preview_writer if preview else self.compressed_writer
+        if not (HAS_DDS and writer):
+            return
+        compressed_metadata = dict(metadata, format="JPEG", encoding="jpeg")
+        if preview:
+            compressed_metadata["width"], compressed_metadata["height"] = self.compressed_output.preview_size
+        writer.write(ImageData(
+            metadata=ImageMetadata(**compressed_metadata),
+            data=data
+        ))
+    
+    def _publish_outputs(self, outputs: List, metadata: Dict[str, Any]):
+        """Publish rendered output streams, each on its own topic"""
+        for spec, output in outputs:
+            writers = self.output_writers.get(spec.name)
+            if not (HAS_DDS and writers):
+                continue
+            image_writer, descriptor_writer = writers
+            frame = output.array
+            stream_metadata = ImageMetadata(**dict(
+                metadata, width=frame.shape[1], height=frame.shape[0],
+                channels=frame.shape[2] if frame.ndim > 2 else 1, format=spec.format))
+            ring = self._output_ring(spec.name, frame.shape)
+            if ring is not None:
+                descriptor = ring.write(frame, metadata["sequence_id"], metadata["timestamp"], spec.format)
+                descriptor_writer.write(SharedImageDescriptor(
+                    metadata=stream_metadata, segment=descriptor.segment, slot=descriptor.slot))
+            if ring is None or self._inline_required(image_writer):
+                image_writer.write(ImageData(metadata=stream_metadata, data=frame.tobytes()))
+    
+    def _publish_descriptor(self, descriptor, metadata: Dict[str, Any]):
+        """Publish the small shared-memory descriptor for a frame"""
+        if HAS_DDS and self.descriptor_writer:
+            self.descriptor_writer.write(SharedImageDescriptor(
+                metadata=ImageMetadata(**metadata),
+                segment=descriptor.segment,
+                slot=descriptor.slot
+            ))
+    
+    def _publish_inline(self, frame: np.ndarray, metadata: Dict[str, Any]):
+        """Publish image frame inline via DDS"""
         if HAS_DDS and self.image_writer:
-            # In full implementation, create ImageData structure and publish
-            pass
+            self.image_writer.write(ImageData(
+                metadata=ImageMetadata(**metadata),
+                data=frame.tobytes()
+            ))
         else:
             # Stub implementation - just log
-            if self.frame_count % 30 == 0:  # Log every 30 frames
-                self.logger.debug(f"Publishing frame {self.frame_count}: "
+            if metadata["sequence_id"] % 30 == 0:  # Log every 30 frames
+                self.logger.debug(f"Publishing frame {metadata['sequence_id']}: "
                                 f"{metadata['width']}x{metadata['height']}")
     
     def _update_fps(self):
-        """Update FPS calculation"""
-        current_time = time.time()
+        """
+        Close the one-second metrics window and publish status and metrics.
+        Called from the publish thread after each frame and whenever it waits
+        idle, so a window closes on time whether or not frames are published.
+        """
+        current_time = time.monotonic()
         if current_time - self.last_fps_time >= 1.0:
-            self.current_fps = self.frame_count / (current_time - self.last_fps_time)
             self.last_fps_time = current_time
-            self.frame_count = 0
+            self.metrics.tick()
+            self.window_latency = self.latency["end_to_end"].window()
+            self.logger.info(f"Current FPS: {self.published.rate:.1f}")
+            if self.quality is not None:
+                self.quality.sample()
             
-            if self.frame_count == 0:  # Only log once per second
-                self.logger.info(f"Current FPS: {self.current_fps:.1f}")
+            self._publish_status()
+            self._publish_metrics()
+    
+    def _init_quality_controller(self) -> Optional[QualityController]:
+        """Build the adaptive quality controller from the adaptive_quality config"""
+        quality_config = self.config.get("adaptive_quality", {})
+        if not quality_config.get("enabled", False):
+            return None
+        max_cpu = float(self.config.get("performance", {}).get("max_cpu_usage", 80.0))
+        limits = {
+            "cpu": (max_cpu, float(quality_config.get("recover_cpu_usage", max_cpu - 20.0))),
+            "temperature": (float(quality_config.get("max_temp_c", 75.0)),
+                            float(quality_config.get("recover_temp_c", 65.0))),
+            "latency": (float(quality_config.get("max_latency_ms", 50.0)),
+                        float(quality_config.get("recover_latency_ms", 20.0))),
+        }
+        sources = {
+            "cpu": CpuLoadSource(),
+            "temperature": ThermalSource(quality_config.get(
+                "thermal_zone", "/sys/class/thermal/thermal_zone0/temp")),
+            "latency": LatencySource(self.latency["end_to_end"]),
+        }
+        profiles = list(self._load_quality_profiles(quality_config.get("profiles_file", SYSTEM_CONFIG_FILE)).items())
+        if not profiles:
+            self.logger.warning("Adaptive quality enabled without profiles; disabled")
+            return None
+        return QualityController(profiles, limits, sources, self._apply_quality_profile,
+                                 degrade_after_s=float(quality_config.get("degrade_after_s", 3.0)),
+                                 recover_after_s=float(quality_config.get("recover_after_s", 30.0)),
+                                 initial=quality_config.get("initial_profile"))
     
-    def update_settings(self, new_settings: Dict[str, Any]):
-        """Update camera settings dynamically"""
+    def _load_quality_profiles(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """recording.quality_profiles of the system configuration, ordered best first"""
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
         try:
+            with open(path, 'r') as f:
+                return json.load(f).get("recording", {}).get("quality_profiles", {})
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.warning(f"Cannot load quality profiles from {path}: {e}")
+            return {}
+    
+    def _apply_quality_profile(self, name: str, profile: Dict[str, Any]):
+        """Switch to a quality profile chosen by the controller"""
+        if self.quality.pressure:
+            reason = ", ".join(self.quality.pressure)
+        else:
+            reason = "recovered" if self.quality.transitions else "initial"
+        self.logger.warning(f"Quality profile -> {name} ({reason})")
+        self.undistort_enabled = bool(profile.get("undistort", True))
+        self.update_settings({key: profile[key] for key in ("resolution", "framerate") if key in profile})
+    
+    def _init_output_streams(self) -> Optional[OutputStreams]:
+        """Build the declared output streams; invalid entries are skipped with a warning"""
+        outputs_config = self.config.get("outputs", {})
+        if not outputs_config.get("enabled", False):
+            return None
+        specs = []
+        for stream in outputs_config.get("streams", []):
+            try:
+                spec = OutputSpec.from_config(stream)
+            except (ValueError, TypeError, IndexError) as e:
+                self.logger.warning(f"Ignoring output stream {stream}: {e}")
+                continue
+            if any(existing.name == spec.name for existing in specs):
+                self.logger.warning(f"Ignoring duplicate output stream {spec.name}")
+                continue
+            specs.append(spec)
+        if not specs:
+            self.logger.warning("Output streams enabled without valid streams; disabled")
+            return None
+        return OutputStreams(specs, int(outputs_config.get("pool_slabs", self.frame_pool_size)))
+    
+    def _init_parking_mode(self) -> ParkingMode:
+        """Build the parking mode controller; parking_mode.enabled only sets the initial state"""
+        parking_config = self.config.get("parking_mode", {})
+        detector = MotionDetector(
+            width=int(parking_config.get("motion_width", 160)),
+            alpha=float(parking_config.get("background_alpha", 0.05)),
+            pixel_threshold=int(parking_config.get("pixel_threshold", 25)),
+            min_area=float(parking_config.get("min_area", 0.005)))
+        return ParkingMode(detector, idle_fps=float(parking_config.get("idle_fps", 2)),
+                           check_fps=float(parking_config.get("check_fps", 5)),
+                           hold_s=float(parking_config.get("hold_s", 10)),
+                           on_state_change=self._on_parking_state, on_motion=self._on_parking_motion)
+    
+    def set_parking_mode(self, enabled: bool):
+        """Enter or leave parking mode, e.g. on ignition off/on"""
+        self.logger.info(f"Parking mode {'enabled' if enabled else 'disabled'}")
+        self.parking.set_enabled(enabled)
+    
+    def set_frame_dump(self, enabled: bool):
+        """Start or stop writing published frames to raw frame dumps"""
+        if enabled:
+            self.frame_dump.start()
+        else:
+            self.frame_dump.stop()
+    
+    def _on_parking_state(self, state: str):
+        """Parking mode switched between idle and active: retune the capture rate"""
+        self.logger.info(f"Parking mode {state}, capturing at {self._capture_framerate():g} fps")
+        self._apply_camera_controls()
+    
+    def _on_parking_motion(self, score: float):
+        """Motion while parked: save the pre-roll and what follows as an event clip"""
+        parking_config = self.config.get("parking_mode", {})
+        if parking_config.get("trigger_clip", True) and self.preroll is not None:
+            self.trigger_event(parking_config.get("clip_post_seconds"), f"parking motion {score:.1%}")
+    
+    def _capture_framerate(self) -> float:
+        """Rate the capture loop runs at: the configured framerate unless parked and idle"""
+        framerate = self.parking.framerate(self.camera_settings.framerate)
+        max_fps = self.camera.capabilities.max_fps if self.camera is not None else None
+        return min(framerate, max_fps) if max_fps else framerate
+    
+    def trigger_event(self, post_seconds: Optional[float] = None, reason: str = "") -> Optional[str]:
+        """Save the pre-roll plus the next post_seconds to a protected clip"""
+        if self.preroll is None:
+            self.logger.warning("Event triggered but pre-roll is disabled")
+            return None
+        return self.preroll.trigger(post_seconds, reason)
+    
+    def update_settings(self, new_settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply new settings to the running camera without restarting the module.
+        
+        Changes are classified (see SETTING_CHANGE_CLASS): immediate ones are
+        applied between frames, rebuild and restart ones pause capture only while
+        pools, remap tables and (for restart) the camera stream are switched.
+        New remap tables are prepared before capture is paused. The gap between
+        the last frame before and the first frame after the switch is recorded
+        in reconfig_stats once that frame arrives.
+        """
+        with self._settings_lock:
+            changes = {}
             for key, value in new_settings.items():
-                if hasattr(self.camera_settings, key):
-                    setattr(self.camera_settings, key, value)
-                    self.logger.info(f"Updated setting {key} = {value}")
+                if not hasattr(self.camera_settings, key):
+                    self.logger.warning(f"Unknown camera setting {key}")
+                    continue
+                try:
+                    value = self._coerce_setting(key, value)
+                except (TypeError, ValueError) as e:
+                    self.logger.warning(f"Invalid value for {key}: {value!r} ({e})")
+                    continue
+                if value != getattr(self.camera_settings, key):
+                    changes[key] = value
             
-            # Apply settings to camera
-            self._apply_camera_settings()
+            change_class = classify_settings(changes)
+            report = {"class": change_class, "changed": sorted(changes), "switch_ms": 0.0}
+            if not changes:
+                return report
             
-        except Exception as e:
-            self.logger.error(f"Failed to update settings: {e}")
+            try:
+                maps = None
+                if "resolution" in changes and self.calibration.calibrated:
+                    maps = self._build_undistort_maps(changes["resolution"], install=False)
+                
+                switch_start_ns = time.monotonic_ns()
+                if change_class == CHANGE_IMMEDIATE:
+                    self._set_settings(changes)
+                    self._apply_camera_controls()
+                else:
+                    with self._capture_gate:
+                        self._set_settings(changes)
+                        if "resolution" in changes:
+                            width, height = self.camera_settings.resolution
+                            self.capture_pool.resize((height, width, 3))
+                            if maps is not None:
+                                self._install_undistort_maps(maps)
+                        self._apply_camera_settings(restart=change_class == CHANGE_RESTART)
+                        self._gap_from_ns = self._last_captured_ns if self.running else 0
+                report["switch_ms"] = (time.monotonic_ns() - switch_start_ns) / 1e6
+            except Exception as e:
+                self.logger.error(f"Failed to update settings: {e}")
+                report["error"] = str(e)
+                return report
+            
+            self.reconfig_stats["count"] += 1
+            self.reconfig_stats["last_class"] = change_class
+            self.reconfig_stats["last_switch_ms"] = round(report["switch_ms"], 3)
+            self.logger.info(f"Applied {change_class} settings change "
+                             f"({', '.join(f'{k}={v}' for k, v in changes.items())}) "
+                             f"in {report['switch_ms']:.1f} ms")
+            return report
     
-    def _apply_camera_settings(self):
-        """Apply current settings to the camera hardware"""
-        # This would be implemented based on the specific camera API
-        pass
+    def _coerce_setting(self, key: str, value: Any) -> Any:
+        """Convert a (JSON decoded) value to the type of the CameraSettings field"""
+        current = getattr(self.camera_settings, key)
+        if isinstance(current, (tuple, list)):
+            value = tuple(int(v) for v in value)
+            if len(value) != len(current):
+                raise ValueError(f"expected {len(current)} values")
+        elif isinstance(current, bool):
+            value = bool(value)
+        elif isinstance(current, (int, float)):
+            value = type(current)(value)
+        if key == "rotation" and value not in (0, 180):
+            raise ValueError("only 0 and 180 degree rotation is supported")
+        if key == "exposure_mode" and value not in EXPOSURE_MODES:
+            raise ValueError(f"expected one of {', '.join(EXPOSURE_MODES)}")
+        if key in ("digital_gain", "exposure_time_us") and value < 0:
+            raise ValueError("must not be negative")
+        return value
+    
+    def _set_settings(self, changes: Dict[str, Any]):
+        for key, value in changes.items():
+            setattr(self.camera_settings, key, value)
+    
+    def _record_capture_gap(self, captured_ns: int):
+        """Close out the capture gap opened by a rebuild/restart switch"""
+        gap_ms = (captured_ns - self._gap_from_ns) / 1e6
+        self._gap_from_ns = 0
+        self.reconfig_stats["last_gap_ms"] = round(gap_ms, 3)
+        self.reconfig_stats["max_gap_ms"] = round(max(self.reconfig_stats["max_gap_ms"], gap_ms), 3)
+        self.logger.info(f"Capture resumed after reconfiguration, gap {gap_ms:.1f} ms")
+    
+    def _flip_code(self) -> Optional[int]:
+        """cv2.flip code for the software flips, None when no flip is needed"""
+        hflip, vflip = self.camera_settings.hflip, self.camera_settings.vflip
+        if hflip and vflip:
+            return -1
+        if hflip:
+            return 1
+        if vflip:
+            return 0
+        return None
+    
+    def _camera_configuration(self):
+        """Picamera2 stream configuration (main, optional lores) for the current settings"""
+        return self.camera.create_configuration(tuple(self.camera_settings.resolution),
+                                                self.camera_settings.rotation)
+    
+    def _camera_controls(self) -> Dict[str, Any]:
+        """Map CameraSettings onto libcamera controls that can change while streaming"""
+        settings = self.camera_settings
+        frame_us = int(1e6 / max(self._capture_framerate(), 0.1))
+        controls = {
+            "FrameDurationLimits": (frame_us, frame_us),
+            "Brightness": (settings.brightness - 50) / 50.0,
+            "Contrast": 1.0 + settings.contrast / 100.0,
+            "Saturation": 1.0 + settings.saturation / 100.0,
+            "Sharpness": 1.0 + settings.sharpness / 100.0,
+            "AwbEnable": settings.white_balance == "auto",
+        }
+        ae_mode = EXPOSURE_MODES.get(settings.exposure_mode, 0)
+        controls["AeEnable"] = ae_mode is not None
+        if ae_mode is None:
+            controls["ExposureTime"] = min(settings.exposure_time_us or frame_us, frame_us)
+        else:
+            controls["AeExposureMode"] = ae_mode
+        # libcamera has no settable digital gain; on the Pi the ISP supplies the part
+        # of a requested AnalogueGain beyond the sensor's range digitally
+        if settings.iso or settings.digital_gain != 1.0:
+            controls["AnalogueGain"] = (settings.iso / 100.0 if settings.iso else 1.0) * settings.digital_gain
+        return controls
+    
+    def _is_picamera(self) -> bool:
+        return isinstance(self.camera, PicameraBackend)
+    
+    def _apply_camera_controls(self):
+        """Apply settings that take effect on the next frame"""
+        if self.camera is None:
+            return
+        if not self._is_picamera():
+            self.camera.framerate = self._capture_framerate()
+            return
+        self.camera.set_controls(self._camera_controls())
+    
+    def _apply_camera_settings(self, restart: bool = False):
+        """Apply current settings to the camera hardware; the caller holds the capture gate"""
+        if self.camera is None:
+            return
+        resolution = tuple(self.camera_settings.resolution)
+        if not self._is_picamera():
+            self.camera.resolution = resolution
+            self.camera.framerate = self._capture_framerate()
+            self.camera.rotation = self.camera_settings.rotation
+            return
+        # A new output size or transform needs the Picamera2 pipeline reconfigured
+        if restart or tuple(self.camera.camera_config["main"]["size"]) != resolution:
+            started = self.camera.started
+            if started:
+                self.camera.stop()
+            self.camera.configure(self._camera_configuration())
+            if started:
+                self.camera.start()
+        self.camera.set_controls(self._camera_controls())
+    
+    def _copy_stats(self) -> Dict[str, Any]:
+        """Full-frame copies from the camera to a processed frame, per captured frame"""
+        capture = self.camera.copies if self.camera is not None else 0
+        requests = self.camera.requests if self.camera is not None else 0
+        return {
+            "capture": capture,
+            "flip": self.flip_copies,
+            "per_frame": round((capture + self.flip_copies) / requests, 3) if requests else 0.0
+        }
     
     def get_status(self) -> Dict[str, Any]:
         """Get current camera status"""
         return {
             "module_id": self.config["module_id"],
             "running": self.running,
-            "fps": self.current_fps,
-            "frame_count": self.frame_count,
+            "fps": round(self.published.rate, 2),
+            "fps_ewma": round(self.published.ewma or 0.0, 2),
+            "frame_count": self.published.total,
             "resolution": list(self.camera_settings.resolution),
             "calibrated": self.calibration.calibrated,
+            "pipeline": {
+                "captured": self.sequence_id,
+                "workers": self.num_workers,
+                "process_queue": self.process_queue.stats(),
+                "publish_queue": self.publish_queue.stats(),
+                "reorder": self.reorder.stats(),
+                "capture_pool": self.capture_pool.stats(),
+                "output_pool": self.output_pool.stats() if self.output_pool else None,
+                "copies": self._copy_stats()
+            },
+            "transport": {
+                "shared_memory": self.shm_ring.name if self.shm_ring else None,
+                "shm_frames": self.shm_frames,
+                "main_skipped": self.main_skipped,
+                "inline_frames": self.inline_frames
+            },
+            "compression": self.compressed_output.stats() if self.compressed_output else None,
+            "preroll": self.preroll.stats() if self.preroll else None,
+            "timing": {
+                "missed_deadlines": self.scheduler.missed_deadlines if self.scheduler else 0,
+                "late_frames": self.scheduler.late_frames if self.scheduler else 0,
+                "latency": {stage: histogram.snapshot() for stage, histogram in self.latency.items()}
+            },
+            "process": self.metrics.snapshot()["process"],
+            "calibration_run": {
+                "active": self.calibrator is not None,
+                "progress": self.calibrator.stats() if self.calibrator else None,
+                "last": self.last_calibration
+            },
+            "camera": self.camera.stats() if self.camera is not None else None,
+            "quality": self.quality.stats() if self.quality else None,
+            "parking": self.parking.stats(),
+            "frame_dump": self.frame_dump.stats(),
+            "outputs": self.output_streams.stats() if self.output_streams else None,
+            "sensor_join": self.sensor_join.stats() if self.sensor_join else None,
+            "reconfiguration": dict(self.reconfig_stats),
+            "logging": self.log_transport.stats(),
             "settings": asdict(self.camera_settings)
         }
 
@@ -465,13 +1819,23 @@ def main():
     parser = argparse.ArgumentParser(description="Raspberry Pi Camera Interface Module")
     parser.add_argument("--config", "-c", help="Configuration file path")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
+    parser.add_argument("--replay", help="Replay a frame dump, segment, video or directory of them")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Replay speed multiplier; 0 replays as fast as possible")
+    parser.add_argument("--v4l2", help="Capture from a V4L2 device (e.g. /dev/video0) instead of the Pi camera")
     args = parser.parse_args()
     
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-    
     # Create and run camera interface
     camera_interface = CameraInterface(args.config)
+    if args.verbose:
+        # The module logger does not propagate to the root logger; set its own level
+        camera_interface.set_log_level(0)
+    if args.replay:
+        camera_interface.config["replay"] = dict(camera_interface.config.get("replay", {}), enabled=True,
+                                                 path=args.replay, speed=args.replay_speed)
+    elif args.v4l2:
+        camera_interface.config["v4l2"] = dict(camera_interface.config.get("v4l2", {}), enabled=True,
+                                               device=args.v4l2)
     
     try:
         if not camera_interface.initialize():
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Compressed image output stage for the camera interface
+
+Frames are JPEG encoded (plus an optional low-resolution preview) in a process
+pool sized to the available cores, using OpenCV's software encoder so it runs on
+any Linux machine. When the shared-memory transport is active, workers map the
+frame's slot directly instead of receiving a pickled copy of the pixels.
+"""
+
+import os
+import time
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from shm_transport import FrameDescriptor, SharedFrameReader
+
+# Per-process reader, created lazily inside each worker
+_reader: Optional[SharedFrameReader] = None
+
+
+def _encode_job(source, quality: int,
+                preview_size: Optional[Tuple[int, int]]) -> Optional[Tuple[bytes, Optional[bytes], float]]:
+    """
+    Worker entry point. source is either an ndarray or a FrameDescriptor dict.
+    Returns (jpeg, preview_jpeg, encode_ms), or None if the shared-memory slot
+    was overwritten before the encode finished.
+    """
+    global _reader
+    start = time.perf_counter()
+    descriptor = None
+    if isinstance(source, dict):
+        if _reader is None:
+            _reader = SharedFrameReader()
+        descriptor = FrameDescriptor.from_dict(source)
+        frame = _reader.view(descriptor)
+        if frame is None:
+            return None
+    else:
+        frame = source
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    ok, encoded = cv2.imencode(".jpg", frame, params)
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    preview = None
+    if preview_size is not None:
+        small = cv2.resize(frame, preview_size, interpolation=cv2.INTER_AREA)
+        ok, preview_encoded = cv2.imencode(".jpg", small, params)
+        if ok:
+            preview = preview_encoded.tobytes()
+
+    if descriptor is not None and not _reader.is_valid(descriptor):
+        return None
+    return encoded.tobytes(), preview, (time.perf_counter() - start) * 1000.0
+
+
+class CompressedOutput:
+    """Non-blocking JPEG encoder pool with bounded in-flight work"""
+
+    def __init__(self, config: Dict[str, Any], publish: Callable[[bytes, Dict[str, Any], bool], None],
+                 logger):
+        self.quality = int(config.get("quality", 85))
+        preview = config.get("preview_resolution")
+        self.preview_size = tuple(preview) if preview else None
+        self.workers = int(config.get("workers", 0)) or os.cpu_count() or 1
+        self.max_in_flight = int(config.get("max_in_flight", self.workers * 2))
+        self.publish = publish
+        self.logger = logger
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        # Statistics
+        self.submitted = 0
+        self.encoded = 0
+        self.dropped = 0
+        self.stale = 0
+        self.failed = 0
+        self.encode_ms = 0.0
+        self.bytes_per_frame = 0.0
+        self.preview_bytes_per_frame = 0.0
+
+    def start(self):
+        if self._executor is None:
+            # spawn rather than fork: the parent holds DDS and camera threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=mp.get_context("spawn"))
+            self.logger.info(f"JPEG encoder pool started with {self.workers} workers")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, frame: np.ndarray, metadata: Dict[str, Any],
+               descriptor: Optional[FrameDescriptor] = None) -> bool:
+        """Queue a frame for encoding; drops it if the pool is saturated"""
+        if self._executor is None:
+            return False
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.dropped += 1
+                return False
+            self._in_flight += 1
+            self.submitted += 1
+        source = descriptor.to_dict() if descriptor is not None else frame
+        try:
+            future = self._executor.submit(_encode_job, source, self.quality, self.preview_size)
+        except BrokenProcessPool:
+            with self._lock:
+                self._in_flight -= 1
+                self.failed += 1
+            # A worker died (e.g. OOM killed); replace the pool rather than stop encoding
+            self.logger.error("JPEG encoder pool broken, restarting")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.start()
+            return False
+        future.add_done_callback(lambda f: self._on_encoded(f, metadata))
+        return True
+
+    def _on_encoded(self, future, metadata: Dict[str, Any]):
+        with self._lock:
+            self._in_flight -= 1
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            self.failed += 1
+            self.logger.error(f"Failed to encode frame {metadata['sequence_id']}: {e}")
+            return
+        if result is None:
+            self.stale += 1
+            return
+
+        jpeg, preview, encode_ms = result
+        self.encoded += 1
+        # Exponentially weighted averages keep the stats cheap and recent
+        alpha = 1.0 if self.encoded == 1 else 0.1
+        self.encode_ms += alpha * (encode_ms - self.encode_ms)
+        self.bytes_per_frame += alpha * (len(jpeg) - self.bytes_per_frame)
+        if preview is not None:
+            self.preview_bytes_per_frame += alpha * (len(preview) - self.preview_bytes_per_frame)
+        try:
+            self.publish(jpeg, metadata, False)
+            if preview is not None:
+                self.publish(preview, metadata, True)
+        except Exception as e:
+            self.logger.error(f"Failed to publish compressed frame: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "submitted": self.submitted,
+            "encoded": self.encoded,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "failed": self.failed,
+            "encode_ms": round(self.encode_ms, 2),
+            "bytes_per_frame": int(self.bytes_per_frame),
+            "preview_bytes_per_frame": int(self.preview_bytes_per_frame),
+        }
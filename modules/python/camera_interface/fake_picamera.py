@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Picamera2 stand-in emitting YUV420 / RGB888 request buffers
+
+Implements the part of the Picamera2 API that PicameraBackend uses:
+create_preview_configuration / configure / start / stop / set_controls,
+capture_request() returning requests with get_metadata() and release(), and
+FakeMappedArray in place of picamera2.MappedArray. Buffers are laid out as
+libcamera lays them out (rows padded to a 64 byte stride, I420 planes for
+YUV420), so the backend's stride handling is exercised too.
+
+Frame content comes from a SyntheticCamera bank converted once at configure
+time, standing in for the ISP. As with the real camera only buffer_count
+requests can be outstanding; capture_request() waits while all are held and
+counts the stall.
+"""
+
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from synthetic_camera import SyntheticCamera
+
+STRIDE_ALIGN = 64
+_BYTES_PER_PIXEL = {"RGB888": 3, "YUV420": 1}
+
+
+def _align(value: int) -> int:
+    return (value + STRIDE_ALIGN - 1) // STRIDE_ALIGN * STRIDE_ALIGN
+
+
+def _layout(stream: Dict[str, Any]) -> Dict[str, Any]:
+    fmt = stream.get("format", "RGB888")
+    if fmt not in _BYTES_PER_PIXEL:
+        raise ValueError(f"FakePicamera2 does not emit {fmt}")
+    width, height = stream["size"]
+    stride = _align(width * _BYTES_PER_PIXEL[fmt])
+    framesize = stride * height * 3 // 2 if fmt == "YUV420" else stride * height
+    return dict(stream, size=(width, height), format=fmt, stride=stride, framesize=framesize)
+
+
+def _fill(flat: np.ndarray, bgr: np.ndarray, stream: Dict[str, Any]):
+    """Write a BGR frame into a flat buffer in the stream's format and layout"""
+    width, height = stream["size"]
+    stride = stream["stride"]
+    if stream["format"] == "RGB888":
+        rows = flat.reshape(height, stride)
+        np.copyto(rows[:, :width * 3].reshape(height, width, 3), bgr)
+        return
+    i420 = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+    luma, quarter = width * height, (width // 2) * (height // 2)
+    planes = i420.reshape(-1)
+    chroma = (stride // 2) * (height // 2)
+    np.copyto(flat[:stride * height].reshape(height, stride)[:, :width], i420[:height])
+    for index in range(2):
+        start = stride * height + index * chroma
+        np.copyto(flat[start:start + chroma].reshape(height // 2, stride // 2)[:, :width // 2],
+                  planes[luma + index * quarter:luma + (index + 1) * quarter].reshape(height // 2, width // 2))
+
+
+class FakeRequest:
+    """A completed request: one bank frame per stream plus metadata"""
+
+    def __init__(self, camera: "FakePicamera2", buffers: Dict[str, np.ndarray], metadata: Dict[str, Any]):
+        self._camera = camera
+        self.buffers = buffers
+        self._metadata = metadata
+        self._released = False
+
+    def get_metadata(self) -> Dict[str, Any]:
+        return dict(self._metadata)
+
+    def make_array(self, name: str) -> np.ndarray:
+        with FakeMappedArray(self, name) as mapped:
+            return mapped.array.copy()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._camera._release()
+
+
+class FakeMappedArray:
+    """Context manager mapping a request's stream buffer, shaped as picamera2.MappedArray does"""
+
+    def __init__(self, request: FakeRequest, stream: str, reshape: bool = True, write: bool = True):
+        self._request = request
+        self._stream = stream
+        self._reshape = reshape
+        self.array: Optional[np.ndarray] = None
+
+    def __enter__(self) -> "FakeMappedArray":
+        flat = self._request.buffers[self._stream]
+        config = self._request._camera.camera_config[self._stream]
+        width, height = config["size"]
+        stride = config["stride"]
+        if not self._reshape:
+            self.array = flat
+        elif config["format"] == "YUV420":
+            self.array = flat.reshape(height * 3 // 2, stride)
+        else:
+            self.array = flat.reshape(height, stride)[:, :width * 3].reshape(height, width, 3)
+        return self
+
+    def __exit__(self, *exc):
+        self.array = None
+        return False
+
+
+class FakePicamera2:
+    """Camera stand-in with Picamera2's request interface"""
+
+    def __init__(self, bank_frames: int = 8, pace: bool = True, capture_timeout_s: float = 2.0,
+                 clock=time.monotonic_ns, sleep=time.sleep):
+        self.bank_frames = max(1, int(bank_frames))
+        self.pace = pace
+        self.capture_timeout_s = capture_timeout_s
+        self.clock = clock
+        self.sleep = sleep
+        self.camera_config: Optional[Dict[str, Any]] = None
+        self.controls: Dict[str, Any] = {}
+        # (min, max, default) as Picamera2 reports them; the minimum is that of a 60 fps sensor mode
+        self.camera_controls: Dict[str, Tuple] = {"FrameDurationLimits": (16667, 1000000, 33333)}
+        self.started = False
+        self._bank: List[Dict[str, np.ndarray]] = []
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self._index = 0
+        self._period_ns = int(1e9 / 30)
+        self._next_frame_ns = 0
+
+        # Statistics
+        self.frames = 0
+        self.stalls = 0
+
+    def create_preview_configuration(self, main: Optional[Dict[str, Any]] = None,
+                                     lores: Optional[Dict[str, Any]] = None, buffer_count: int = 4,
+                                     transform=None, **kwargs) -> Dict[str, Any]:
+        main = dict(main or {})
+        main.setdefault("size", (640, 480))
+        return {"use_case": "preview", "main": main, "lores": dict(lores) if lores else None,
+                "buffer_count": int(buffer_count), "transform": transform, "controls": {}}
+
+    def configure(self, config: Dict[str, Any]):
+        if self.started:
+            raise RuntimeError("Camera must be stopped before configuring")
+        config = dict(config)
+        config["main"] = _layout(config["main"])
+        if config.get("lores"):
+            config["lores"] = _layout(config["lores"])
+        self.camera_config = config
+        self._build_bank()
+
+    def _build_bank(self):
+        """Pre-render frames in every stream's format: the ISP's work, not the consumer's"""
+        config = self.camera_config
+        transform = config.get("transform")
+        flip = None
+        if isinstance(transform, dict):
+            hflip, vflip = transform.get("hflip"), transform.get("vflip")
+        else:
+            hflip, vflip = getattr(transform, "hflip", False), getattr(transform, "vflip", False)
+        if hflip or vflip:
+            flip = -1 if hflip and vflip else (1 if hflip else 0)
+        source = SyntheticCamera({"resolution": config["main"]["size"], "bank_frames": self.bank_frames,
+                                  "pace": False})
+        width, height = config["main"]["size"]
+        bgr = np.empty((height, width, 3), dtype=np.uint8)
+        self._bank = []
+        for _ in range(self.bank_frames):
+            source.capture_into(bgr)
+            if flip is not None:
+                cv2.flip(bgr, flip, dst=bgr)
+            entry = {}
+            for name in ("main", "lores"):
+                stream = config.get(name)
+                if not stream:
+                    continue
+                image = bgr if name == "main" else cv2.resize(bgr, stream["size"], interpolation=cv2.INTER_AREA)
+                flat = np.zeros(stream["framesize"], dtype=np.uint8)
+                _fill(flat, image, stream)
+                entry[name] = flat
+            self._bank.append(entry)
+
+    def set_controls(self, controls: Dict[str, Any]):
+        self.controls.update(controls)
+        limits = controls.get("FrameDurationLimits")
+        if limits:
+            self._period_ns = int(limits[0]) * 1000
+
+    def start(self):
+        if self.camera_config is None:
+            self.configure(self.create_preview_configuration())
+        self.started = True
+        self._next_frame_ns = self.clock()
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.stop()
+
+    def capture_request(self) -> FakeRequest:
+        if not self.started:
+            raise RuntimeError("Camera not started")
+        with self._cond:
+            if self._outstanding >= self.camera_config["buffer_count"]:
+                # Every buffer is held by the application: the real camera stops too
+                self.stalls += 1
+                if not self._cond.wait_for(
+                        lambda: self._outstanding < self.camera_config["buffer_count"],
+                        timeout=self.capture_timeout_s):
+                    raise TimeoutError("All camera buffers are held; no request completed")
+            self._outstanding += 1
+        if self.pace:
+            now = self.clock()
+            if now < self._next_frame_ns:
+                self.sleep((self._next_frame_ns - now) / 1e9)
+            self._next_frame_ns = max(self._next_frame_ns + self._period_ns, self.clock() - self._period_ns)
+        entry = self._bank[self._index % len(self._bank)]
+        self._index += 1
+        self.frames += 1
+        metadata = {"SensorTimestamp": self.clock(), "FrameDuration": self._period_ns // 1000,
+                    "ExposureTime": self._period_ns // 2000, "AnalogueGain": 1.0}
+        return FakeRequest(self, entry, metadata)
+
+    def _release(self):
+        with self._cond:
+            self._outstanding -= 1
+            self._cond.notify()
+
+    def capture_array(self, name: str = "main") -> np.ndarray:
+        request = self.capture_request()
+        try:
+            return request.make_array(name)
+        finally:
+            request.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"frames": self.frames, "outstanding": self._outstanding, "stalls": self.stalls}
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Raw frame dump container
+
+A dump is a pair of append-only files:
+
+    <name>.frames  a 4 KiB header (shape, pixel format, source module)
+                   followed by uncompressed frames at page-aligned,
+                   fixed-stride offsets
+    <name>.index   one packed INDEX_DTYPE record per frame, in capture order
+
+Frame i lives at DATA_OFFSET + i * stride, so both files open directly with
+np.memmap, without this module:
+
+    frames = np.memmap(base + ".frames", np.uint8, "r", DATA_OFFSET, (n, stride))
+    index = np.memmap(base + ".index", INDEX_DTYPE, "r")
+
+and a time range is two binary searches over index["timestamp"] instead of a
+scan. Records are written in sequence order, but a wall clock stepped back
+(an NTP correction) can still leave timestamps out of order; FrameDump checks
+once and then searches a timestamp sort of the index instead.
+
+The frame count is whatever both files fully contain, so a dump cut short by a
+crash or power loss is still readable up to its last whole frame.
+
+DumpRecorder is the capture-to-disk side: it takes published frames from the
+camera pipeline and writes them on its own thread, rolling to a new dump on
+a resolution change or after max_frames_per_file.
+"""
+
+import os
+import time
+import queue
+import bisect
+import struct
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DUMP_MAGIC = b"DCRAWDMP"
+DUMP_VERSION = 1
+FRAMES_SUFFIX = ".frames"
+INDEX_SUFFIX = ".index"
+
+PAGE_SIZE = 4096
+DATA_OFFSET = PAGE_SIZE
+# magic, version, width, height, channels, pixel format, encoding, frame bytes, frame stride, source module
+DUMP_HEADER = struct.Struct("<8sIIII8s8sQQ32s")
+
+INDEX_DTYPE = np.dtype([
+    ("timestamp", "<u8"),         # Unix microseconds, as ImageMetadata.timestamp
+    ("sensor_timestamp", "<u8"),  # monotonic nanoseconds
+    ("sequence_id", "<u4"),
+    ("exposure", "<f4"),
+    ("gain", "<f4"),
+])
+
+
+def _stride(frame_bytes: int) -> int:
+    return (frame_bytes + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+
+def _text(value: bytes) -> str:
+    return value.rstrip(b"\0").decode("ascii", errors="replace")
+
+
+def dump_base(path: str) -> str:
+    """Strip a .frames/.index suffix, if any, to get the dump name"""
+    for suffix in (FRAMES_SUFFIX, INDEX_SUFFIX):
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+class FrameDumpWriter:
+    """Appends frames and their index records to a new dump"""
+
+    def __init__(self, path: str, shape: Tuple[int, ...], pixel_format: str = "BGR",
+                 source_module: str = ""):
+        self.base = dump_base(path)
+        self.shape = tuple(shape)
+        height, width = self.shape[:2]
+        channels = self.shape[2] if len(self.shape) > 2 else 1
+        self.frame_bytes = height * width * channels
+        self.stride = _stride(self.frame_bytes)
+        self.frames = 0
+        self._padding = bytes(self.stride - self.frame_bytes)
+
+        self._frames_file = open(self.base + FRAMES_SUFFIX, "wb")
+        self._index_file = open(self.base + INDEX_SUFFIX, "wb")
+        header = DUMP_HEADER.pack(DUMP_MAGIC, DUMP_VERSION, width, height, channels,
+                                  pixel_format.encode("ascii")[:8], b"uint8", self.frame_bytes, self.stride,
+                                  source_module.encode("ascii", errors="replace")[:32])
+        self._frames_file.write(header.ljust(DATA_OFFSET, b"\0"))
+        self._record = np.zeros(1, dtype=INDEX_DTYPE)
+
+    @property
+    def bytes_written(self) -> int:
+        return DATA_OFFSET + self.frames * (self.stride + INDEX_DTYPE.itemsize)
+
+    def write(self, frame: np.ndarray, timestamp: int, sensor_timestamp: int = 0, sequence_id: int = 0,
+              exposure: float = 0.0, gain: float = 0.0):
+        if frame.shape != self.shape or frame.dtype != np.uint8:
+            raise ValueError(f"frame {frame.shape} {frame.dtype} does not match dump {self.shape} uint8")
+        self._frames_file.write(np.ascontiguousarray(frame).data)
+        if self._padding:
+            self._frames_file.write(self._padding)
+        self._record[0] = (timestamp, sensor_timestamp, sequence_id, exposure, gain)
+        # Frame before index: a torn write can leave a frame without a record, never the reverse
+        self._index_file.write(self._record.tobytes())
+        self.frames += 1
+
+    def flush(self, sync: bool = False):
+        self._frames_file.flush()
+        self._index_file.flush()
+        if sync:
+            os.fdatasync(self._frames_file.fileno())
+            os.fdatasync(self._index_file.fileno())
+
+    def close(self):
+        self._frames_file.close()
+        self._index_file.close()
+
+
+class FrameDump:
+    """Read-only np.memmap view of a dump"""
+
+    def __init__(self, path: str):
+        self.base = dump_base(path)
+        with open(self.base + FRAMES_SUFFIX, "rb") as f:
+            header = f.read(DUMP_HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+        if len(header) < DUMP_HEADER.size:
+            raise ValueError(f"{self.base}{FRAMES_SUFFIX}: truncated header")
+        magic, version, width, height, channels, pixel_format, encoding, frame_bytes, stride, source = \
+            DUMP_HEADER.unpack(header)
+        if magic != DUMP_MAGIC or version != DUMP_VERSION:
+            raise ValueError(f"{self.base}{FRAMES_SUFFIX}: not a version {DUMP_VERSION} frame dump")
+        self.width, self.height, self.channels = width, height, channels
+        self.pixel_format = _text(pixel_format)
+        self.encoding = _text(encoding)
+        self.source_module = _text(source)
+        self.frame_bytes = frame_bytes
+        self.stride = stride
+        self.shape: Tuple[int, ...] = (height, width, channels) if channels > 1 else (height, width)
+
+        index_size = os.path.getsize(self.base + INDEX_SUFFIX) // INDEX_DTYPE.itemsize
+        self.frames = min(index_size, max(0, size - DATA_OFFSET) // stride)
+        # np.memmap cannot map zero bytes
+        if self.frames:
+            self.index = np.memmap(self.base + INDEX_SUFFIX, dtype=INDEX_DTYPE, mode="r", shape=(self.frames,))
+            slabs = np.memmap(self.base + FRAMES_SUFFIX, dtype=np.uint8, mode="r", offset=DATA_OFFSET,
+                              shape=(self.frames, stride))
+            # Strided view that skips each slab's alignment padding
+            self.data = slabs[:, :frame_bytes].reshape((self.frames,) + self.shape)
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+            self.data = np.zeros((0,) + self.shape, dtype=np.uint8)
+        # Frame numbers in timestamp order if timestamps ever decrease, else None;
+        # set on the first search
+        self.time_order: Optional[np.ndarray] = None
+        self._timestamps: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return self.frames
+
+    @property
+    def resolution(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def frame(self, i: int) -> np.ndarray:
+        """Zero-copy, read-only view of frame i"""
+        if not 0 <= i < self.frames:
+            raise IndexError(f"frame {i} out of range for {self.frames} frames")
+        return self.data[i]
+
+    def metadata(self, i: int) -> Dict[str, Any]:
+        """Frame i's ImageMetadata fields, as the camera interface published them"""
+        record = self.index[i]
+        return {
+            "timestamp": int(record["timestamp"]),
+            "sensor_timestamp": int(record["sensor_timestamp"]),
+            "sequence_id": int(record["sequence_id"]),
+            "width": self.width,
+            "height": self.height,
+            "channels": self.channels,
+            "format": self.pixel_format,
+            "encoding": self.encoding,
+            "camera_exposure": float(record["exposure"]),
+            "camera_gain": float(record["gain"]),
+            "source_module": self.source_module,
+        }
+
+    @property
+    def ordered(self) -> bool:
+        """Whether timestamps never decrease"""
+        self._search_timestamps()
+        return self.time_order is None
+
+    def _search_timestamps(self):
+        """Timestamps in ascending order to bisect; the column is read once per dump to check"""
+        if self._timestamps is None:
+            timestamps = self.index["timestamp"]
+            if np.all(timestamps[1:] >= timestamps[:-1]):
+                # np.searchsorted would copy the strided field out of every record;
+                # bisect probes the mapping in place
+                self._timestamps = timestamps
+            else:
+                self.time_order = np.argsort(timestamps, kind="stable")
+                self._timestamps = timestamps[self.time_order]
+        return self._timestamps
+
+    def find(self, start_us: int, end_us: Optional[int] = None) -> Tuple[int, int]:
+        """
+        [first, last) with start_us <= timestamp < end_us, by binary search.
+        These are frame numbers when the dump is ordered; otherwise positions
+        in time_order, whose entries are the frame numbers.
+        """
+        timestamps = self._search_timestamps()
+        first = bisect.bisect_left(timestamps, start_us)
+        last = self.frames if end_us is None else bisect.bisect_left(timestamps, end_us, lo=first)
+        return first, max(first, last)
+
+    def time_range(self, start_us: int, end_us: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (frames, index records) between two timestamps, in timestamp order. For
+        an ordered dump these are memmap views and nothing is read yet; otherwise
+        the frames are gathered into new arrays.
+        """
+        first, last = self.find(start_us, end_us)
+        if self.ordered:
+            return self.data[first:last], self.index[first:last]
+        frames = self.time_order[first:last]
+        return self.data[frames], self.index[frames]
+
+    def advise_sequential(self):
+        """Hint the kernel to read ahead, for straight-through replay"""
+        if hasattr(os, "posix_fadvise"):
+            fd = os.open(self.base + FRAMES_SUFFIX, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            finally:
+                os.close(fd)
+
+    def close(self):
+        # The mappings go when the last view of them does
+        self.index = self.data = None
+
+
+class DumpRecorder:
+    """Writes published frames and their metadata to rolling dumps on a background thread"""
+
+    def __init__(self, path: str, every_n: int = 1, max_frames_per_file: int = 9000,
+                 max_total_bytes: int = 0, queue_size: int = 8, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self.every_n = max(1, int(every_n))
+        self.max_frames_per_file = int(max_frames_per_file)
+        self.max_total_bytes = int(max_total_bytes)
+        self.logger = logger or logging.getLogger(__name__)
+        self.active = False
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread: Optional[threading.Thread] = None
+        self._writer: Optional[FrameDumpWriter] = None
+        self._offered = 0
+
+        # Statistics
+        self.frames = 0
+        self.dropped = 0
+        self.files: List[str] = []
+        self.bytes_closed = 0
+        self.write_ms = 0.0
+
+    @property
+    def bytes_written(self) -> int:
+        return self.bytes_closed + (self._writer.bytes_written if self._writer else 0)
+
+    def start(self):
+        """Begin capturing; frames offered from now on are written"""
+        if self.active:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self.active = True
+        self._thread = threading.Thread(target=self._write_loop, name="frame_dump", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Dumping frames to {self.path}")
+
+    def stop(self):
+        """Stop capturing, write what is queued and close the current dump"""
+        if not self.active:
+            return
+        self.active = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=10.0)
+        self.logger.info(f"Frame dump stopped: {self.frames} frames in {len(self.files)} file(s), "
+                         f"{self.dropped} dropped")
+
+    def offer(self, buffer, metadata: Dict[str, Any]) -> bool:
+        """Queue a published frame without blocking; takes its own reference to the buffer"""
+        if not self.active:
+            return False
+        self._offered += 1
+        if (self._offered - 1) % self.every_n:
+            return False
+        if self.max_total_bytes and self.bytes_written >= self.max_total_bytes:
+            self.dropped += 1
+            return False
+        buffer.retain()
+        try:
+            self._queue.put_nowait((buffer, metadata))
+            return True
+        except queue.Full:
+            buffer.release()
+            self.dropped += 1
+            return False
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            buffer, metadata = item
+            try:
+                start = time.perf_counter()
+                self._write(buffer.array, metadata)
+                self.write_ms = (time.perf_counter() - start) * 1000.0
+                self.frames += 1
+            except (OSError, ValueError) as e:
+                self.dropped += 1
+                self.logger.error(f"Failed to dump frame {metadata['sequence_id']}: {e}")
+            finally:
+                buffer.release()
+        self._close_writer()
+
+    def _write(self, frame: np.ndarray, metadata: Dict[str, Any]):
+        writer = self._writer
+        if writer is None or writer.shape != frame.shape or \
+                (self.max_frames_per_file and writer.frames >= self.max_frames_per_file):
+            self._close_writer()
+            path = os.path.join(self.path, f"dump_{metadata['timestamp']}")
+            writer = self._writer = FrameDumpWriter(path, frame.shape, metadata.get("format", "BGR"),
+                                                    metadata.get("source_module", ""))
+            self.files.append(writer.base + FRAMES_SUFFIX)
+        writer.write(frame, metadata["timestamp"], metadata.get("sensor_timestamp", 0),
+                     metadata["sequence_id"], metadata.get("camera_exposure", 0.0),
+                     metadata.get("camera_gain", 0.0))
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self.bytes_closed += self._writer.bytes_written
+            self._writer.close()
+            self._writer = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "path": self.path,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "files": len(self.files),
+            "current": self.files[-1] if self.files and self._writer else None,
+            "bytes": self.bytes_written,
+            "write_ms": round(self.write_ms, 3),
+        }
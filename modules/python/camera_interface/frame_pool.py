@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Preallocated, reference-counted frame buffer pool
+
+Frames at 1080p are several megabytes each; allocating one per capture and
+another per undistortion churns the allocator and page tables on a Pi. The pool
+hands out fixed slabs which are returned when the last holder releases them, so
+the steady-state capture loop performs no large allocations.
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class FrameBuffer:
+    """A pooled ndarray with a reference count"""
+
+    __slots__ = ("array", "_pool", "_generation", "_refs")
+
+    def __init__(self, array: np.ndarray, pool: Optional["FramePool"], generation: int):
+        self.array = array
+        self._pool = pool
+        self._generation = generation
+        self._refs = 0
+
+    @classmethod
+    def wrap(cls, array: np.ndarray) -> "FrameBuffer":
+        """Wrap an externally allocated array so it can travel through the pipeline"""
+        buffer = cls(array, None, 0)
+        buffer._refs = 1
+        return buffer
+
+    @property
+    def pooled(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Frame shape, without materialising a lazily converted frame"""
+        return self.array.shape
+
+    def retain(self) -> "FrameBuffer":
+        """Add a reference, e.g. when handing the buffer to a second consumer"""
+        if self._pool is not None:
+            with self._pool._lock:
+                self._refs += 1
+        else:
+            self._refs += 1
+        return self
+
+    def release(self):
+        """Drop a reference; the slab returns to the pool when none remain"""
+        if self._pool is None:
+            self._refs -= 1
+            return
+        self._pool._release(self)
+
+
+class FramePool:
+    """Fixed number of equally sized frame slabs with checkout/return semantics"""
+
+    def __init__(self, name: str, shape: Tuple[int, ...], slabs: int, dtype=np.uint8):
+        if slabs < 1:
+            raise ValueError(f"FramePool needs at least one slab, got {slabs}")
+        self.name = name
+        self.slabs = slabs
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._free = []
+        self.shape: Tuple[int, ...] = ()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.in_use = 0
+        self.high_water = 0
+
+        self.resize(shape)
+
+    def resize(self, shape: Tuple[int, ...]):
+        """Reallocate all slabs for a new frame shape; outstanding buffers are discarded on release"""
+        shape = tuple(int(v) for v in shape)
+        with self._lock:
+            if shape == self.shape and len(self._free) + self.in_use >= self.slabs:
+                return
+            self._generation += 1
+            self.shape = shape
+            self._free = [FrameBuffer(np.empty(shape, dtype=self.dtype), self, self._generation)
+                          for _ in range(self.slabs)]
+            self.in_use = 0
+
+    def checkout(self, shape: Optional[Tuple[int, ...]] = None) -> FrameBuffer:
+        """
+        Take a slab from the pool with one reference held. If the pool is empty
+        (or a different shape is requested) a transient buffer is allocated and
+        counted as a miss; it is not kept when released.
+        """
+        if shape is not None and tuple(shape) != self.shape:
+            with self._lock:
+                self.misses += 1
+            return FrameBuffer.wrap(np.empty(shape, dtype=self.dtype))
+
+        with self._lock:
+            if self._free:
+                buffer = self._free.pop()
+                buffer._refs = 1
+                self.hits += 1
+                self.in_use += 1
+                if self.in_use > self.high_water:
+                    self.high_water = self.in_use
+                return buffer
+            self.misses += 1
+
+        return FrameBuffer.wrap(np.empty(self.shape, dtype=self.dtype))
+
+    def _release(self, buffer: FrameBuffer):
+        with self._lock:
+            buffer._refs -= 1
+            if buffer._refs > 0:
+                return
+            if buffer._generation != self._generation:
+                # Buffer predates a resize; let it be garbage collected
+                return
+            self.in_use -= 1
+            self._free.append(buffer)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shape": list(self.shape),
+            "slabs": self.slabs,
+            "free": len(self._free),
+            "in_use": self.in_use,
+            "hits": self.hits,
+            "misses": self.misses,
+            "high_water": self.high_water,
+        }
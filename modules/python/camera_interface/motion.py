@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Motion detection and parking mode for the camera interface
+
+MotionDetector works on a heavily downsampled grayscale copy of each frame
+(160 px wide by default, ~0.6% of the pixels of 1080p): it keeps a running
+average background, and the motion score is the fraction of pixels that
+differ from it by more than a threshold. Everything is a handful of
+vectorised OpenCV calls on a few kB, so a check costs well under a
+millisecond even on a Pi.
+
+ParkingMode decides the capture rate from those scores. While nothing moves
+the camera idles at a low framerate; the first frame with motion switches it
+to the full rate and fires the motion callback (used to save an event clip),
+and it drops back to idle after hold_s without motion. CPU time is accounted
+separately for the idle and active states.
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import cv2
+
+STATE_IDLE = "idle"
+STATE_ACTIVE = "active"
+
+
+class MotionDetector:
+    """Frame differencing against a running background on downsampled grayscale"""
+
+    def __init__(self, width: int = 160, alpha: float = 0.05, pixel_threshold: int = 25,
+                 min_area: float = 0.005, blur: int = 3):
+        self.width = int(width)
+        self.alpha = float(alpha)
+        self.pixel_threshold = int(pixel_threshold)
+        self.min_area = float(min_area)
+        self.blur = int(blur) | 1 if blur else 0
+        self._background: Optional[np.ndarray] = None
+        self._small: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+        self.last_score = 0.0
+
+    def reset(self):
+        """Forget the background, e.g. after a resolution change"""
+        self._background = None
+
+    def _downsample(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        if self._small is None or self._small.shape[1::-1] != size:
+            self._small = np.empty((size[1], size[0]) + frame.shape[2:], dtype=frame.dtype)
+            self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._diff = np.empty_like(self._gray)
+            self._background = None
+        # At this ratio bilinear reads only ~4 source pixels per output pixel;
+        # INTER_AREA would read all of them and cost as much as full-size differencing.
+        # The blur below takes care of the noise area averaging would have removed
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        if self._small.ndim == 3:
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            np.copyto(self._gray, self._small)
+        if self.blur:
+            cv2.GaussianBlur(self._gray, (self.blur, self.blur), 0, dst=self._gray)
+        return self._gray
+
+    def score(self, frame: np.ndarray) -> float:
+        """Fraction of pixels that changed against the background; updates the background"""
+        gray = self._downsample(frame)
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            self.last_score = 0.0
+            return 0.0
+        cv2.absdiff(gray, cv2.convertScaleAbs(self._background), dst=self._diff)
+        changed = cv2.countNonZero(cv2.threshold(self._diff, self.pixel_threshold, 255,
+                                                 cv2.THRESH_BINARY, dst=self._diff)[1])
+        cv2.accumulateWeighted(gray, self._background, self.alpha)
+        self.last_score = changed / self._diff.size
+        return self.last_score
+
+    def detect(self, frame: np.ndarray) -> bool:
+        return self.score(frame) >= self.min_area
+
+
+class ParkingMode:
+    """Idle/active capture rate state machine driven by a MotionDetector"""
+
+    def __init__(self, detector: MotionDetector, idle_fps: float = 2.0, check_fps: float = 5.0,
+                 hold_s: float = 10.0, on_state_change: Optional[Callable[[str], None]] = None,
+                 on_motion: Optional[Callable[[float], None]] = None, clock=time.monotonic,
+                 cpu_clock=time.process_time):
+        self.detector = detector
+        self.idle_fps = float(idle_fps)
+        self.check_interval_s = 1.0 / float(check_fps) if check_fps else 0.0
+        self.hold_s = float(hold_s)
+        self.on_state_change = on_state_change
+        self.on_motion = on_motion
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.enabled = False
+        self.state = STATE_ACTIVE
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._last_motion = 0.0
+
+        # Statistics: wall and CPU seconds per state, closed on every state change
+        self._since = (clock(), cpu_clock())
+        self.time_s = {STATE_IDLE: 0.0, STATE_ACTIVE: 0.0}
+        self.cpu_s = {STATE_IDLE: 0.0, STATE_ACTIVE: 0.0}
+        self.checks = 0
+        self.motion_events = 0
+        self.check_ms = 0.0
+
+    def reset_stats(self):
+        """Restart the per-state accounting, e.g. once capture has started"""
+        with self._lock:
+            self._since = (self.clock(), self.cpu_clock())
+            self.time_s = {STATE_IDLE: 0.0, STATE_ACTIVE: 0.0}
+            self.cpu_s = {STATE_IDLE: 0.0, STATE_ACTIVE: 0.0}
+
+    def framerate(self, full_fps: float) -> float:
+        """Capture rate for the current state"""
+        if self.enabled and self.state == STATE_IDLE:
+            return min(full_fps, self.idle_fps)
+        return full_fps
+
+    def set_enabled(self, enabled: bool):
+        """Enter parking mode idle (waiting for motion) or leave it at full rate"""
+        with self._lock:
+            if enabled == self.enabled:
+                return
+            self.enabled = enabled
+            self.detector.reset()
+            self._set_state(STATE_IDLE if enabled else STATE_ACTIVE)
+
+    def observe(self, frame: np.ndarray) -> Optional[bool]:
+        """
+        Check a frame for motion, at most check_fps times a second. Returns
+        whether it moved, or None when the frame was not checked. Safe to call
+        from several workers; a frame arriving while another is checked is skipped.
+        """
+        if not self.enabled:
+            return None
+        now = self.clock()
+        if now < self._next_check or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            self._next_check = now + self.check_interval_s
+            start = time.perf_counter()
+            moved = self.detector.detect(frame)
+            self.check_ms = (time.perf_counter() - start) * 1000.0
+            self.checks += 1
+            if moved:
+                self._last_motion = now
+                if self.state == STATE_IDLE:
+                    self.motion_events += 1
+                    self._set_state(STATE_ACTIVE)
+                    if self.on_motion:
+                        self.on_motion(self.detector.last_score)
+            elif self.state == STATE_ACTIVE and now - self._last_motion >= self.hold_s:
+                self._set_state(STATE_IDLE)
+            return moved
+        finally:
+            self._lock.release()
+
+    def _set_state(self, state: str):
+        self._account()
+        if state == self.state:
+            return
+        self.state = state
+        if state == STATE_ACTIVE:
+            self._last_motion = self.clock()
+        if self.on_state_change:
+            self.on_state_change(state)
+
+    def _account(self):
+        now, cpu = self.clock(), self.cpu_clock()
+        since, cpu_since = self._since
+        self.time_s[self.state] += now - since
+        self.cpu_s[self.state] += cpu - cpu_since
+        self._since = (now, cpu)
+
+    def _cpu_percent(self, state: str) -> Optional[float]:
+        # One core = 100%, as for the process metrics; too short a stay is noise
+        if self.time_s[state] < 1.0:
+            return None
+        return round(100.0 * self.cpu_s[state] / self.time_s[state], 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._account()
+            return {
+                "enabled": self.enabled,
+                "state": self.state,
+                "motion_score": round(self.detector.last_score, 4),
+                "checks": self.checks,
+                "check_ms": round(self.check_ms, 3),
+                "motion_events": self.motion_events,
+                "idle_s": round(self.time_s[STATE_IDLE], 1),
+                "active_s": round(self.time_s[STATE_ACTIVE], 1),
+                "cpu_percent_idle": self._cpu_percent(STATE_IDLE),
+                "cpu_percent_active": self._cpu_percent(STATE_ACTIVE),
+            }
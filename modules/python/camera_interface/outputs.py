@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Derived output streams for the camera interface
+
+Consumers often want something other than the full frame: a small preview for
+the web UI, a cropped greyscale region for a detector. Each stream is declared
+in config (resolution, crop, colour format, rate divisor) and rendered once per
+frame by OutputStreams, however many subscribers its topic has.
+
+Downscaling shares work through a half-resolution pyramid: level n+1 is level
+n halved with INTER_AREA, which OpenCV runs as a fast 2x2 block average. Each
+stream resizes its crop from the smallest level still at least as large as its
+target, so its own (bilinear) resize is less than 2x and reads few pixels.
+Levels are built lazily, only as deep as the streams due on a frame need; the
+whole pyramid of a frame costs about a third of one full-resolution pass.
+
+Frames captured from camera requests (picamera_backend) bring cheaper
+sources: render(planes=True) takes greyscale streams straight from the Y
+plane, and any stream the ISP's lores stream covers from lores, so neither
+needs the full-resolution BGR frame.
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+
+from frame_pool import FrameBuffer, FramePool
+
+FORMAT_CHANNELS = {"BGR": 3, "RGB": 3, "GRAY": 1}
+_CONVERSIONS = {"RGB": cv2.COLOR_BGR2RGB, "GRAY": cv2.COLOR_BGR2GRAY}
+
+
+@dataclass
+class OutputSpec:
+    """One declared output stream"""
+    name: str
+    topic: str
+    resolution: Optional[Tuple[int, int]] = None  # (width, height); None keeps the crop's size
+    crop: Optional[Tuple[float, float, float, float]] = None  # (x, y, w, h) as fractions of the frame
+    format: str = "BGR"
+    every_n: int = 1
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "OutputSpec":
+        name = config.get("name")
+        if not name:
+            raise ValueError("output stream needs a name")
+        resolution = config.get("resolution")
+        if resolution is not None:
+            resolution = (int(resolution[0]), int(resolution[1]))
+            if min(resolution) < 1:
+                raise ValueError(f"output {name}: bad resolution {resolution}")
+        crop = config.get("crop")
+        if crop is not None:
+            crop = tuple(float(v) for v in crop)
+            x, y, w, h = crop
+            if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > 1.0 + 1e-9 or y + h > 1.0 + 1e-9:
+                raise ValueError(f"output {name}: crop {crop} is not inside the frame")
+        fmt = str(config.get("format", "BGR")).upper()
+        if fmt not in FORMAT_CHANNELS:
+            raise ValueError(f"output {name}: unsupported format {fmt}")
+        return cls(name=name, topic=config.get("topic", f"camera/outputs/{name}"),
+                   resolution=resolution, crop=crop, format=fmt,
+                   every_n=max(1, int(config.get("every_n", 1))))
+
+    @property
+    def passthrough(self) -> bool:
+        """Full frame, native size, camera format: publish the frame itself"""
+        return self.resolution is None and self.crop is None and self.format == "BGR"
+
+
+@dataclass
+class _Plan:
+    """Where a stream reads from for one input shape"""
+    level: int
+    window: Tuple[slice, slice]  # crop in level pixels
+    size: Tuple[int, int]  # (width, height) after resize
+    shape: Tuple[int, ...]  # output array shape
+    covers: bool  # crop is at least as large as size, so nothing is enlarged
+
+
+def _level_shapes(height: int, width: int) -> List[Tuple[int, int]]:
+    shapes = [(height, width)]
+    while min(shapes[-1]) >= 2:
+        h, w = shapes[-1]
+        shapes.append((h // 2, w // 2))
+    return shapes
+
+
+def plan_output(spec: OutputSpec, frame_shape: Tuple[int, ...],
+                size: Optional[Tuple[int, int]] = None) -> _Plan:
+    """
+    Pick the pyramid level and crop window for spec on frames of frame_shape.
+    size overrides the output size, e.g. to render a main-stream plan from lores.
+    """
+    height, width = frame_shape[:2]
+    x, y, w, h = spec.crop or (0.0, 0.0, 1.0, 1.0)
+    x0, x1 = round(x * width), max(round(x * width) + 1, min(width, round((x + w) * width)))
+    y0, y1 = round(y * height), max(round(y * height) + 1, min(height, round((y + h) * height)))
+    size = size or spec.resolution or (x1 - x0, y1 - y0)
+
+    # Deepest level whose crop still covers the target, so the final resize never enlarges
+    shapes = _level_shapes(height, width)
+    level = 0
+    while level + 1 < len(shapes):
+        lh, lw = shapes[level + 1]
+        if (x1 - x0) * lw / width < size[0] or (y1 - y0) * lh / height < size[1]:
+            break
+        level += 1
+    lh, lw = shapes[level]
+    sx, sy = lw / width, lh / height
+    lx0, ly0 = min(lw - 1, round(x0 * sx)), min(lh - 1, round(y0 * sy))
+    window = (slice(ly0, max(ly0 + 1, round(y1 * sy))), slice(lx0, max(lx0 + 1, round(x1 * sx))))
+    channels = FORMAT_CHANNELS[spec.format]
+    shape = (size[1], size[0]) if channels == 1 else (size[1], size[0], channels)
+    return _Plan(level=level, window=window, size=size, shape=shape,
+                 covers=x1 - x0 >= size[0] and y1 - y0 >= size[1])
+
+
+class OutputStreams:
+    """Renders every due output stream of a frame from one shared pyramid"""
+
+    def __init__(self, specs: Sequence[OutputSpec], slabs: int = 8):
+        self.specs = list(specs)
+        self.slabs = max(1, int(slabs))
+        self._pools: Dict[str, FramePool] = {}
+        self._plans: Dict[Tuple[int, ...], List[_Plan]] = {}
+        self._lores_plans: Dict[Tuple[int, Tuple[int, ...]], _Plan] = {}
+        self._lock = threading.Lock()
+        # Pyramid levels and colour scratch are per worker, rebuilt every frame
+        self._scratch = threading.local()
+
+        # Statistics
+        self.frames = 0
+        self.render_ms = 0.0
+        self.levels_built = 0.0
+        self.rendered = {spec.name: 0 for spec in self.specs}
+        self.sources = {spec.name: None for spec in self.specs}
+
+    def _plans_for(self, frame_shape: Tuple[int, ...]) -> List[_Plan]:
+        plans = self._plans.get(frame_shape)
+        if plans is not None:
+            return plans
+        with self._lock:
+            plans = [plan_output(spec, frame_shape) for spec in self.specs]
+            for spec, plan in zip(self.specs, plans):
+                if spec.passthrough:
+                    continue
+                pool = self._pools.get(spec.name)
+                if pool is None:
+                    self._pools[spec.name] = FramePool(f"output:{spec.name}", plan.shape, self.slabs)
+                else:
+                    pool.resize(plan.shape)
+            # Resolution switches are rare; only the current shape is worth keeping
+            self._plans = {frame_shape: plans}
+            self._lores_plans = {}
+        return plans
+
+    def _lores_plan(self, index: int, lores_shape: Tuple[int, ...], main_plan: _Plan) -> _Plan:
+        key = (index, lores_shape[:2])
+        plan = self._lores_plans.get(key)
+        if plan is None:
+            plan = self._lores_plans[key] = plan_output(self.specs[index], lores_shape, main_plan.size)
+        return plan
+
+    def _source(self, buffer: FrameBuffer, index: int, main_plan: _Plan, planes: bool):
+        """(name, image, plan) to render a stream from: lores or luma when they suffice"""
+        spec = self.specs[index]
+        if planes:
+            lores_y = getattr(buffer, "lores_y", None)
+            if lores_y is not None:
+                plan = self._lores_plan(index, lores_y.shape, main_plan)
+                if plan.covers:
+                    if spec.format == "GRAY":
+                        return "lores_y", lores_y, plan
+                    return "lores", buffer.lores_bgr(), plan
+            if spec.format == "GRAY" and getattr(buffer, "y", None) is not None:
+                return "y", buffer.y, main_plan
+        return "main", buffer.array, main_plan
+
+    def _level(self, levels: List[np.ndarray], source: str, frame: np.ndarray, level: int) -> np.ndarray:
+        """Pyramid level of frame, halving from the deepest level already built"""
+        while len(levels) < level:
+            previous = frame if len(levels) == 0 else levels[-1]
+            scratch = self._scratch.levels.setdefault(source, [])
+            h, w = previous.shape[0] // 2, previous.shape[1] // 2
+            index = len(levels)
+            if index >= len(scratch) or scratch[index].shape[:2] != (h, w):
+                del scratch[index:]
+                scratch.append(np.empty((h, w) + frame.shape[2:], dtype=frame.dtype))
+            cv2.resize(previous, (w, h), dst=scratch[index], interpolation=cv2.INTER_AREA)
+            levels.append(scratch[index])
+        return frame if level == 0 else levels[level - 1]
+
+    def _convert_scratch(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        scratch = self._scratch.convert
+        array = scratch.get(name)
+        if array is None or array.shape != shape:
+            array = scratch[name] = np.empty(shape, dtype=np.uint8)
+        return array
+
+    def render(self, buffer: FrameBuffer, sequence_id: int,
+               planes: bool = False) -> List[Tuple[OutputSpec, FrameBuffer]]:
+        """
+        Render the streams due on this frame. Returns (spec, buffer) pairs, each
+        holding one reference the caller must release. With planes the buffer's
+        luma and lores views may be used instead of its BGR array; only valid
+        when no correction (undistortion, flips) was applied to the BGR frame.
+        """
+        due = [i for i, spec in enumerate(self.specs) if sequence_id % spec.every_n == 0]
+        if not due:
+            return []
+        start = time.perf_counter()
+        plans = self._plans_for(tuple(buffer.shape))
+        if not hasattr(self._scratch, "levels"):
+            self._scratch.levels = {}
+            self._scratch.convert = {}
+        levels: Dict[str, List[np.ndarray]] = {}
+        outputs = []
+        try:
+            for i in due:
+                spec = self.specs[i]
+                self.rendered[spec.name] += 1
+                if spec.passthrough:
+                    buffer.array  # a lazily captured frame is converted here, on the worker
+                    self.sources[spec.name] = "main"
+                    outputs.append((spec, buffer.retain()))
+                    continue
+                name, frame, plan = self._source(buffer, i, plans[i], planes)
+                self.sources[spec.name] = name
+                source = self._level(levels.setdefault(name, []), name, frame, plan.level)[plan.window]
+                output = self._pools[spec.name].checkout(plans[i].shape)
+                outputs.append((spec, output))
+                conversion = _CONVERSIONS.get(spec.format) if frame.ndim == 3 else None
+                # Resize first: the colour conversion then runs on the small image
+                resized = output.array if conversion is None else \
+                    self._convert_scratch(spec.name, (plan.shape[0], plan.shape[1]) + frame.shape[2:])
+                if source.shape[:2] == plan.shape[:2]:
+                    np.copyto(resized, source)
+                else:
+                    # Under 2x from an already averaged level: bilinear reads ~4 pixels
+                    # per output where INTER_AREA would cost as much as the level itself
+                    cv2.resize(source, plan.size, dst=resized, interpolation=cv2.INTER_LINEAR)
+                if conversion is not None:
+                    cv2.cvtColor(resized, conversion, dst=output.array)
+        except Exception:
+            for _, output in outputs:
+                output.release()
+            raise
+
+        self.frames += 1
+        alpha = 1.0 if self.frames == 1 else 0.1
+        self.render_ms += alpha * ((time.perf_counter() - start) * 1000.0 - self.render_ms)
+        self.levels_built += alpha * (sum(len(built) for built in levels.values()) - self.levels_built)
+        return outputs
+
+    def stats(self) -> Dict[str, Any]:
+        plans = next(iter(self._plans.values()), None)
+        streams = {}
+        for i, spec in enumerate(self.specs):
+            plan = plans[i] if plans else None
+            streams[spec.name] = {
+                "topic": spec.topic,
+                "format": spec.format,
+                "every_n": spec.every_n,
+                "size": list(plan.size) if plan else None,
+                "level": plan.level if plan else None,
+                "source": self.sources[spec.name],
+                "rendered": self.rendered[spec.name],
+                "pool": self._pools[spec.name].stats() if spec.name in self._pools else None,
+            }
+        return {
+            "frames": self.frames,
+            "render_ms": round(self.render_ms, 3),
+            "levels_built": round(self.levels_built, 2),
+            "streams": streams,
+        }
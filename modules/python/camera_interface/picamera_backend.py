@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Picamera2 backend with dual ISP streams and lazy colour conversion
+
+The ISP can produce a second, downscaled "lores" stream next to "main" at no
+CPU cost, and can output YUV420 instead of RGB. PicameraBackend configures
+both and hands out each completed request as a RequestFrameBuffer that maps
+the request's buffers in place (Picamera2's MappedArray) instead of copying
+them as capture_array() does:
+
+- the Y planes of main and lores are zero-copy greyscale views, which is all
+  motion detection and greyscale outputs need;
+- BGR is produced on the first access to .array, by one I420 -> BGR
+  conversion into a pooled slab; with an RGB888 main stream .array is the
+  mapped buffer itself;
+- the request goes back to the camera when the last reference is released.
+
+libcamera owns only buffer_count buffers per stream and stops delivering
+frames while all of them are held, so once hold_limit requests are
+outstanding a new frame's planes are copied out and its request is returned
+straight away ("detached"); those copies are the only ones the backend makes.
+FakePicamera2 (fake_picamera.py) implements the
+part of the Picamera2 API used here, for development without a camera.
+"""
+
+import time
+import threading
+from contextlib import ExitStack
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from camera_backend import BackendCapabilities, CameraBackend
+from frame_pool import FrameBuffer, FramePool
+
+try:
+    from picamera2 import MappedArray
+    from libcamera import Transform
+except ImportError:
+    MappedArray = None
+    Transform = None
+
+FORMAT_RGB888 = "RGB888"  # BGR byte order in memory, as OpenCV expects
+FORMAT_YUV420 = "YUV420"  # I420: Y plane then quarter-size U and V planes
+
+
+def _flat(array: np.ndarray) -> np.ndarray:
+    """1-D view of the whole mapped buffer behind a (possibly sliced) mapped array"""
+    while not array.flags.c_contiguous and isinstance(array.base, np.ndarray):
+        array = array.base
+    return array.reshape(-1)
+
+
+def plane_views(mapped: np.ndarray, fmt: str, size: Tuple[int, int], stride: int) -> Dict[str, np.ndarray]:
+    """
+    Zero-copy views of a stream buffer laid out with the given row stride:
+    "bgr" for RGB888, "y"/"u"/"v" for YUV420, plus "i420" when the planes are
+    unpadded and can be converted in one call.
+    """
+    width, height = size
+    flat = _flat(mapped)
+    if fmt == FORMAT_RGB888:
+        rows = flat[:stride * height].reshape(height, stride)
+        return {"bgr": rows[:, :width * 3].reshape(height, width, 3)}
+    luma = stride * height
+    chroma = (stride // 2) * (height // 2)
+    views = {
+        "y": flat[:luma].reshape(height, stride)[:, :width],
+        "u": flat[luma:luma + chroma].reshape(height // 2, stride // 2)[:, :width // 2],
+        "v": flat[luma + chroma:luma + 2 * chroma].reshape(height // 2, stride // 2)[:, :width // 2],
+    }
+    if stride == width:
+        views["i420"] = flat[:luma + 2 * chroma].reshape(height * 3 // 2, width)
+    return views
+
+
+def pack_i420(planes: Dict[str, np.ndarray], dst: np.ndarray) -> np.ndarray:
+    """Copy Y/U/V planes into a contiguous (h * 3 / 2, w) I420 array"""
+    height, width = planes["y"].shape
+    flat = dst.reshape(-1)
+    quarter = (height // 2) * (width // 2)
+    np.copyto(dst[:height], planes["y"])
+    np.copyto(flat[height * width:height * width + quarter].reshape(height // 2, width // 2), planes["u"])
+    np.copyto(flat[height * width + quarter:height * width + 2 * quarter].reshape(height // 2, width // 2),
+              planes["v"])
+    return dst
+
+
+class RequestFrameBuffer(FrameBuffer):
+    """A completed camera request as a pipeline frame; BGR is converted on first use"""
+
+    __slots__ = ("_backend", "_stack", "_request", "_main", "_lores", "_size", "_lores_size",
+                 "_bgr", "_lores_bgr", "_slabs", "_lock", "detached")
+
+    lazy = True
+
+    def __init__(self, backend: "PicameraBackend", stack: Optional[ExitStack], request,
+                 main: Dict[str, np.ndarray], size: Tuple[int, int],
+                 lores: Optional[Dict[str, np.ndarray]], lores_size: Optional[Tuple[int, int]], slabs):
+        # FrameBuffer.array is a property here, so the base initialiser is not used
+        self._pool = None
+        self._generation = 0
+        self._refs = 1
+        self._backend = backend
+        self._stack = stack
+        self._request = request
+        self._main = main
+        self._size = size
+        self._lores = lores
+        self._lores_size = lores_size
+        self._bgr: Optional[np.ndarray] = main.get("bgr")
+        self._lores_bgr: Optional[np.ndarray] = None
+        self._slabs = slabs
+        self._lock = threading.Lock()
+        self.detached = request is None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return (self._size[1], self._size[0], 3)
+
+    @property
+    def converted(self) -> bool:
+        """Whether the full-resolution BGR frame exists yet"""
+        return self._bgr is not None
+
+    @property
+    def array(self) -> np.ndarray:
+        if self._bgr is None:
+            with self._lock:
+                if self._bgr is None:
+                    self._bgr = self._backend._to_bgr(self._main, self._slabs, "main")
+        return self._bgr
+
+    @property
+    def y(self) -> Optional[np.ndarray]:
+        """Full-resolution luma, a view of the camera buffer (None for an RGB888 main stream)"""
+        return self._main.get("y")
+
+    @property
+    def lores_y(self) -> Optional[np.ndarray]:
+        return self._lores["y"] if self._lores is not None else None
+
+    @property
+    def luma(self) -> Optional[np.ndarray]:
+        """Smallest greyscale view available without any conversion"""
+        lores = self.lores_y
+        return lores if lores is not None else self.y
+
+    def lores_bgr(self) -> Optional[np.ndarray]:
+        """The ISP-downscaled frame as BGR, converted once on first use"""
+        if self._lores is None:
+            return None
+        if self._lores_bgr is None:
+            with self._lock:
+                if self._lores_bgr is None:
+                    self._lores_bgr = self._backend._to_bgr(self._lores, self._slabs, "lores")
+        return self._lores_bgr
+
+    def retain(self) -> "RequestFrameBuffer":
+        with self._lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self._backend._finish(self)
+
+
+class PicameraBackend(CameraBackend):
+    """Picamera2 wrapper: main (+ lores) stream configuration and in-place request capture"""
+
+    name = "picamera2"
+
+    def __init__(self, camera, config: Optional[Dict[str, Any]] = None, mapped_array=None):
+        config = config or {}
+        self.camera = camera
+        self.format = str(config.get("format", FORMAT_RGB888)).upper()
+        if self.format not in (FORMAT_RGB888, FORMAT_YUV420):
+            raise ValueError(f"Unsupported main stream format {self.format}")
+        lores = config.get("lores_resolution")
+        self.lores_resolution: Optional[Tuple[int, int]] = tuple(int(v) for v in lores) if lores else None
+        self.buffer_count = max(2, int(config.get("buffer_count", 6)))
+        self.hold_limit = max(0, int(config.get("hold_limit", self.buffer_count - 2)))
+        self.mapped_array = mapped_array or MappedArray
+        if self.mapped_array is None:
+            raise RuntimeError("picamera2.MappedArray is not available")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._held = 0
+        self._detach_pools: Dict[str, FramePool] = {}
+        self._timestamps: Optional[Tuple[int, int]] = None
+
+        # Statistics
+        self.frames = 0
+        self.detached = 0
+        self.held_high_water = 0
+        self.conversions = {"main": 0, "lores": 0}
+        self.convert_ms = {"main": 0.0, "lores": 0.0}
+
+    def __getattr__(self, name):
+        # Everything not wrapped here (camera_config, started, set_controls, ...) is Picamera2's
+        camera = self.__dict__.get("camera")
+        if camera is None:
+            raise AttributeError(name)
+        return getattr(camera, name)
+
+    def lores_size(self, resolution: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Lores stream size for a main resolution: no larger than main, even dimensions"""
+        if not self.lores_resolution:
+            return None
+        width = min(self.lores_resolution[0], resolution[0]) // 2 * 2
+        height = min(self.lores_resolution[1], resolution[1]) // 2 * 2
+        return (max(2, width), max(2, height))
+
+    def create_configuration(self, resolution: Tuple[int, int], rotation: int = 0):
+        """Picamera2 configuration with the main stream and, if configured, a YUV420 lores stream"""
+        rotate = rotation == 180
+        transform = Transform(hflip=rotate, vflip=rotate) if Transform is not None \
+            else {"hflip": rotate, "vflip": rotate}
+        streams = {"main": {"size": tuple(resolution), "format": self.format}}
+        lores = self.lores_size(resolution)
+        if lores is not None:
+            # The ISP's second output only supports YUV420
+            streams["lores"] = {"size": lores, "format": FORMAT_YUV420}
+        return self.camera.create_preview_configuration(buffer_count=self.buffer_count,
+                                                        transform=transform, **streams)
+
+    @property
+    def capabilities(self) -> BackendCapabilities:
+        # The shortest frame duration libcamera allows in the current configuration
+        limits = (getattr(self.camera, "camera_controls", None) or {}).get("FrameDurationLimits")
+        formats = (self.format,) + ((FORMAT_YUV420,) if self.lores_resolution and self.format != FORMAT_YUV420 else ())
+        return BackendCapabilities(formats=formats, max_fps=1e6 / limits[0] if limits and limits[0] else None,
+                                   hardware_timestamps=True, zero_copy=True)
+
+    def describe(self) -> str:
+        lores = self.camera.camera_config.get("lores") if self.camera.camera_config else None
+        return f"main {self.format}" + (f", lores {lores['size'][0]}x{lores['size'][1]} YUV420" if lores else "")
+
+    def frame_timestamps(self) -> Optional[Tuple[int, int]]:
+        """(wall_us, sensor_ns) of the last captured frame; sensor_ns is libcamera's SensorTimestamp"""
+        return self._timestamps
+
+    def _geometry(self, stream: str) -> Optional[Tuple[str, Tuple[int, int], int]]:
+        config = self.camera.camera_config.get(stream)
+        if not config:
+            return None
+        size = tuple(config["size"])
+        stride = config.get("stride") or (size[0] * 3 if config["format"] == FORMAT_RGB888 else size[0])
+        return config["format"], size, stride
+
+    def request(self, pool: FramePool) -> RequestFrameBuffer:
+        """Wait for the next completed request and wrap it, mapped in place, as a frame"""
+        request = self.camera.capture_request()
+        wall_us = time.time_ns() // 1000
+        stack = ExitStack()
+        try:
+            metadata = request.get_metadata()
+            self._timestamps = (wall_us, int(metadata.get("SensorTimestamp", time.monotonic_ns())))
+            main_format, size, stride = self._geometry("main")
+            main = plane_views(stack.enter_context(self.mapped_array(request, "main")).array,
+                               main_format, size, stride)
+            lores, lores_size = None, None
+            lores_geometry = self._geometry("lores")
+            if lores_geometry is not None:
+                lores_format, lores_size, lores_stride = lores_geometry
+                lores = plane_views(stack.enter_context(self.mapped_array(request, "lores")).array,
+                                    lores_format, lores_size, lores_stride)
+            slabs = {"pool": pool}
+
+            with self._lock:
+                self.frames += 1
+                detach = self._held >= self.hold_limit
+                if not detach:
+                    self._held += 1
+                    self.held_high_water = max(self.held_high_water, self._held)
+                else:
+                    self.detached += 1
+            if not detach:
+                self._count(0)
+                return RequestFrameBuffer(self, stack, request, main, size, lores, lores_size, slabs)
+
+            # Too many requests held downstream: copy the planes out and hand the request back
+            main = self._detach(main, size, pool, slabs, "main")
+            if lores is not None:
+                lores = self._detach(lores, lores_size, None, slabs, "lores")
+            self._count(1 if lores is None else 2)
+        except BaseException:
+            stack.close()
+            request.release()
+            raise
+        stack.close()
+        request.release()
+        return RequestFrameBuffer(self, None, None, main, size, lores, lores_size, slabs)
+
+    def _detach(self, planes, size, pool, slabs, name) -> Dict[str, np.ndarray]:
+        width, height = size
+        if "bgr" in planes:
+            buffer = pool.checkout((height, width, 3))
+            np.copyto(buffer.array, planes["bgr"])
+            slabs[name + "_detached"] = buffer
+            return {"bgr": buffer.array}
+        shape = (height * 3 // 2, width)
+        detach_pool = self._detach_pools.get(name)
+        if detach_pool is None or detach_pool.shape != shape:
+            detach_pool = self._detach_pools[name] = FramePool(f"detached:{name}", shape, self.buffer_count)
+        buffer = detach_pool.checkout(shape)
+        pack_i420(planes, buffer.array)
+        slabs[name + "_detached"] = buffer
+        return plane_views(buffer.array, FORMAT_YUV420, size, width)
+
+    def _to_bgr(self, planes: Dict[str, np.ndarray], slabs, name: str) -> np.ndarray:
+        start = time.perf_counter()
+        height, width = planes["y"].shape
+        if name == "main":
+            buffer = slabs["pool"].checkout((height, width, 3))
+        else:
+            buffer = FrameBuffer.wrap(np.empty((height, width, 3), dtype=np.uint8))
+        slabs[name + "_bgr"] = buffer
+        i420 = planes.get("i420")
+        if i420 is None:
+            # Padded rows: pack the planes first so OpenCV converts in one pass
+            scratch = getattr(self._local, name, None)
+            if scratch is None or scratch.shape != (height * 3 // 2, width):
+                scratch = np.empty((height * 3 // 2, width), dtype=np.uint8)
+                setattr(self._local, name, scratch)
+            i420 = pack_i420(planes, scratch)
+        cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420, dst=buffer.array)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self.conversions[name] += 1
+            alpha = 1.0 if self.conversions[name] == 1 else 0.1
+            self.convert_ms[name] += alpha * (elapsed_ms - self.convert_ms[name])
+        return buffer.array
+
+    def _finish(self, frame: RequestFrameBuffer):
+        """Last reference dropped: unmap and return the request, release the slabs"""
+        if frame._request is not None:
+            frame._stack.close()
+            frame._request.release()
+            frame._request = None
+            with self._lock:
+                self._held -= 1
+        for key, buffer in list(frame._slabs.items()):
+            if key != "pool":
+                buffer.release()
+        frame._slabs = {}
+
+    def stats(self) -> Dict[str, Any]:
+        lores = self._geometry("lores") if self.camera.camera_config else None
+        return {
+            "format": self.format,
+            "lores": list(lores[1]) if lores else None,
+            "buffer_count": self.buffer_count,
+            "frames": self.frames,
+            "held": self._held,
+            "held_high_water": self.held_high_water,
+            "detached": self.detached,
+            "bgr_conversions": dict(self.conversions),
+            "convert_ms": {name: round(value, 3) for name, value in self.convert_ms.items()},
+            **self.backend_stats(),
+        }
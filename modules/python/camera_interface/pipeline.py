@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Bounded ring buffers connecting the camera interface pipeline stages
+
+The capture thread, processing workers and publisher each run independently and
+hand frames to one another through a RingBuffer. When a buffer is full it either
+drops the oldest queued item, drops the incoming item, or blocks the producer,
+so a slow consumer can never stall the camera unless explicitly configured to.
+
+Parallel workers finish frames out of order; ReorderBuffer puts them back in
+sequence order before the publisher, waiting a bounded time for stragglers.
+"""
+
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class RingBuffer:
+    """Fixed-capacity, preallocated FIFO with a configurable overflow policy"""
+
+    def __init__(self, name: str, capacity: int, drop_policy: str = DROP_OLDEST):
+        if capacity < 1:
+            raise ValueError(f"RingBuffer capacity must be >= 1, got {capacity}")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected one of {DROP_POLICIES}")
+        self.name = name
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+        self._slots = [None] * capacity
+        self._head = 0  # next slot to read
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        # Counters
+        self.pushed = 0
+        self.popped = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Queue an item. Returns the item that was dropped to make room (which
+        may be the item passed in for drop_newest), or None if nothing was dropped.
+        With the block policy a full buffer waits up to timeout and then drops
+        the incoming item.
+        """
+        with self._lock:
+            if self._closed:
+                return item
+
+            dropped = None
+            if self._size == self.capacity:
+                if self.drop_policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return item
+                if self.drop_policy == BLOCK:
+                    self._not_full.wait_for(
+                        lambda: self._size < self.capacity or self._closed, timeout)
+                    if self._closed or self._size == self.capacity:
+                        self.dropped += 1
+                        return item
+                else:
+                    dropped = self._slots[self._head]
+                    self._slots[self._head] = None
+                    self._head = (self._head + 1) % self.capacity
+                    self._size -= 1
+                    self.dropped += 1
+
+            self._slots[(self._head + self._size) % self.capacity] = item
+            self._size += 1
+            self.pushed += 1
+            if self._size > self.high_water:
+                self.high_water = self._size
+            self._not_empty.notify()
+            return dropped
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Pop the oldest item, waiting up to timeout. Returns None on timeout or close"""
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._size > 0 or self._closed, timeout):
+                return None
+            if self._size == 0:
+                return None
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            self.popped += 1
+            self._not_full.notify()
+            return item
+
+    def drain(self) -> list:
+        """Remove and return everything currently queued"""
+        with self._lock:
+            items = []
+            while self._size:
+                items.append(self._slots[self._head])
+                self._slots[self._head] = None
+                self._head = (self._head + 1) % self.capacity
+                self._size -= 1
+            self._not_full.notify_all()
+            return items
+
+    def close(self):
+        """Wake all waiters; further puts are rejected"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def reopen(self):
+        with self._lock:
+            self._closed = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._size,
+            "capacity": self.capacity,
+            "pushed": self.pushed,
+            "dropped": self.dropped,
+            "high_water": self.high_water,
+            "drop_policy": self.drop_policy,
+        }
+
+
+class ReorderBuffer:
+    """
+    Releases items in sequence-number order. An item waits for every earlier
+    sequence number, but at most window items are held and none for longer
+    than max_wait_s; sequence numbers still missing then are skipped.
+    Producers that drop an item can say so with abandon() (thread-safe), so
+    its number is skipped without waiting. An item whose number was already
+    skipped is rejected rather than released out of order. Everything else
+    is for a single consumer thread.
+    """
+
+    def __init__(self, window: int, max_wait_s: float, clock=time.monotonic):
+        if window < 1:
+            raise ValueError(f"ReorderBuffer window must be >= 1, got {window}")
+        self.window = window
+        self.max_wait_s = max_wait_s
+        self.clock = clock
+        self._pending: Dict[int, Tuple[Any, float]] = {}
+        self._next: Optional[int] = None
+        self._abandoned = set()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.reordered = 0  # items that arrived ahead of an earlier number
+        self.skipped = 0  # sequence numbers given up on
+        self.late = 0  # items rejected because their number was skipped
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def reset(self, next_sequence: Optional[int] = None):
+        """Expect next_sequence next (None: whatever arrives first); pending items must be drained first"""
+        self._pending = {}
+        self._next = next_sequence
+        with self._lock:
+            self._abandoned = set()
+
+    def abandon(self, sequence: int):
+        """An item that will never arrive (dropped or failed upstream): do not wait for it"""
+        with self._lock:
+            self._abandoned.add(sequence)
+
+    def push(self, sequence: int, item: Any) -> Tuple[List[Any], Optional[Any]]:
+        """Add an item. Returns (items now releasable in order, the item if it was rejected as late)"""
+        if self._next is None:
+            self._next = sequence
+        if sequence < self._next or sequence in self._pending:
+            self.late += 1
+            return [], item
+        if sequence != self._next:
+            self.reordered += 1
+        self._pending[sequence] = (item, self.clock())
+        self.high_water = max(self.high_water, len(self._pending))
+        return self._release(), None
+
+    def expire(self) -> List[Any]:
+        """Items releasable now that stragglers have been waited for long enough"""
+        return self._release()
+
+    def wait_s(self, default: float) -> float:
+        """How long the consumer may block before expire() has something to release"""
+        if not self._pending:
+            return default
+        oldest = min(arrived for _, arrived in self._pending.values())
+        return max(0.0, min(default, oldest + self.max_wait_s - self.clock()))
+
+    def drain(self) -> List[Any]:
+        """Remove and return everything held, in order"""
+        items = [self._pending[sequence][0] for sequence in sorted(self._pending)]
+        self._pending = {}
+        return items
+
+    def _release(self) -> List[Any]:
+        ready = []
+        while self._pending:
+            if self._next in self._pending:
+                ready.append(self._pending.pop(self._next)[0])
+                self._next += 1
+                continue
+            with self._lock:
+                if self._next in self._abandoned:
+                    self._abandoned.discard(self._next)
+                    self._next += 1
+                    continue
+            oldest = min(arrived for _, arrived in self._pending.values())
+            if len(self._pending) <= self.window and self.clock() - oldest < self.max_wait_s:
+                break
+            # Give up on the gap before the lowest held number
+            lowest = min(self._pending)
+            self.skipped += lowest - self._next
+            self._next = lowest
+            with self._lock:
+                self._abandoned = {sequence for sequence in self._abandoned if sequence > lowest}
+        return ready
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._pending),
+            "window": self.window,
+            "reordered": self.reordered,
+            "skipped": self.skipped,
+            "late": self.late,
+            "high_water": self.high_water,
+        }
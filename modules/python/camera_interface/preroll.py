@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Event pre-roll buffer for the camera interface
+
+Keeps the last N seconds of compressed frames in RAM, bounded both by age and
+by total bytes. When an event is triggered the buffered frames, followed by the
+next post_seconds of frames, are written to a protected clip in the recorder's
+segment format. Clips live outside the loop-recording directory so the
+recorder's oldest-first cleanup never deletes them. Live frames reach a clip's
+writer through a bounded queue; if the disk falls behind, frames are dropped
+and counted rather than held in memory.
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "recorder"))
+
+from segment_store import SegmentWriter, SEGMENT_SUFFIX
+
+
+class EventClip:
+    """One triggered clip being written on its own thread"""
+
+    def __init__(self, path: str, end_us: int, frames: List[Tuple[int, int, bytes]],
+                 logger: logging.Logger, queue_size: int = 120):
+        self.path = path
+        self.end_us = end_us
+        self.logger = logger
+        self.done = False
+        self.dropped = 0
+        # The pre-roll is already bounded by the buffer; only live frames are queued
+        self._preroll = frames
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def add(self, timestamp_us: int, sequence_id: int, data: bytes) -> bool:
+        """Queue a live frame; returns False once the clip has covered its window"""
+        if timestamp_us > self.end_us:
+            self.finish()
+            return False
+        try:
+            self._queue.put_nowait((timestamp_us, sequence_id, data))
+        except queue.Full:
+            self.dropped += 1
+        return True
+
+    def finish(self):
+        if not self.done:
+            self.done = True
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                # The writer checks done once it has drained the queue
+                pass
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def _write_loop(self):
+        partial = self.path + ".partial"
+        writer = SegmentWriter(partial, preallocate_bytes=0, buffer_bytes=1 << 20)
+        try:
+            preroll, self._preroll = self._preroll, []
+            for frame in preroll:
+                writer.write_frame(*frame)
+            del preroll
+            while True:
+                try:
+                    item = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    if self.done:
+                        break
+                    continue
+                if item is None:
+                    break
+                writer.write_frame(*item)
+        finally:
+            writer.close(sync=True)
+            # The clip only appears under its final name once it is complete
+            os.rename(partial, self.path)
+            self.logger.info(f"Event clip written: {self.path} ({writer.frames} frames, "
+                             f"{self.dropped} dropped)")
+
+
+class PrerollBuffer:
+    """Bounded ring of recent compressed frames with event triggering"""
+
+    def __init__(self, seconds: float, max_bytes: int, clip_path: str,
+                 post_seconds: float = 10.0, clip_queue_frames: int = 120,
+                 logger: Optional[logging.Logger] = None):
+        self.window_us = int(seconds * 1_000_000)
+        self.max_bytes = max_bytes
+        self.clip_path = clip_path
+        self.post_seconds = post_seconds
+        self.clip_queue_frames = clip_queue_frames
+        self.logger = logger or logging.getLogger("camera_interface")
+        self._frames: Deque[Tuple[int, int, bytes]] = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._clips: List[EventClip] = []
+        self.clips_triggered = 0
+        self.evicted = 0
+        self.clip_dropped = 0
+
+    def add(self, timestamp_us: int, sequence_id: int, data: bytes):
+        """Add a compressed frame, evicting anything older than the window or over budget"""
+        with self._lock:
+            self._frames.append((timestamp_us, sequence_id, data))
+            self._bytes += len(data)
+            cutoff = timestamp_us - self.window_us
+            while self._frames and (self._frames[0][0] < cutoff or self._bytes > self.max_bytes):
+                self._bytes -= len(self._frames.popleft()[2])
+                self.evicted += 1
+            if self._clips:
+                active = []
+                for clip in self._clips:
+                    if clip.add(timestamp_us, sequence_id, data):
+                        active.append(clip)
+                    else:
+                        self.clip_dropped += clip.dropped
+                self._clips = active
+
+    def trigger(self, post_seconds: Optional[float] = None, reason: str = "") -> str:
+        """Start a protected clip of the pre-roll plus the next post_seconds; returns its path"""
+        if post_seconds is None:
+            post_seconds = self.post_seconds
+        now_us = time.time_ns() // 1000
+        os.makedirs(self.clip_path, exist_ok=True)
+        path = os.path.join(self.clip_path, f"event_{now_us}{SEGMENT_SUFFIX}")
+        with self._lock:
+            preroll = list(self._frames)
+            # Frame timestamps come from the sensor clock, so the post-roll window
+            # is measured from the newest buffered frame rather than wall time
+            last_us = preroll[-1][0] if preroll else now_us
+            self._clips.append(EventClip(path, last_us + int(post_seconds * 1_000_000),
+                                         preroll, self.logger, self.clip_queue_frames))
+            self.clips_triggered += 1
+        self.logger.info(f"Event triggered{f' ({reason})' if reason else ''}: "
+                         f"{len(preroll)} pre-roll frames, {post_seconds}s post-roll")
+        return path
+
+    def close(self):
+        """Finish any clips still recording"""
+        with self._lock:
+            clips, self._clips = self._clips, []
+        for clip in clips:
+            clip.finish()
+            clip.join(timeout=5.0)
+            self.clip_dropped += clip.dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            covered = (self._frames[-1][0] - self._frames[0][0]) / 1e6 if self._frames else 0.0
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "seconds": round(covered, 2),
+                "evicted": self.evicted,
+                "active_clips": len(self._clips),
+                "clips_triggered": self.clips_triggered,
+                "clip_dropped": self.clip_dropped + sum(clip.dropped for clip in self._clips),
+            }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Adaptive quality control for the camera interface
+
+QualityController steps between quality profiles (e.g. high/medium/low) as
+CPU load, frame latency or SoC temperature cross configured limits. It
+degrades one step as soon as a limit has been exceeded for degrade_after_s,
+and only recovers one step after every reading has stayed below its (lower)
+recovery threshold for recover_after_s, so it does not oscillate around a
+single threshold.
+
+A source is any callable returning the current reading or None when it is
+unavailable, so fake readings can be injected in place of /proc and /sys.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Source = Callable[[], Optional[float]]
+
+
+class CpuLoadSource:
+    """System-wide CPU utilisation in percent from /proc/stat deltas"""
+
+    def __init__(self, path: str = "/proc/stat"):
+        self.path = path
+        self._last: Optional[Tuple[int, int]] = None
+
+    def __call__(self) -> Optional[float]:
+        try:
+            with open(self.path, "r") as f:
+                fields = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        total = sum(fields)
+        last, self._last = self._last, (idle, total)
+        if last is None or total == last[1]:
+            return None
+        return 100.0 * (1.0 - (idle - last[0]) / (total - last[1]))
+
+
+class ThermalSource:
+    """SoC temperature in degrees C from a sysfs thermal zone"""
+
+    def __init__(self, path: str = "/sys/class/thermal/thermal_zone0/temp"):
+        self.path = path
+
+    def __call__(self) -> Optional[float]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r") as f:
+                return int(f.read().strip()) / 1000.0
+        except (OSError, ValueError):
+            return None
+
+
+class LatencySource:
+    """Mean latency in ms of the samples recorded into a LatencyHistogram since the last call"""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self._last_count = 0
+        self._last_total_ms = 0.0
+
+    def __call__(self) -> Optional[float]:
+        snapshot = self.histogram.snapshot()
+        count, total_ms = snapshot["count"], snapshot["count"] * snapshot["mean_ms"]
+        delta = count - self._last_count
+        mean = (total_ms - self._last_total_ms) / delta if delta > 0 else None
+        self._last_count, self._last_total_ms = count, total_ms
+        return mean
+
+
+class QualityController:
+    """Hysteresis controller over an ordered list of quality profiles
+
+    limits maps a source name to (degrade_above, recover_below). profiles is
+    ordered best first; apply(name, profile) is called on every change.
+    """
+
+    def __init__(self, profiles: List[Tuple[str, Dict[str, Any]]],
+                 limits: Dict[str, Tuple[float, float]], sources: Dict[str, Source],
+                 apply: Callable[[str, Dict[str, Any]], None],
+                 degrade_after_s: float = 3.0, recover_after_s: float = 30.0,
+                 initial: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        if not profiles:
+            raise ValueError("QualityController needs at least one profile")
+        self.profiles = profiles
+        self.limits = limits
+        self.sources = sources
+        self.apply = apply
+        self.degrade_after_s = degrade_after_s
+        self.recover_after_s = recover_after_s
+        self.clock = clock
+        names = [name for name, _ in profiles]
+        self.level = names.index(initial) if initial in names else 0
+        self.readings: Dict[str, Optional[float]] = {}
+        self.pressure: List[str] = []
+        self.transitions = 0
+        self._pressure_since: Optional[float] = None
+        self._calm_since: Optional[float] = None
+
+    @property
+    def profile(self) -> str:
+        return self.profiles[self.level][0]
+
+    def sample(self) -> Optional[str]:
+        """Read every source and step the profile if needed; returns the new profile name on change"""
+        now = self.clock()
+        self.readings = {name: source() for name, source in self.sources.items()}
+        self.pressure = [name for name, value in self.readings.items()
+                         if value is not None and name in self.limits and value > self.limits[name][0]]
+        calm = all(value is None or name not in self.limits or value < self.limits[name][1]
+                   for name, value in self.readings.items())
+
+        if self.pressure:
+            self._calm_since = None
+            if self._pressure_since is None:
+                self._pressure_since = now
+            if now - self._pressure_since >= self.degrade_after_s and self.level < len(self.profiles) - 1:
+                self._pressure_since = now  # give the new profile time to take effect
+                return self._step(+1)
+        else:
+            self._pressure_since = None
+            if not calm:
+                # Between the thresholds: hold the current profile
+                self._calm_since = None
+            elif self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.recover_after_s and self.level > 0:
+                self._calm_since = now
+                return self._step(-1)
+        return None
+
+    def _step(self, direction: int) -> str:
+        self.level += direction
+        self.transitions += 1
+        name, profile = self.profiles[self.level]
+        self.apply(name, profile)
+        return name
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profile": self.profile,
+            "readings": {name: None if value is None else round(value, 1)
+                         for name, value in self.readings.items()},
+            "pressure": list(self.pressure),
+            "transitions": self.transitions,
+        }
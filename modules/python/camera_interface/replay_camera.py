@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Replay camera: recorded footage as a CameraInterface camera
+
+Plays back, in timestamp order, any mix of:
+
+    raw frame dumps (*.frames, see frame_dump.py)   mmap, zero-copy read
+    recorder / event clip segments (*.seg)          mmap, JPEG decoded in place
+    video files (*.mp4, *.avi, *.mkv, ...)          decoded with cv2.VideoCapture
+
+given either one file or a directory of them. Every source builds its frame
+index (timestamps and, for segments, record offsets) once when it is opened,
+so seeking and looping are a lookup rather than a scan, and the mmap'd
+sources read a frame without any intermediate copy. Video containers cannot
+be mapped; seeking in them falls back to the decoder.
+
+As a camera backend, request() hands out frames replayed at their recorded
+size without copying them: a dump's as read-only views of the mapping, a
+segment's as the array the JPEG decoder allocated anyway, a video's decoded
+straight into a capture slab. Scaled frames are resized into a slab. Each
+source's read() returns how many copies it made, for the backend's copy count.
+
+Frames are paced by their original timestamps divided by speed, so speed=1
+reproduces the recorded timing, speed=4 replays four times faster, and
+speed=0 replays as fast as the pipeline can take frames. With
+preserve_timestamps the recorded timestamps are handed back for the frame
+metadata, offset on every loop so they keep increasing. Gaps between
+recordings longer than max_gap_s (or timestamps going backwards) are not
+waited out; replay continues with the next frame.
+"""
+
+import os
+import sys
+import time
+import mmap
+import bisect
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from camera_backend import BackendCapabilities, CameraBackend
+from frame_dump import FrameDump, FRAMES_SUFFIX
+from frame_pool import FrameBuffer, FramePool
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "recorder"))
+
+from segment_store import FRAME_HEADER, FRAME_MAGIC, SEGMENT_SUFFIX
+
+VIDEO_SUFFIXES = (".mp4", ".avi", ".mkv", ".mov", ".h264", ".mjpeg")
+
+
+def _fit(frame: np.ndarray, dst: np.ndarray) -> int:
+    """Copy a decoded or mapped frame into dst, converting to BGR and resizing as needed; returns copies made"""
+    if frame.ndim == 2 and dst.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    if frame.shape == dst.shape:
+        np.copyto(dst, frame)
+        return 1
+    cv2.resize(frame, (dst.shape[1], dst.shape[0]), dst=dst, interpolation=cv2.INTER_AREA)
+    return 0
+
+
+class DumpSource:
+    """Raw frame dump; frames are read straight out of the mapping"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dump = FrameDump(path)
+        self.dump.advise_sequential()
+        self.resolution = self.dump.resolution
+        self.timestamps = self.dump.index["timestamp"].astype(np.int64)
+        self.sensor_timestamps: Optional[np.ndarray] = self.dump.index["sensor_timestamp"].astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.dump)
+
+    def read(self, i: int, dst: np.ndarray) -> int:
+        return _fit(self.dump.frame(i), dst)
+
+    def frame(self, i: int) -> np.ndarray:
+        """Frame i at its recorded size without a copy: a read-only view of the mapping"""
+        return self.dump.frame(i)
+
+    def close(self):
+        self.dump.close()
+
+
+class SegmentSource:
+    """Recorder segment of JPEG records; the header walk is done once on open"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        offsets, lengths, timestamps = [], [], []
+        offset = 0
+        while offset + FRAME_HEADER.size <= size:
+            magic, timestamp_us, _, length = FRAME_HEADER.unpack_from(self._mmap, offset)
+            # Preallocated tail or a record cut short by power loss
+            if magic != FRAME_MAGIC or offset + FRAME_HEADER.size + length > size:
+                break
+            offsets.append(offset + FRAME_HEADER.size)
+            lengths.append(length)
+            timestamps.append(timestamp_us)
+            offset += FRAME_HEADER.size + length
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._lengths = np.array(lengths, dtype=np.int64)
+        self.timestamps = np.array(timestamps, dtype=np.int64)
+        self.sensor_timestamps: Optional[np.ndarray] = None
+        if not len(self):
+            self.close()
+            raise ValueError(f"{path}: no frames")
+        first = self._decode(0)
+        self.resolution = (first.shape[1], first.shape[0])
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _decode(self, i: int) -> np.ndarray:
+        payload = np.frombuffer(self._mmap, dtype=np.uint8, count=int(self._lengths[i]),
+                                offset=int(self._offsets[i]))
+        frame = cv2.imdecode(payload, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"{self.path}: frame {i} is not a decodable image")
+        return frame
+
+    def frame(self, i: int) -> np.ndarray:
+        """Frame i at its recorded size without a copy: the decoder's own array"""
+        return self._decode(i)
+
+    def read(self, i: int, dst: np.ndarray) -> int:
+        # imdecode allocates its result, so the decoded frame is copied into dst
+        return _fit(self._decode(i), dst)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+class VideoSource:
+    """Video file; timestamps are reconstructed from the frame rate and file time"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._capture = cv2.VideoCapture(path)
+        if not self._capture.isOpened():
+            raise ValueError(f"{path}: cannot open video")
+        fps = self._capture.get(cv2.CAP_PROP_FPS) or 30.0
+        count = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if count <= 0:
+            # Container without a frame count: count once, then rewind
+            while self._capture.grab():
+                count += 1
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.resolution = (int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        # A recording's modification time is when its last frame was written
+        period_us = 1e6 / fps
+        start_us = int(os.path.getmtime(path) * 1e6 - count * period_us)
+        self.timestamps = start_us + (np.arange(count) * period_us).astype(np.int64)
+        self.sensor_timestamps: Optional[np.ndarray] = None
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def read(self, i: int, dst: np.ndarray) -> int:
+        if i != self._next:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, i)
+        # At the native size the decoder writes straight into dst
+        native = dst.shape == (self.resolution[1], self.resolution[0], 3)
+        ok, frame = self._capture.read(dst) if native else self._capture.read()
+        if not ok:
+            raise ValueError(f"{self.path}: cannot decode frame {i}")
+        self._next = i + 1
+        if frame is dst or (native and np.shares_memory(frame, dst)):
+            return 0
+        return _fit(frame, dst)
+
+    def close(self):
+        self._capture.release()
+
+
+def open_source(path: str):
+    if path.endswith(FRAMES_SUFFIX):
+        return DumpSource(path)
+    if path.endswith(SEGMENT_SUFFIX):
+        return SegmentSource(path)
+    if path.lower().endswith(VIDEO_SUFFIXES):
+        return VideoSource(path)
+    raise ValueError(f"{path}: not a frame dump, segment or video file")
+
+
+def open_sources(path: str) -> list:
+    """One source per replayable file under path, in order of their first timestamp"""
+    if not os.path.isdir(path):
+        source = open_source(path)
+        if not len(source):
+            source.close()
+            raise ValueError(f"{path}: no frames")
+        return [source]
+    sources = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith((FRAMES_SUFFIX, SEGMENT_SUFFIX)) or name.lower().endswith(VIDEO_SUFFIXES):
+            try:
+                source = open_source(os.path.join(path, name))
+            except (OSError, ValueError):
+                continue
+            if len(source):
+                sources.append(source)
+            else:
+                source.close()
+    if not sources:
+        raise ValueError(f"{path}: no replayable files")
+    sources.sort(key=lambda source: int(source.timestamps[0]))
+    return sources
+
+
+class ReplayCamera(CameraBackend):
+    """Camera stand-in replaying recorded frames with their original timing"""
+
+    name = "replay"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, clock=time.monotonic_ns, sleep=time.sleep):
+        config = config or {}
+        self.path = config["path"]
+        self.speed = float(config.get("speed", 1.0))
+        self.loop = bool(config.get("loop", True))
+        self.preserve_timestamps = bool(config.get("preserve_timestamps", True))
+        self.max_gap_us = int(float(config.get("max_gap_s", 1.0)) * 1e6)
+        self.clock = clock
+        self.sleep = sleep
+        # Frames are paced here, so the capture loop must not pace them again
+        self.capabilities = BackendCapabilities(hardware_timestamps=self.preserve_timestamps, zero_copy=True,
+                                                read_only_frames=True, self_paced=True)
+
+        self.sources = open_sources(self.path)
+        counts = [len(source) for source in self.sources]
+        self._starts = [0] + list(np.cumsum(counts)[:-1])
+        self.total = int(sum(counts))
+        self.timestamps = np.concatenate([source.timestamps for source in self.sources])
+        self.sensor_timestamps = np.concatenate([
+            source.sensor_timestamps if source.sensor_timestamps is not None else source.timestamps * 1000
+            for source in self.sources])
+        self.span_us = int(self.timestamps[-1] - self.timestamps[0])
+        self.period_us = self.span_us // max(1, self.total - 1)
+        # Native resolution; the camera interface may set another one to scale to
+        self.resolution: Tuple[int, int] = tuple(self.sources[0].resolution)
+        self.framerate = 1e6 / self.period_us if self.period_us else 30.0
+        self.rotation = 0
+        self.running = False
+        self.finished = False
+
+        self._position = int(config.get("start_frame", 0)) % self.total
+        self._anchor: Optional[Tuple[int, int]] = None  # (monotonic ns, frame timestamp us)
+        self._loop_offset_us = 0
+        self._last_timestamps: Optional[Tuple[int, int]] = None
+
+        # Statistics
+        self.frames = 0
+        self.loops = 0
+        self.late = 0
+        self.gaps = 0
+        self.read_ns = 0
+        self._started_ns = 0
+        self._last_read_ns = 0
+        self._replayed_us = 0
+        self._step_us = 0
+
+    def configure(self, config):
+        pass
+
+    def set_controls(self, controls):
+        pass
+
+    def start(self):
+        self.running = True
+        self._anchor = None
+        self._started_ns = self.clock()
+        self._replayed_us = 0
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        for source in self.sources:
+            source.close()
+
+    def seek(self, frame: int):
+        """Continue from frame (modulo the total), rebasing the pacing"""
+        self._position = int(frame) % self.total
+        self._anchor = None
+        self.finished = False
+
+    def _locate(self, i: int):
+        s = bisect.bisect_right(self._starts, i) - 1
+        return self.sources[s], i - self._starts[s]
+
+    def _wait_for(self, timestamp_us: int):
+        if self.speed <= 0:
+            return
+        now = self.clock()
+        if self._anchor is None:
+            self._anchor = (now, timestamp_us)
+            return
+        due = self._anchor[0] + int((timestamp_us - self._anchor[1]) * 1000 / self.speed)
+        if due > now:
+            self.sleep((due - now) / 1e9)
+        elif now - due > self.period_us * 1000 / self.speed:
+            self.late += 1
+
+    def _next_frame(self) -> int:
+        """Index of the next frame to replay, once it is due; EOFError at the end without loop"""
+        if self._position >= self.total:
+            if not self.loop:
+                self.finished = True
+                raise EOFError(f"Replay of {self.path} finished")
+            self._position = 0
+            self.loops += 1
+            self._loop_offset_us += self.span_us + self.period_us
+            self._anchor = None
+        i = self._position
+        timestamp_us = int(self.timestamps[i])
+        step_us = timestamp_us - int(self.timestamps[i - 1]) if i else 0
+        if not 0 <= step_us <= self.max_gap_us:
+            # Next recording: start its timing afresh
+            self.gaps += 1
+            self._anchor = None
+            step_us = 0
+        self._wait_for(timestamp_us)
+        self._step_us = step_us
+        return i
+
+    def _read(self, i: int, dst: np.ndarray) -> int:
+        source, local = self._locate(i)
+        start = time.perf_counter_ns()
+        copies = source.read(local, dst)
+        self.read_ns += time.perf_counter_ns() - start
+        if self.rotation == 180:
+            cv2.flip(dst, -1, dst=dst)
+        return copies
+
+    def _advance(self, i: int):
+        """Bookkeeping once frame i has been read"""
+        self._last_read_ns = self.clock()
+        timestamp_us = int(self.timestamps[i])
+        self._last_timestamps = (timestamp_us + self._loop_offset_us,
+                                 int(self.sensor_timestamps[i]) + self._loop_offset_us * 1000)
+        self._replayed_us += self._step_us
+        self._position += 1
+        self.frames += 1
+
+    def request(self, pool: FramePool) -> FrameBuffer:
+        """
+        The next recorded frame: the source's own array when it is replayed as
+        recorded and the source has one, otherwise decoded or scaled into a capture slab
+        """
+        i = self._next_frame()
+        width, height = self.resolution
+        source, local = self._locate(i)
+        if self.rotation != 180 and hasattr(source, "frame") and tuple(source.resolution) == (width, height):
+            start = time.perf_counter_ns()
+            frame = FrameBuffer.wrap(source.frame(local))
+            self.read_ns += time.perf_counter_ns() - start
+            copies = 0
+        else:
+            frame = pool.checkout((height, width, 3))
+            try:
+                copies = self._read(i, frame.array)
+            except Exception:
+                frame.release()
+                raise
+        self._advance(i)
+        self._count(copies)
+        return frame
+
+    def capture_into(self, dst: np.ndarray) -> np.ndarray:
+        """Read the next recorded frame into a caller-provided buffer; EOFError at the end without loop"""
+        i = self._next_frame()
+        self._read(i, dst)
+        self._advance(i)
+        return dst
+
+    def capture_array(self) -> np.ndarray:
+        width, height = self.resolution
+        return self.capture_into(np.empty((height, width, 3), dtype=np.uint8))
+
+    def frame_timestamps(self) -> Optional[Tuple[int, int]]:
+        """Recorded (Unix us, sensor ns) of the last frame, or None to use capture time"""
+        return self._last_timestamps if self.preserve_timestamps else None
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed_us = (self._last_read_ns - self._started_ns) / 1000 if self._last_read_ns else 0
+        return {
+            "source": "replay",
+            "path": self.path,
+            "files": len(self.sources),
+            "frames_total": self.total,
+            "position": self._position,
+            "frames": self.frames,
+            "loops": self.loops,
+            "speed": self.speed,
+            "late": self.late,
+            "gaps": self.gaps,
+            "read_ms": round(self.read_ns / self.frames / 1e6, 3) if self.frames else 0.0,
+            # Recorded time replayed per wall-clock second
+            "realtime_factor": round(self._replayed_us / elapsed_us, 2) if elapsed_us else 0.0,
+            "finished": self.finished,
+            **self.backend_stats(),
+        }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Drift-free frame scheduler
+
+Frames are paced against absolute deadlines on the monotonic clock, so wall
+clock steps (NTP sync after boot is common in a car) cannot stall or burst the
+capture loop, and per-frame jitter does not accumulate. When the loop falls
+behind by a whole period or more the missed deadlines are counted and skipped
+rather than captured back-to-back.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class FrameTiming:
+    """Timestamps carried with each frame through the pipeline"""
+    sensor_ns: int          # sensor / monotonic capture time in nanoseconds
+    wall_us: int            # Unix time in microseconds, for ImageMetadata.timestamp
+    deadline_ns: int        # scheduled capture deadline (monotonic)
+    captured_ns: int = 0    # monotonic time the capture call returned
+    processed_ns: int = 0   # monotonic time processing finished
+
+
+class FrameScheduler:
+    """Paces a loop at a fixed rate using monotonic absolute deadlines"""
+
+    def __init__(self, framerate: float, clock: Callable[[], int] = time.monotonic_ns,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self.period_ns = 0
+        self.framerate = 0.0
+        self.next_deadline_ns = 0
+        self.missed_deadlines = 0
+        self.late_frames = 0
+        self.set_framerate(framerate)
+
+    def set_framerate(self, framerate: float):
+        """Change the rate; the next deadline is rebased on the current time"""
+        if framerate <= 0:
+            raise ValueError(f"framerate must be positive, got {framerate}")
+        self.framerate = float(framerate)
+        self.period_ns = int(1_000_000_000 / framerate)
+        self.next_deadline_ns = 0
+
+    def wait(self) -> int:
+        """Sleep until the next deadline and return it"""
+        now = self._clock()
+        if self.next_deadline_ns == 0:
+            self.next_deadline_ns = now
+        deadline = self.next_deadline_ns
+
+        if now < deadline:
+            self._sleep((deadline - now) / 1e9)
+        elif now - deadline >= self.period_ns:
+            # Fell behind by at least one whole period: skip the missed slots
+            missed = (now - deadline) // self.period_ns
+            self.missed_deadlines += missed
+            deadline += missed * self.period_ns
+        elif now > deadline:
+            self.late_frames += 1
+
+        self.next_deadline_ns = deadline + self.period_ns
+        return deadline
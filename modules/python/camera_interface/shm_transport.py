@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Shared-memory frame transport for modules on the same host
+
+Raw frames are written into a ring of fixed-stride slots in a
+multiprocessing.shared_memory segment and only a small FrameDescriptor travels
+over DDS. Readers mmap the segment from /dev/shm by name and map a slot as an
+ndarray without copying. Each slot header carries a sequence number written before and
+after the pixel data (a seqlock) so readers can detect a slot that was
+overwritten while they were using it.
+
+A writer that needs larger slots recreates its ring under the same name.
+Readers notice when a frame cannot be mapped: if the name now refers to a
+different segment (another inode), they map that one instead.
+"""
+
+import os
+import mmap
+import struct
+from dataclasses import dataclass, asdict, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+SHM_DIR = "/dev/shm"
+# Segment header (first page): magic, slot stride, slot count
+_SEGMENT = struct.Struct("<8sQQ")
+SEGMENT_MAGIC = b"DCAMSHM1"
+# Slot header: seq_begin, seq_end, timestamp_us, height, width, channels, format
+_HEADER = struct.Struct("<QQQIII8s")
+HEADER_SIZE = 64
+PAGE_SIZE = 4096
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+@dataclass
+class FrameDescriptor:
+    """Small message identifying a frame held in a shared-memory slot"""
+    segment: str
+    slot: int
+    sequence_id: int
+    timestamp: int
+    shape: Tuple[int, ...] = field(default_factory=tuple)
+    format: str = "BGR"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FrameDescriptor":
+        return cls(data["segment"], data["slot"], data["sequence_id"], data["timestamp"],
+                   tuple(data["shape"]), data.get("format", "BGR"))
+
+
+class SharedFrameRing:
+    """Writer side: owns the shared-memory segment and fills slots round-robin"""
+
+    def __init__(self, name: str, frame_shape: Tuple[int, ...], slots: int = 8):
+        if slots < 2:
+            raise ValueError(f"SharedFrameRing needs at least two slots, got {slots}")
+        self.frame_shape = tuple(int(v) for v in frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        self.slots = slots
+        # Slots start on page boundaries after the segment header page
+        self.stride = _align(HEADER_SIZE + self.frame_bytes, PAGE_SIZE)
+        size = PAGE_SIZE + self.stride * slots
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a writer that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name, create=False)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self._shm.name
+        _SEGMENT.pack_into(self._shm.buf, 0, SEGMENT_MAGIC, self.stride, slots)
+        self._next_slot = 0
+        offsets = [PAGE_SIZE + i * self.stride for i in range(slots)]
+        self._headers = [self._shm.buf[offset:offset + HEADER_SIZE] for offset in offsets]
+        self._views = [np.ndarray(self.frame_shape, dtype=np.uint8, buffer=self._shm.buf,
+                                  offset=offset + HEADER_SIZE)
+                       for offset in offsets]
+        self.frames_written = 0
+
+    def fits(self, shape: Tuple[int, ...]) -> bool:
+        return int(np.prod(shape)) <= self.frame_bytes
+
+    def write(self, frame: np.ndarray, sequence_id: int, timestamp: int,
+              format: str = "BGR") -> FrameDescriptor:
+        """Copy a frame into the next slot and return its descriptor"""
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.slots
+        shape = frame.shape
+        height, width = shape[0], shape[1]
+        channels = shape[2] if len(shape) > 2 else 1
+        header = self._headers[slot]
+        encoded_format = format.encode()[:8]
+
+        # seq_begin != seq_end while the slot is being rewritten
+        struct.pack_into("<Q", header, 0, sequence_id + 1)
+        target = self._views[slot].reshape(-1)[:frame.size].reshape(shape)
+        np.copyto(target, frame)
+        _HEADER.pack_into(header, 0, sequence_id + 1, sequence_id + 1, timestamp,
+                          height, width, channels, encoded_format)
+        self.frames_written += 1
+        return FrameDescriptor(self.name, slot, sequence_id, timestamp, tuple(shape), format)
+
+    def close(self):
+        """Release the segment; the writer also unlinks it"""
+        self._views = []
+        for header in self._headers:
+            header.release()
+        self._headers = []
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedFrameReader:
+    """Reader side helper mapping shared-memory slots as ndarrays without copying"""
+
+    def __init__(self):
+        # name -> (mapping, slot stride, slot count, inode)
+        self._segments: Dict[str, Tuple[mmap.mmap, int, int, int]] = {}
+
+    def _attach(self, name: str, refresh: bool = False):
+        """Mapping of the named segment; with refresh, remap if the name now refers to a new segment"""
+        path = os.path.join(SHM_DIR, name.lstrip("/"))
+        segment = self._segments.get(name)
+        if segment is not None and refresh:
+            try:
+                replaced = os.stat(path).st_ino != segment[3]
+            except FileNotFoundError:
+                replaced = False
+            if replaced:
+                self._detach(name)
+                segment = None
+        if segment is None:
+            # Mapped directly rather than through SharedMemory so this process's
+            # resource tracker never takes ownership of (and unlinks) the segment
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                inode = os.fstat(fd).st_ino
+                buffer = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+            finally:
+                os.close(fd)
+            magic, stride, slots = _SEGMENT.unpack_from(buffer, 0)
+            if magic != SEGMENT_MAGIC:
+                buffer.close()
+                raise ValueError(f"Shared memory segment {name} is not a frame ring")
+            segment = (buffer, stride, slots, inode)
+            self._segments[name] = segment
+        return segment
+
+    def _detach(self, name: str):
+        buffer = self._segments.pop(name)[0]
+        try:
+            buffer.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is released with it
+            pass
+
+    def _sequence(self, descriptor: FrameDescriptor) -> Tuple[int, int]:
+        buffer, stride = self._segments[descriptor.segment][:2]
+        return struct.unpack_from("<QQ", buffer, PAGE_SIZE + descriptor.slot * stride)
+
+    def _map(self, descriptor: FrameDescriptor, segment) -> Optional[np.ndarray]:
+        shape = tuple(descriptor.shape)
+        buffer, stride, slots, _ = segment
+        if descriptor.slot >= slots or int(np.prod(shape)) > stride - HEADER_SIZE:
+            return None
+        if not self.is_valid(descriptor):
+            return None
+        return np.ndarray(shape, dtype=np.uint8, buffer=buffer,
+                          offset=PAGE_SIZE + descriptor.slot * stride + HEADER_SIZE)
+
+    def view(self, descriptor: FrameDescriptor) -> Optional[np.ndarray]:
+        """
+        Return a read-only ndarray over the frame's slot, or None if the slot has
+        already been reused. Call is_valid() after processing to confirm the
+        writer did not overwrite the slot in the meantime.
+        """
+        segment = self._attach(descriptor.segment)
+        frame = self._map(descriptor, segment)
+        if frame is None:
+            # The writer may have recreated the ring under the same name, e.g. for larger frames
+            current = self._attach(descriptor.segment, refresh=True)
+            if current is not segment:
+                frame = self._map(descriptor, current)
+        return frame
+
+    def is_valid(self, descriptor: FrameDescriptor) -> bool:
+        """True while the slot still holds the frame named by descriptor"""
+        if descriptor.segment not in self._segments:
+            return False
+        begin, end = self._sequence(descriptor)
+        return begin == end == descriptor.sequence_id + 1
+
+    def close(self):
+        for name in list(self._segments):
+            self._detach(name)
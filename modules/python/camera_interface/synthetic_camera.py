@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic camera for pipeline testing and benchmarks
+
+MockCamera renders text into every frame, which caps it around 30 fps and
+makes frames differ between runs. SyntheticCamera instead pre-renders a small
+bank of frames (or decodes them once from a video file) and copies them out
+in a loop. request() hands out read-only views of the bank itself, so a
+frame costs no copy at all; capture_into() copies one out for consumers that
+need their own buffer. It keeps its own sensor clock at
+the configured framerate and can inject timing jitter and dropped sensor
+frames from a seeded RNG, so the same configuration always produces the same
+frame sequence.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from camera_backend import BackendCapabilities, CameraBackend
+from frame_pool import FrameBuffer, FramePool
+
+
+class SyntheticCamera(CameraBackend):
+    """Camera stand-in serving frames from a pregenerated bank at a fixed sensor rate"""
+
+    name = "synthetic"
+    capabilities = BackendCapabilities(zero_copy=True, read_only_frames=True)
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, clock=time.monotonic_ns, sleep=time.sleep):
+        config = config or {}
+        self.resolution: Tuple[int, int] = tuple(config.get("resolution", (640, 480)))
+        self.framerate = float(config.get("framerate", 30))
+        self.rotation = 0
+        self.bank_size = max(1, int(config.get("bank_frames", 8)))
+        self.jitter_ms = float(config.get("jitter_ms", 0.0))
+        self.drop_rate = float(config.get("drop_rate", 0.0))
+        self.video_path = config.get("video_path")
+        # With pace=False frames are served as fast as they are requested
+        self.pace = bool(config.get("pace", True))
+        self.seed = int(config.get("seed", 0))
+        self.clock = clock
+        self.sleep = sleep
+        self.running = False
+
+        self._rng = np.random.default_rng(self.seed)
+        self._bank: List[np.ndarray] = []
+        self._bank_key = None
+        self._next_frame_ns = 0
+        self._index = 0
+
+        # Statistics
+        self.frames = 0
+        self.dropped = 0
+        self.sensor_sequence = 0
+
+    def configure(self, config):
+        pass
+
+    def set_controls(self, controls):
+        pass
+
+    def start(self):
+        self.running = True
+        self._next_frame_ns = self.clock()
+
+    def stop(self):
+        self.running = False
+
+    def _frame_bank(self) -> List[np.ndarray]:
+        key = (tuple(self.resolution), self.rotation)
+        if self._bank_key != key:
+            self._bank = self._load_video() if self.video_path else self._render_bank()
+            if self.rotation == 180:
+                self._bank = [cv2.flip(frame, -1) for frame in self._bank]
+            for frame in self._bank:
+                # Handed out by reference: nothing downstream may draw on them
+                frame.flags.writeable = False
+            self._bank_key = key
+        return self._bank
+
+    def _render_bank(self) -> List[np.ndarray]:
+        """A moving box over a fixed gradient, with the bank index drawn in"""
+        width, height = self.resolution
+        gradient = np.linspace(0, 255, width, dtype=np.float32)
+        background = np.empty((height, width, 3), dtype=np.uint8)
+        background[..., 0] = gradient.astype(np.uint8)
+        background[..., 1] = np.linspace(0, 255, height, dtype=np.float32).astype(np.uint8)[:, None]
+        background[..., 2] = 96
+        bank = []
+        box = max(8, min(width, height) // 6)
+        for i in range(self.bank_size):
+            frame = background.copy()
+            x = int((width - box) * i / max(1, self.bank_size - 1))
+            y = (height - box) // 2
+            cv2.rectangle(frame, (x, y), (x + box, y + box), (255, 255, 255), -1)
+            cv2.putText(frame, f"synthetic {i}", (20, max(30, height // 12)),
+                        cv2.FONT_HERSHEY_SIMPLEX, max(0.5, height / 720), (255, 255, 255), 2)
+            bank.append(frame)
+        return bank
+
+    def _load_video(self) -> List[np.ndarray]:
+        """Decode up to bank_frames frames of video_path once, resized to the resolution"""
+        capture = cv2.VideoCapture(self.video_path)
+        bank = []
+        try:
+            while len(bank) < self.bank_size:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if (frame.shape[1], frame.shape[0]) != tuple(self.resolution):
+                    frame = cv2.resize(frame, tuple(self.resolution), interpolation=cv2.INTER_AREA)
+                bank.append(frame)
+        finally:
+            capture.release()
+        if not bank:
+            raise ValueError(f"No frames could be read from {self.video_path}")
+        return bank
+
+    def _wait_for_sensor(self):
+        """Block until the next sensor frame, skipping injected drops"""
+        period_ns = int(1e9 / self.framerate)
+        while self.drop_rate and self._rng.random() < self.drop_rate:
+            # The sensor produced a frame nobody received
+            self._next_frame_ns += period_ns
+            self.sensor_sequence += 1
+            self.dropped += 1
+        jitter_ns = int(self._rng.normal(0.0, self.jitter_ms) * 1e6) if self.jitter_ms else 0
+        if self.pace:
+            delay_ns = self._next_frame_ns + jitter_ns - self.clock()
+            if delay_ns > 0:
+                self.sleep(delay_ns / 1e9)
+            # A slow consumer does not get a burst of stale frames to catch up on
+            self._next_frame_ns = max(self._next_frame_ns + period_ns, self.clock())
+        self.sensor_sequence += 1
+
+    def _next_frame(self) -> np.ndarray:
+        bank = self._frame_bank()
+        self._wait_for_sensor()
+        frame = bank[self._index % len(bank)]
+        self._index += 1
+        self.frames += 1
+        return frame
+
+    def request(self, pool: FramePool) -> FrameBuffer:
+        """The next bank frame itself, read-only; the pool is not needed"""
+        frame = FrameBuffer.wrap(self._next_frame())
+        self._count(0)
+        return frame
+
+    def capture_into(self, dst: np.ndarray) -> np.ndarray:
+        """Copy the next bank frame into a caller-provided buffer"""
+        np.copyto(dst, self._next_frame())
+        return dst
+
+    def capture_array(self) -> np.ndarray:
+        width, height = self.resolution
+        return self.capture_into(np.empty((height, width, 3), dtype=np.uint8))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": "video" if self.video_path else "bank",
+            "bank_frames": len(self._bank),
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "sensor_sequence": self.sensor_sequence,
+            **self.backend_stats(),
+        }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Undistortion remap tables for the camera interface
+
+cv2.undistort rebuilds the full distortion map on every call. This module builds
+the map once per (calibration, resolution) pair with cv2.initUndistortRectifyMap,
+stores it in the compact fixed-point CV_16SC2 form and applies it with cv2.remap.
+Maps can optionally be persisted to disk as .npy files so restarts skip the rebuild.
+"""
+
+import os
+import hashlib
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import cv2
+
+
+def calibration_key(camera_matrix: np.ndarray, distortion_coeffs: np.ndarray,
+                    optimal_camera_matrix: np.ndarray,
+                    resolution: Tuple[int, int]) -> str:
+    """Stable short hash identifying a calibration at a given resolution"""
+    digest = hashlib.sha1()
+    for array in (camera_matrix, distortion_coeffs, optimal_camera_matrix):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    digest.update(f"{resolution[0]}x{resolution[1]}".encode())
+    return digest.hexdigest()[:16]
+
+
+def scale_camera_matrix(camera_matrix: np.ndarray, from_size: Tuple[int, int],
+                        to_size: Tuple[int, int]) -> np.ndarray:
+    """Rescale intrinsics calibrated at from_size to be valid at to_size"""
+    if tuple(from_size) == tuple(to_size):
+        return camera_matrix
+    scaled = np.array(camera_matrix, dtype=np.float64, copy=True)
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    scaled[0, :] *= sx
+    scaled[1, :] *= sy
+    scaled[2, :] = (0.0, 0.0, 1.0)
+    return scaled
+
+
+class UndistortMaps:
+    """Precomputed fixed-point remap tables for one resolution"""
+
+    def __init__(self, map1: np.ndarray, map2: np.ndarray,
+                 resolution: Tuple[int, int],
+                 roi: Optional[Tuple[int, int, int, int]] = None, key: Optional[str] = None):
+        self.map1 = map1
+        self.map2 = map2
+        self.resolution = tuple(resolution)
+        self.roi = self._clip_roi(roi, self.resolution)
+        self.key = key
+
+    @staticmethod
+    def _clip_roi(roi, resolution) -> Optional[Tuple[int, int, int, int]]:
+        if roi is None:
+            return None
+        x, y, w, h = (int(v) for v in roi)
+        width, height = resolution
+        x, y = max(0, x), max(0, y)
+        w, h = min(w, width - x), min(h, height - y)
+        if w <= 0 or h <= 0 or (x, y, w, h) == (0, 0, width, height):
+            return None
+        return (x, y, w, h)
+
+    @property
+    def output_shape(self) -> Tuple[int, int]:
+        """(height, width) of the frames produced by apply()"""
+        if self.roi is None:
+            return (self.resolution[1], self.resolution[0])
+        return (self.roi[3], self.roi[2])
+
+    def apply(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """Remap a frame and crop it to the stored roi"""
+        if self.roi is None:
+            return cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR, dst=dst)
+        x, y, w, h = self.roi
+        # Remapping only the cropped window of the map avoids computing pixels
+        # that are thrown away by the roi crop
+        return cv2.remap(frame, self.map1[y:y + h, x:x + w], self.map2[y:y + h, x:x + w],
+                         cv2.INTER_LINEAR, dst=dst)
+
+
+class UndistortMapCache:
+    """Builds, caches and optionally persists undistortion maps"""
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None):
+        self.cache_dir = cache_dir
+        self.logger = logger or logging.getLogger('camera_interface')
+        self._maps: Optional[UndistortMaps] = None
+        self._key: Optional[str] = None
+
+    @property
+    def maps(self) -> Optional[UndistortMaps]:
+        return self._maps
+
+    def invalidate(self):
+        """Drop the in-memory maps so the next get() rebuilds them"""
+        self._maps = None
+        self._key = None
+
+    def get(self, camera_matrix: np.ndarray, distortion_coeffs: np.ndarray,
+            optimal_camera_matrix: np.ndarray, resolution: Tuple[int, int],
+            roi: Optional[Tuple[int, int, int, int]] = None, install: bool = True) -> UndistortMaps:
+        """
+        Return maps for the calibration at resolution, building them if needed.
+        With install=False the maps are built (and persisted) without replacing
+        the ones in use, so a resolution switch can prepare them in advance.
+        """
+        resolution = (int(resolution[0]), int(resolution[1]))
+        key = calibration_key(camera_matrix, distortion_coeffs,
+                              optimal_camera_matrix, resolution)
+        if self._maps is not None and self._key == key:
+            return self._maps
+
+        loaded = self._load(key, resolution)
+        if loaded is None:
+            map1, map2 = cv2.initUndistortRectifyMap(
+                camera_matrix, distortion_coeffs, None, optimal_camera_matrix,
+                resolution, cv2.CV_16SC2
+            )
+            self._save(key, map1, map2)
+            self.logger.info(f"Built undistortion maps for {resolution[0]}x{resolution[1]}")
+        else:
+            map1, map2 = loaded
+            self.logger.info(f"Loaded cached undistortion maps for {resolution[0]}x{resolution[1]}")
+
+        maps = UndistortMaps(map1, map2, resolution, roi, key)
+        if install:
+            self._maps = maps
+            self._key = key
+        return maps
+
+    def install(self, maps: UndistortMaps):
+        """Make maps prepared with install=False the ones in use"""
+        self._maps = maps
+        self._key = maps.key
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, f"undistort_{key}")
+        return f"{base}_map1.npy", f"{base}_map2.npy"
+
+    def _load(self, key: str, resolution: Tuple[int, int]):
+        if not self.cache_dir:
+            return None
+        map1_path, map2_path = self._paths(key)
+        if not (os.path.exists(map1_path) and os.path.exists(map2_path)):
+            return None
+        try:
+            map1 = np.load(map1_path)
+            map2 = np.load(map2_path)
+            expected = (resolution[1], resolution[0])
+            if map1.shape[:2] != expected or map2.shape[:2] != expected:
+                return None
+            return map1, map2
+        except Exception as e:
+            self.logger.warning(f"Failed to load cached undistortion maps: {e}")
+            return None
+
+    def _save(self, key: str, map1: np.ndarray, map2: np.ndarray):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            map1_path, map2_path = self._paths(key)
+            np.save(map1_path, map1)
+            np.save(map2_path, map2)
+        except Exception as e:
+            self.logger.warning(f"Failed to persist undistortion maps: {e}")
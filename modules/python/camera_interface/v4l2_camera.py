@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+V4L2 camera backend through OpenCV
+
+For USB cameras and other V4L2 devices, on boards without a CSI camera or as a
+second camera. cv2.VideoCapture (CAP_V4L2) dequeues the driver's mmap'd
+buffers and converts, or for MJPG decodes, each one into the array passed to
+read(). request() passes a capture slab, so a frame is produced in place
+without a copy on this side of OpenCV. The V4L2 buffer timestamp
+(CAP_PROP_POS_MSEC, CLOCK_MONOTONIC on current kernels) stands in for a
+sensor timestamp.
+
+The device paces the frames, so the capture loop does not. Changing the
+resolution or frame rate restarts the device's stream, so changes are applied
+on the capture thread at the next request(). What the driver actually
+negotiated is read back after every change.
+
+device may also be a video file, opened with OpenCV's default backend and
+paced by the capture loop, for development without a camera.
+"""
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from camera_backend import BackendCapabilities, CameraBackend
+from frame_pool import FrameBuffer, FramePool
+
+
+def _fourcc_name(code: float) -> str:
+    code = int(code)
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00")
+
+
+class V4L2Camera(CameraBackend):
+    """A V4L2 device (or video file) read through cv2.VideoCapture into capture slabs"""
+
+    name = "v4l2"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        device = config.get("device", "/dev/video0")
+        self.device = int(device) if str(device).isdigit() else device
+        self.is_file = isinstance(self.device, str) and not self.device.startswith("/dev/")
+        self.fourcc = str(config.get("fourcc", "MJPG"))
+        self.buffer_count = max(1, int(config.get("buffer_count", 2)))
+        self.resolution: Tuple[int, int] = tuple(config.get("resolution", (640, 480)))
+        self.framerate = float(config.get("framerate", 30))
+        self.rotation = 0
+        self.running = False
+        max_fps = config.get("max_fps")
+        self.capabilities = BackendCapabilities(max_fps=float(max_fps) if max_fps else None,
+                                                hardware_timestamps=not self.is_file,
+                                                self_paced=not self.is_file)
+        self._capture = None
+        self._applied: Optional[Tuple[Tuple[int, int], float]] = None
+        self._timestamps: Optional[Tuple[int, int]] = None
+
+        # Statistics
+        self.frames = 0
+        self.resized = 0
+        self.restarts = 0
+        self.read_ms = 0.0
+        self.negotiated: Optional[Dict[str, Any]] = None
+
+    def configure(self, config):
+        pass
+
+    def set_controls(self, controls):
+        pass
+
+    def start(self):
+        if self._capture is None:
+            capture = cv2.VideoCapture(self.device) if self.is_file else cv2.VideoCapture(self.device, cv2.CAP_V4L2)
+            if not capture.isOpened():
+                raise RuntimeError(f"Cannot open {self.device}")
+            self._capture = capture
+            self._applied = None
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        if self._capture is not None:
+            # Releasing stops streaming and returns the driver's buffers
+            self._capture.release()
+            self._capture = None
+
+    def close(self):
+        self.stop()
+
+    def _settings(self) -> Tuple[Tuple[int, int], float]:
+        return tuple(int(v) for v in self.resolution), float(self.framerate)
+
+    def _apply(self, settings: Tuple[Tuple[int, int], float]):
+        """Push the resolution and frame rate to the driver, and read back what it chose"""
+        capture = self._capture
+        resolution, framerate = settings
+        if not self.is_file:
+            if self._applied is None:
+                capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc[:4].ljust(4)))
+                # Few queued buffers: the newest frame, not one from several periods ago
+                capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_count)
+            if self._applied is None or self._applied[0] != resolution:
+                capture.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+                capture.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+            if self._applied is None or self._applied[1] != framerate:
+                capture.set(cv2.CAP_PROP_FPS, framerate)
+            if self._applied is not None:
+                self.restarts += 1
+        self._applied = settings
+        self.negotiated = {
+            "resolution": [int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))],
+            "fps": round(capture.get(cv2.CAP_PROP_FPS), 3),
+            "fourcc": _fourcc_name(capture.get(cv2.CAP_PROP_FOURCC)),
+        }
+
+    def request(self, pool: FramePool) -> FrameBuffer:
+        """Dequeue the next frame, converted or decoded straight into a capture slab"""
+        if self._capture is None:
+            raise RuntimeError(f"{self.device} is not started")
+        settings = self._settings()
+        if self._applied != settings:
+            self._apply(settings)
+        width, height = settings[0]
+        frame = pool.checkout((height, width, 3))
+        try:
+            start = time.perf_counter()
+            ok, image = self._capture.read(frame.array)
+            if not ok:
+                if self.is_file:
+                    raise EOFError(f"{self.device} finished")
+                raise RuntimeError(f"{self.device}: no frame")
+            copies = 0
+            if not np.shares_memory(image, frame.array):
+                # The driver delivers another size (or OpenCV reallocated): fit it into the slab
+                if image.shape == frame.array.shape:
+                    np.copyto(frame.array, image)
+                    copies = 1
+                else:
+                    cv2.resize(image, (width, height), dst=frame.array, interpolation=cv2.INTER_AREA)
+                    self.resized += 1
+            if self.rotation == 180:
+                cv2.flip(frame.array, -1, dst=frame.array)
+        except BaseException:
+            frame.release()
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        if not self.is_file:
+            buffer_ms = self._capture.get(cv2.CAP_PROP_POS_MSEC)
+            self._timestamps = (time.time_ns() // 1000, int(buffer_ms * 1e6)) if buffer_ms > 0 else None
+        self.frames += 1
+        self.read_ms += (1.0 if self.frames == 1 else 0.1) * (elapsed_ms - self.read_ms)
+        self._count(copies)
+        return frame
+
+    def frame_timestamps(self) -> Optional[Tuple[int, int]]:
+        """(wall_us, monotonic ns) of the last frame from its V4L2 buffer timestamp"""
+        return self._timestamps
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "device": self.device,
+            "fourcc": self.fourcc,
+            "negotiated": self.negotiated,
+            "frames": self.frames,
+            "resized": self.resized,
+            "restarts": self.restarts,
+            "read_ms": round(self.read_ms, 3),
+            **self.backend_stats(),
+        }
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Loop Recorder Module
+
+Subscribes to the compressed camera stream and writes it to fixed-duration,
+preallocated segment files, deleting the oldest segments to stay within the
+configured storage quota.
+"""
+
+import sys
+import os
+import json
+import time
+import queue
+import signal
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+
+from base_module import BaseDDSModule, ModuleState
+from dashcam_types import ImageData
+from cyclonedds.core import Qos, Policy
+from cyclonedds.sub import DataReader
+from cyclonedds.topic import Topic
+
+from segment_store import SegmentStore
+
+
+DEFAULT_CONFIG = {
+    "module_id": "recorder",
+    "domain_id": 0,
+    "input_topic": "camera/compressed_images",
+    "recording": {
+        "storage_path": "/var/dashcam/recordings",
+        "max_storage_gb": 32,
+        "cleanup_policy": "oldest_first",
+        "segment_duration_minutes": 5,
+        "protected_path": "/var/dashcam/events",
+        "max_protected_fraction": 0.5,
+        "preallocate_mb": 256,
+        "write_buffer_mb": 4,
+        "fsync_interval_s": 5.0,
+        "queue_size": 120,
+        "no_input_warning_s": 10.0
+    },
+    "logging": {
+        "level": "INFO",
+        "file": None,
+        "max_size_mb": 50,
+        "backup_count": 3
+    }
+}
+
+
+def load_config(config_file: Optional[str]) -> Dict[str, Any]:
+    """Load configuration from file over the defaults"""
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if config_file and os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            user_config = json.load(f)
+        recording = user_config.pop("recording", {})
+        log_config = user_config.pop("logging", {})
+        config.update(user_config)
+        config["recording"].update(recording)
+        config["logging"].update(log_config)
+    return config
+
+
+class Recorder(BaseDDSModule):
+    """Writes the compressed image stream to a segmented loop recording"""
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config["module_id"], domain_id=config.get("domain_id", 0),
+                         log_config=config.get("logging"))
+        self.config = config
+        recording = config["recording"]
+        self.store = SegmentStore(
+            storage_path=recording["storage_path"],
+            max_storage_bytes=int(recording["max_storage_gb"] * (1 << 30)),
+            segment_duration_s=recording["segment_duration_minutes"] * 60,
+            preallocate_bytes=int(recording.get("preallocate_mb", 0) * (1 << 20)),
+            buffer_bytes=int(recording.get("write_buffer_mb", 4) * (1 << 20)),
+            fsync_interval_s=float(recording.get("fsync_interval_s", 0.0)),
+            cleanup_policy=recording.get("cleanup_policy", "oldest_first"),
+            protected_path=recording.get("protected_path"),
+            max_protected_fraction=float(recording.get("max_protected_fraction", 0.5)),
+            logger=logging.getLogger(config["module_id"])
+        )
+
+        # The executor thread only enqueues; disk I/O happens on the writer thread
+        self.frames: "queue.Queue" = queue.Queue(maxsize=int(recording.get("queue_size", 120)))
+        self.dropped = 0
+        self.running = False
+        self.writer_thread: Optional[threading.Thread] = None
+
+        # Silence on the input topic is reported once per stretch, e.g. camera compression disabled
+        self.no_input_warning_s = float(recording.get("no_input_warning_s", 10.0))
+        self.last_frame_time = time.monotonic()
+        self.input_silent = False
+        if self.no_input_warning_s > 0:
+            self.executor.add_timer(self.no_input_warning_s / 2, self._check_input)
+
+        qos = Qos(Policy.Reliability.BestEffort, Policy.History.KeepLast(8))
+        self.image_topic = Topic(self.participant, config["input_topic"], ImageData)
+        self.image_reader = DataReader(self.participant, self.image_topic, qos=qos)
+        self.executor.add_reader(self.image_reader, self._on_image)
+
+    def _on_image(self, reader):
+        self.last_frame_time = time.monotonic()
+        if self.input_silent:
+            self.input_silent = False
+            self.info(f"Frames arriving on {self.config['input_topic']} again")
+        for sample in reader.take(N=16):
+            try:
+                self.frames.put_nowait(sample)
+            except queue.Full:
+                self.dropped += 1
+                self.metrics.counter("dropped").inc()
+
+    def start(self) -> None:
+        self.running = True
+        self.last_frame_time = time.monotonic()
+        self.status = ModuleState.Running
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+        self.info(f"Recording {self.config['input_topic']} to {self.store.storage_path}")
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.status = ModuleState.Stopping
+        self.running = False
+        if self.writer_thread:
+            self.writer_thread.join(timeout=5.0)
+        self.store.close()
+        self.status = ModuleState.Stopped
+        self.log_transport.flush()
+
+    def _check_input(self):
+        silent_s = time.monotonic() - self.last_frame_time
+        if self.running and not self.input_silent and silent_s >= self.no_input_warning_s:
+            self.input_silent = True
+            self.warn(f"No frames on {self.config['input_topic']} for {silent_s:.0f} s; "
+                      f"is compression enabled on the camera interface?")
+
+    def _writer_loop(self):
+        while self.running or not self.frames.empty():
+            try:
+                sample = self.frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                start_ns = time.monotonic_ns()
+                self.store.write_frame(sample.metadata.timestamp, sample.metadata.sequence_id,
+                                       sample.data)
+                self.metrics.histogram("latency").record((time.monotonic_ns() - start_ns) / 1000.0)
+                self.metrics.rate("processed").mark()
+            except OSError as e:
+                self.status = ModuleState.Error
+                self.error(f"Failed to write frame {sample.metadata.sequence_id}: {e}")
+
+    def _get_queue_size(self) -> int:
+        return self.frames.qsize()
+
+    def _get_status(self) -> dict:
+        status = self.store.stats()
+        status.update({
+            "module_id": self.module_id,
+            "running": self.running,
+            "queue_depth": self.frames.qsize(),
+            "dropped": self.dropped,
+            "input_silent": self.input_silent,
+        })
+        return status
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dashcam Loop Recorder Module")
+    parser.add_argument("--config", "-c", help="Configuration file path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    recorder = Recorder(load_config(args.config))
+    shutdown = threading.Event()
+
+    def request_shutdown(signum, frame):
+        shutdown.set()
+        recorder.request_stop()
+
+    signal.signal(signal.SIGINT, request_shutdown)
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    recorder.start()
+    try:
+        recorder.spin(shutdown)
+    finally:
+        recorder.stop()
+
+    print("Recorder shutdown complete")
+
+
+if __name__ == "__main__":
+    main()
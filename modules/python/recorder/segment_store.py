@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Segmented loop-recording storage
+
+Frames are appended to fixed-duration segment files. Each segment is
+preallocated with fallocate so the filesystem hands out contiguous extents up
+front, writes are gathered into a large buffer and issued sequentially, and the
+file is truncated to its real length when the segment closes. An in-memory
+index of closed segments and their sizes lets cleanup delete the oldest
+segments incrementally without rescanning the storage directory. Before a
+segment opens, room is made for a whole segment at the byte rate observed so
+far, and again whenever the open segment outgrows that reservation.
+
+Segments are named segment_<number>_<start_us>.seg. The number increases
+with every segment, so names never collide and sort in recording order even
+when the wall clock behind start_us has been stepped back. The duration that
+rolls a segment is accumulated from the advance between consecutive frame
+timestamps, each step clamped to MAX_FRAME_STEP_US: a clock stepped back adds
+nothing, and one stepped forward adds at most one step.
+
+A segment left open by a crash or power loss still has its preallocated tail.
+On startup each segment's frame headers are walked and the file is truncated
+after the last complete record, as SegmentWriter.close() would have done.
+"""
+
+import os
+import time
+import struct
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Any, List, Optional
+
+# Per-frame record: magic, timestamp_us, sequence_id, payload length
+FRAME_HEADER = struct.Struct("<4sQII")
+FRAME_MAGIC = b"DCFR"
+SEGMENT_SUFFIX = ".seg"
+# Largest timestamp advance between two frames counted towards a segment's duration
+MAX_FRAME_STEP_US = 1_000_000
+# Growth of the open segment's reservation past its estimate, between reclaims
+RESERVE_STEP_BYTES = 16 << 20
+
+
+@dataclass
+class Segment:
+    """Closed segment as tracked by the index"""
+    path: str
+    start_us: int
+    end_us: int
+    size: int
+    frames: int = 0
+
+
+class SegmentWriter:
+    """Append-only writer for one preallocated segment file"""
+
+    def __init__(self, path: str, preallocate_bytes: int, buffer_bytes: int,
+                 fsync_interval_s: float = 0.0):
+        self.path = path
+        self.preallocated = 0
+        self.size = 0
+        self.frames = 0
+        self.fsync_interval_s = fsync_interval_s
+        self.fsync_count = 0
+        self.fsync_seconds: List[float] = []
+        self._buffer = bytearray(buffer_bytes)
+        self._view = memoryview(self._buffer)
+        self._used = 0
+        self._last_sync = time.monotonic()
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        if preallocate_bytes > 0:
+            try:
+                os.posix_fallocate(self._fd, 0, preallocate_bytes)
+                self.preallocated = preallocate_bytes
+            except OSError:
+                # Filesystem without fallocate support (e.g. some FUSE mounts)
+                pass
+
+    @property
+    def allocated(self) -> int:
+        """Bytes this segment currently occupies on disk"""
+        return max(self.preallocated, self.size)
+
+    def write_frame(self, timestamp_us: int, sequence_id: int, payload) -> int:
+        """Append one frame record; returns bytes written"""
+        record_size = FRAME_HEADER.size + len(payload)
+        if self._used + record_size > len(self._buffer):
+            self.flush()
+        if record_size > len(self._buffer):
+            # Larger than the whole buffer: write straight through
+            os.write(self._fd, FRAME_HEADER.pack(FRAME_MAGIC, timestamp_us, sequence_id, len(payload)))
+            self._write_all(memoryview(payload))
+        else:
+            FRAME_HEADER.pack_into(self._buffer, self._used, FRAME_MAGIC, timestamp_us,
+                                   sequence_id, len(payload))
+            self._used += FRAME_HEADER.size
+            self._view[self._used:self._used + len(payload)] = payload
+            self._used += len(payload)
+        self.size += record_size
+        self.frames += 1
+        return record_size
+
+    def _write_all(self, data: memoryview):
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+
+    def flush(self):
+        """Issue buffered data as one large sequential write"""
+        if self._used:
+            self._write_all(self._view[:self._used])
+            self._used = 0
+        if self.fsync_interval_s > 0 and time.monotonic() - self._last_sync >= self.fsync_interval_s:
+            self._sync()
+
+    def _sync(self):
+        start = time.perf_counter()
+        os.fdatasync(self._fd)
+        self.fsync_seconds.append(time.perf_counter() - start)
+        self.fsync_count += 1
+        self._last_sync = time.monotonic()
+
+    def close(self, sync: bool = True):
+        """Flush, drop unused preallocated space and close the file"""
+        self.flush()
+        os.ftruncate(self._fd, self.size)
+        if sync:
+            self._sync()
+        os.close(self._fd)
+        self._view.release()
+
+
+class SegmentStore:
+    """Rolls segments by duration and keeps total storage under a quota"""
+
+    def __init__(self, storage_path: str, max_storage_bytes: int, segment_duration_s: float,
+                 preallocate_bytes: int = 0, buffer_bytes: int = 4 << 20,
+                 fsync_interval_s: float = 0.0, cleanup_policy: str = "oldest_first",
+                 protected_path: Optional[str] = None, max_protected_fraction: float = 0.5,
+                 logger: Optional[logging.Logger] = None):
+        if cleanup_policy != "oldest_first":
+            raise ValueError(f"Unsupported cleanup policy {cleanup_policy!r}")
+        self.storage_path = storage_path
+        self.max_storage_bytes = max_storage_bytes
+        self.segment_duration_us = int(segment_duration_s * 1_000_000)
+        self.preallocate_bytes = preallocate_bytes
+        self.buffer_bytes = buffer_bytes
+        self.fsync_interval_s = fsync_interval_s
+        self.protected_path = protected_path
+        self.protected_bytes = 0
+        # Event clips count against the quota up to this much; the loop keeps the rest
+        self.max_protected_bytes = int(max_storage_bytes * min(max(max_protected_fraction, 0.0), 1.0))
+        self._protected_over = False
+        self.logger = logger or logging.getLogger("recorder")
+
+        self.segments: Deque[Segment] = deque()
+        self.total_bytes = 0
+        self.current: Optional[SegmentWriter] = None
+        self._current_start_us = 0
+        self._current_duration_us = 0
+        self._last_timestamp_us = 0
+        self._next_number = 1
+        self._reserved_bytes = 0  # space made for the open segment
+        self._bytes_per_us: Optional[float] = None  # observed recording rate
+
+        # Statistics
+        self.bytes_written = 0
+        self.frames_written = 0
+        self.segments_deleted = 0
+        self.fsync_count = 0
+        self.fsync_max_s = 0.0
+
+        os.makedirs(storage_path, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """One-time directory scan at startup; the index is maintained in memory afterwards"""
+        existing = []
+        for entry in os.scandir(self.storage_path):
+            if not entry.is_file() or not entry.name.endswith(SEGMENT_SUFFIX):
+                continue
+            parts = entry.name[:-len(SEGMENT_SUFFIX)].split("_")
+            try:
+                # segment_<number>_<start_us>, or segment_<start_us> from before numbering
+                number, start_us = (int(parts[1]), int(parts[2])) if len(parts) == 3 else (0, int(parts[-1]))
+            except (ValueError, IndexError):
+                continue
+            segment = self._recover(entry.path, start_us)
+            if segment is not None:
+                existing.append((number, start_us, segment))
+        existing.sort(key=lambda entry: entry[:2])
+        for number, _, segment in existing:
+            self.segments.append(segment)
+            self.total_bytes += segment.size
+            self._next_number = max(self._next_number, number + 1)
+        if existing:
+            self.logger.info(f"Indexed {len(existing)} existing segments "
+                             f"({self.total_bytes / 1e9:.2f} GB)")
+
+    def _recover(self, path: str, start_us: int) -> Optional[Segment]:
+        """
+        Walk a segment's frame headers up to the first bad one (the zeroed
+        preallocated tail of a segment that was never closed, or a torn record)
+        and truncate the file there. A segment with no complete frame is removed.
+        """
+        fd = os.open(path, os.O_RDWR)
+        try:
+            size = os.fstat(fd).st_size
+            offset = frames = 0
+            end_us = start_us
+            while offset + FRAME_HEADER.size <= size:
+                magic, timestamp_us, _, length = FRAME_HEADER.unpack(
+                    os.pread(fd, FRAME_HEADER.size, offset))
+                if magic != FRAME_MAGIC or offset + FRAME_HEADER.size + length > size:
+                    break
+                offset += FRAME_HEADER.size + length
+                frames += 1
+                end_us = timestamp_us
+            if offset < size:
+                os.ftruncate(fd, offset)
+                self.logger.warning(f"Truncated unclosed segment {os.path.basename(path)} "
+                                    f"from {size} to {offset} bytes ({frames} frames)")
+        finally:
+            os.close(fd)
+        if frames == 0:
+            os.remove(path)
+            return None
+        return Segment(path, start_us, end_us, offset, frames)
+
+    def _segment_path(self, start_us: int) -> str:
+        """Path for the next segment; never one that exists, which SegmentWriter would truncate"""
+        while True:
+            path = os.path.join(self.storage_path,
+                                f"segment_{self._next_number:08d}_{start_us}{SEGMENT_SUFFIX}")
+            self._next_number += 1
+            if not os.path.exists(path):
+                return path
+
+    def write_frame(self, timestamp_us: int, sequence_id: int, payload):
+        """Append a frame, rolling to a new segment when the duration is reached"""
+        if self.current is not None:
+            step_us = min(max(timestamp_us - self._last_timestamp_us, 0), MAX_FRAME_STEP_US)
+            self._current_duration_us += step_us
+        if self.current is None or self._current_duration_us >= self.segment_duration_us:
+            self._roll(timestamp_us)
+        self.bytes_written += self.current.write_frame(timestamp_us, sequence_id, payload)
+        self.frames_written += 1
+        self._last_timestamp_us = timestamp_us
+        if self.current.size > self._reserved_bytes:
+            # Busier than estimated: free the next step now rather than at the next roll
+            self._reserved_bytes = self.current.size + RESERVE_STEP_BYTES
+            self._reclaim(self._reserved_bytes)
+
+    def _segment_estimate(self) -> int:
+        """Bytes a whole segment is expected to take, from the rate of segments written so far"""
+        if self._bytes_per_us is None:
+            return self.preallocate_bytes
+        return max(self.preallocate_bytes, int(self._bytes_per_us * self.segment_duration_us))
+
+    def _scan_protected(self):
+        """
+        Event clips are written by the camera module, so their total is refreshed
+        once per segment roll. The events directory only holds a handful of files.
+        """
+        if not self.protected_path or not os.path.isdir(self.protected_path):
+            self.protected_bytes = 0
+            return
+        self.protected_bytes = sum(entry.stat().st_size for entry in os.scandir(self.protected_path)
+                                   if entry.is_file())
+        over = self.protected_bytes > self.max_protected_bytes
+        if over and not self._protected_over:
+            self.logger.warning(f"Event clips use {self.protected_bytes / 1e9:.2f} GB, over their "
+                                f"{self.max_protected_bytes / 1e9:.2f} GB share of the quota; "
+                                f"the loop recording no longer gives up space for them")
+        self._protected_over = over
+
+    def _roll(self, timestamp_us: int):
+        self.close_segment()
+        self._scan_protected()
+        # Make room for the whole next segment before creating it
+        self._reserved_bytes = self._segment_estimate()
+        self._reclaim(self._reserved_bytes)
+        self.current = SegmentWriter(self._segment_path(timestamp_us), self.preallocate_bytes,
+                                     self.buffer_bytes, self.fsync_interval_s)
+        self._current_start_us = timestamp_us
+        self._current_duration_us = 0
+        self._last_timestamp_us = timestamp_us
+
+    def close_segment(self):
+        """Finish the open segment and add it to the index"""
+        if self.current is None:
+            return
+        writer = self.current
+        self.current = None
+        writer.close()
+        self.fsync_count += writer.fsync_count
+        self.fsync_max_s = max([self.fsync_max_s] + writer.fsync_seconds)
+        if writer.frames == 0:
+            os.unlink(writer.path)
+            return
+        self.segments.append(Segment(writer.path, self._current_start_us, self._last_timestamp_us,
+                                     writer.size, writer.frames))
+        self.total_bytes += writer.size
+        if self._current_duration_us > 0:
+            rate = writer.size / self._current_duration_us
+            self._bytes_per_us = rate if self._bytes_per_us is None else 0.5 * (self._bytes_per_us + rate)
+        self._reserved_bytes = 0
+        self._reclaim(0)
+
+    def _reclaim(self, reserve_bytes: int):
+        """Delete oldest segments until usage plus reserve fits the quota"""
+        protected_bytes = min(self.protected_bytes, self.max_protected_bytes)
+        while self.segments and \
+                self.total_bytes + protected_bytes + reserve_bytes > self.max_storage_bytes:
+            victim = self.segments.popleft()
+            self.total_bytes -= victim.size
+            try:
+                os.unlink(victim.path)
+            except FileNotFoundError:
+                pass
+            self.segments_deleted += 1
+
+    def used_bytes(self) -> int:
+        return self.total_bytes + self.protected_bytes + (self.current.allocated if self.current else 0)
+
+    def close(self):
+        self.close_segment()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "segments": len(self.segments),
+            "used_bytes": self.used_bytes(),
+            "protected_bytes": self.protected_bytes,
+            "max_storage_bytes": self.max_storage_bytes,
+            "bytes_written": self.bytes_written,
+            "frames_written": self.frames_written,
+            "segments_deleted": self.segments_deleted,
+            "fsync_count": self.fsync_count,
+            "fsync_max_ms": round(self.fsync_max_s * 1000.0, 2),
+        }
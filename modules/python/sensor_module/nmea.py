@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+NMEA 0183 parsing for the sensor module
+
+Handles the sentences a GPS receiver emits every fix (GGA, RMC, VTG, from any
+talker: GP, GN, GL, ...) plus a $PIMU sentence for an IMU bridged onto the
+same serial line:
+
+    $PIMU,<ax>,<ay>,<az>,<gx>,<gy>,<gz>*<checksum>
+
+with acceleration in m/s^2 and angular rate in deg/s. NmeaFusion merges the
+sentences into one sample dict in SensorSample field order.
+
+GPS and IMU readings are taken at different times. When both are emitted, a
+sample carries only the readings of the sentence that emitted it and leaves
+the other group empty, so a GPS position is never restamped with an IMU
+reading's time (or the reverse). Consumers interpolate each group between
+its own samples (see base_module/sensor_join.py).
+"""
+
+import math
+import calendar
+from functools import reduce
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+KNOTS_TO_MPS = 0.514444
+KMH_TO_MPS = 1.0 / 3.6
+
+NAN = float("nan")
+EMPTY_SAMPLE = {
+    "timestamp": 0, "fix_time": 0,
+    "latitude": NAN, "longitude": NAN, "altitude_m": NAN,
+    "speed_mps": NAN, "heading_deg": NAN, "hdop": NAN,
+    "fix_quality": 0, "satellites": 0,
+    "accel_x": NAN, "accel_y": NAN, "accel_z": NAN,
+    "gyro_x": NAN, "gyro_y": NAN, "gyro_z": NAN,
+}
+
+# Sentences and the sample fields they set, grouped by the sensor that takes the reading
+GPS_SENTENCES = ("GGA", "RMC", "VTG")
+IMU_SENTENCES = ("PIMU",)
+GPS_FIELDS = ("fix_time", "latitude", "longitude", "altitude_m", "speed_mps", "heading_deg",
+              "hdop", "fix_quality", "satellites")
+IMU_FIELDS = ("accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z")
+
+
+def checksum_ok(line: str) -> bool:
+    """Validate the *XX checksum; sentences without one are accepted"""
+    body, _, checksum = line.partition("*")
+    if not checksum:
+        return True
+    try:
+        expected = int(checksum[:2], 16)
+    except ValueError:
+        return False
+    return reduce(lambda acc, c: acc ^ ord(c), body[1:], 0) == expected
+
+
+def _float(value: str) -> float:
+    try:
+        return float(value) if value else NAN
+    except ValueError:
+        return NAN
+
+
+def _int(value: str) -> int:
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def _coordinate(value: str, hemisphere: str) -> float:
+    """ddmm.mmmm / dddmm.mmmm plus N/S/E/W to signed decimal degrees"""
+    if not value:
+        return NAN
+    try:
+        dot = value.index(".") if "." in value else len(value)
+        degrees = float(value[:dot - 2]) + float(value[dot - 2:]) / 60.0
+    except ValueError:
+        return NAN
+    return -degrees if hemisphere in ("S", "W") else degrees
+
+
+def _utc_us(time_field: str, date_field: str) -> int:
+    """hhmmss.ss and ddmmyy to Unix microseconds; 0 if either is missing"""
+    if len(time_field) < 6 or len(date_field) != 6:
+        return 0
+    try:
+        seconds = calendar.timegm((2000 + int(date_field[4:6]), int(date_field[2:4]), int(date_field[0:2]),
+                                   int(time_field[0:2]), int(time_field[2:4]), 0))
+        return int((seconds + float(time_field[4:])) * 1_000_000)
+    except ValueError:
+        return 0
+
+
+def parse_sentence(line: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Parse one sentence into (type, fields); None for unknown, malformed or corrupt lines"""
+    line = line.strip()
+    if not line.startswith("$") or not checksum_ok(line):
+        return None
+    parts = line.partition("*")[0][1:].split(",")
+    address = parts[0]
+    kind = "PIMU" if address == "PIMU" else address[2:]
+
+    try:
+        if kind == "GGA" and len(parts) >= 10:
+            return kind, {
+                "utc_time": parts[1],
+                "latitude": _coordinate(parts[2], parts[3]),
+                "longitude": _coordinate(parts[4], parts[5]),
+                "fix_quality": _int(parts[6]),
+                "satellites": _int(parts[7]),
+                "hdop": _float(parts[8]),
+                "altitude_m": _float(parts[9]),
+            }
+        if kind == "RMC" and len(parts) >= 10:
+            valid = parts[2] == "A"
+            return kind, {
+                "valid": valid,
+                "fix_time": _utc_us(parts[1], parts[9]),
+                "latitude": _coordinate(parts[3], parts[4]) if valid else NAN,
+                "longitude": _coordinate(parts[5], parts[6]) if valid else NAN,
+                "speed_mps": _float(parts[7]) * KNOTS_TO_MPS if valid else NAN,
+                "heading_deg": _float(parts[8]) if valid else NAN,
+            }
+        if kind == "VTG" and len(parts) >= 8:
+            return kind, {
+                "heading_deg": _float(parts[1]),
+                "speed_mps": _float(parts[7]) * KMH_TO_MPS,
+            }
+        if kind == "PIMU" and len(parts) >= 7:
+            ax, ay, az, gx, gy, gz = (_float(v) for v in parts[1:7])
+            return kind, {"accel_x": ax, "accel_y": ay, "accel_z": az,
+                          "gyro_x": gx, "gyro_y": gy, "gyro_z": gz}
+    except IndexError:
+        return None
+    return None
+
+
+class NmeaFusion:
+    """Merges GPS and IMU sentences into the latest sample
+
+    update() returns a copy of the sample whenever a sentence listed in
+    emit_on arrives: by default once per GPS epoch (RMC) and on every IMU
+    reading. A fix without RMC validity keeps the position as NaN. If both
+    groups emit, each sample leaves the other group's fields empty (NaN, 0).
+    """
+
+    def __init__(self, emit_on: Iterable[str] = ("RMC", "PIMU")):
+        self.emit_on = set(emit_on)
+        self.sample: Dict[str, Any] = dict(EMPTY_SAMPLE)
+        # Fields left empty in samples emitted by a sentence of each group
+        gps_emits = any(kind in self.emit_on for kind in GPS_SENTENCES)
+        imu_emits = any(kind in self.emit_on for kind in IMU_SENTENCES)
+        self._blank = {
+            "GPS": IMU_FIELDS if imu_emits else (),
+            "IMU": GPS_FIELDS if gps_emits else (),
+        }
+
+        # Statistics
+        self.sentences = 0
+        self.rejected = 0
+
+    def update(self, line: str) -> Optional[Dict[str, Any]]:
+        parsed = parse_sentence(line)
+        if parsed is None:
+            if line.strip():
+                self.rejected += 1
+            return None
+        self.sentences += 1
+        kind, fields = parsed
+        if kind == "GGA":
+            fields.pop("utc_time")
+            if fields["fix_quality"] == 0:
+                for key in ("latitude", "longitude", "altitude_m"):
+                    fields[key] = NAN
+        elif kind == "RMC":
+            fields.pop("valid")
+            if not fields["fix_time"]:
+                fields.pop("fix_time")
+        elif kind == "VTG" and math.isnan(fields["speed_mps"]):
+            return None
+        self.sample.update(fields)
+        if kind not in self.emit_on:
+            return None
+        sample = dict(self.sample)
+        for key in self._blank["IMU" if kind in IMU_SENTENCES else "GPS"]:
+            sample[key] = EMPTY_SAMPLE[key]
+        return sample
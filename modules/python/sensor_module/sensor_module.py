@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+GPS/IMU Sensor Module
+
+Reads NMEA sentences from a serial GPS receiver (optionally carrying $PIMU
+IMU readings on the same line), or replays a recorded NMEA log for testing,
+and publishes a SensorSample for every GPS epoch and IMU reading. Samples are
+stamped with the system clock on arrival, minus the configured receiver
+latency, so they share the time base of ImageMetadata.timestamp and can be
+joined to frames with sensor_join.SensorJoin.
+"""
+
+import sys
+import os
+import json
+import time
+import signal
+import logging
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+
+from base_module import BaseDDSModule, ModuleState
+from dashcam_types import SensorSample
+from cyclonedds.core import Qos, Policy
+from cyclonedds.pub import DataWriter
+from cyclonedds.topic import Topic
+
+from nmea import NmeaFusion, parse_sentence
+
+# Serial imports (with fallback for replay-only use)
+try:
+    import serial
+    HAS_SERIAL = True
+except ImportError:
+    HAS_SERIAL = False
+
+
+DEFAULT_CONFIG = {
+    "module_id": "sensor_module",
+    "domain_id": 0,
+    "output_topic": "sensor/samples",
+    "source": {
+        "type": "serial",
+        "port": "/dev/serial0",
+        "baudrate": 9600,
+        "replay_file": None,
+        "replay_speed": 1.0,
+        "replay_loop": True,
+        "latency_ms": 0.0,
+        "emit_on": ["RMC", "PIMU"]
+    },
+    "logging": {
+        "level": "INFO",
+        "file": None,
+        "max_size_mb": 50,
+        "backup_count": 3
+    }
+}
+
+
+def load_config(config_file: Optional[str]) -> Dict[str, Any]:
+    """Load configuration from file over the defaults"""
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if config_file and os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            user_config = json.load(f)
+        source = user_config.pop("source", {})
+        log_config = user_config.pop("logging", {})
+        config.update(user_config)
+        config["source"].update(source)
+        config["logging"].update(log_config)
+    return config
+
+
+class SensorModule(BaseDDSModule):
+    """Publishes GPS/IMU samples parsed from NMEA"""
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config["module_id"], domain_id=config.get("domain_id", 0),
+                         log_config=config.get("logging"))
+        self.config = config
+        source = config["source"]
+        self.fusion = NmeaFusion(source.get("emit_on", ["RMC", "PIMU"]))
+        self.latency_us = int(float(source.get("latency_ms", 0.0)) * 1000)
+        self.running = False
+        self.reader_thread: Optional[threading.Thread] = None
+        self.last_sample: Optional[Dict[str, Any]] = None
+
+        # Samples are small and a joiner wants every one, so keep a short reliable history
+        qos = Qos(Policy.Reliability.Reliable(0), Policy.History.KeepLast(64))
+        self.sample_topic = Topic(self.participant, config["output_topic"], SensorSample)
+        self.sample_writer = DataWriter(self.participant, self.sample_topic, qos=qos)
+
+    def start(self) -> None:
+        self.running = True
+        self.status = ModuleState.Running
+        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.reader_thread.start()
+        self.info(f"Publishing sensor samples on {self.config['output_topic']}")
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.status = ModuleState.Stopping
+        self.running = False
+        if self.reader_thread:
+            self.reader_thread.join(timeout=5.0)
+        self.status = ModuleState.Stopped
+        self.log_transport.flush()
+
+    def _lines(self) -> Iterator[str]:
+        source = self.config["source"]
+        if source["type"] == "replay":
+            return self._replay_lines(source["replay_file"], float(source.get("replay_speed", 1.0)),
+                                      bool(source.get("replay_loop", True)))
+        return self._serial_lines(source["port"], int(source.get("baudrate", 9600)))
+
+    def _serial_lines(self, port: str, baudrate: int) -> Iterator[str]:
+        if not HAS_SERIAL:
+            raise RuntimeError("pyserial is not installed; use a replay source")
+        with serial.Serial(port, baudrate, timeout=0.5) as device:
+            self.info(f"Reading NMEA from {port} at {baudrate} baud")
+            while self.running:
+                line = device.readline()
+                if line:
+                    yield line.decode("ascii", errors="replace")
+
+    def _replay_lines(self, path: str, speed: float, loop: bool) -> Iterator[str]:
+        """Replay a log, paced by the GPS fix times it contains"""
+        self.info(f"Replaying NMEA from {path} at {speed:g}x")
+        while self.running:
+            first_fix = None
+            started = time.monotonic()
+            with open(path, "r", errors="replace") as f:
+                for line in f:
+                    if not self.running:
+                        return
+                    parsed = parse_sentence(line) if "RMC" in line else None
+                    fix_time = parsed[1]["fix_time"] if parsed and parsed[0] == "RMC" else 0
+                    if fix_time:
+                        if first_fix is None or fix_time < first_fix:
+                            first_fix, started = fix_time, time.monotonic()
+                        delay = started + (fix_time - first_fix) / 1e6 / speed - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    yield line
+            if not loop:
+                return
+
+    def _reader_loop(self):
+        try:
+            for line in self._lines():
+                sample = self.fusion.update(line)
+                if sample is not None:
+                    self._publish(sample)
+        except Exception as e:
+            self.status = ModuleState.Error
+            self.error(f"Sensor source failed: {e}")
+        self.running = False
+
+    def _publish(self, sample: Dict[str, Any]):
+        start_ns = time.monotonic_ns()
+        sample["timestamp"] = time.time_ns() // 1000 - self.latency_us
+        self.sample_writer.write(SensorSample(source_module=self.module_id, **sample))
+        self.last_sample = sample
+        self.metrics.histogram("latency").record((time.monotonic_ns() - start_ns) / 1000.0)
+        self.metrics.rate("processed").mark()
+
+    def _get_status(self) -> dict:
+        return {
+            "module_id": self.module_id,
+            "running": self.running,
+            "source": self.config["source"]["type"],
+            "sentences": self.fusion.sentences,
+            "rejected": self.fusion.rejected,
+            "published": self.metrics.rate("processed").total,
+            "last_sample": self.last_sample,
+        }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dashcam GPS/IMU Sensor Module")
+    parser.add_argument("--config", "-c", help="Configuration file path")
+    parser.add_argument("--replay", help="Replay an NMEA log instead of reading the serial port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    config = load_config(args.config)
+    if args.replay:
+        config["source"].update(type="replay", replay_file=args.replay)
+    module = SensorModule(config)
+    shutdown = threading.Event()
+
+    def request_shutdown(signum, frame):
+        shutdown.set()
+        module.request_stop()
+
+    signal.signal(signal.SIGINT, request_shutdown)
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    module.start()
+    try:
+        module.spin(shutdown)
+    finally:
+        module.stop()
+
+    print("Sensor module shutdown complete")
+
+
+if __name__ == "__main__":
+    main()
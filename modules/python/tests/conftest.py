@@ -0,0 +1,11 @@
+"""
+The modules import each other through sys.path, as they do when run from
+their own directories; put the module directories on the path for tests.
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+for module_dir in ("base_module", "camera_interface", "recorder", "sensor_module"):
+    sys.path.insert(0, os.path.abspath(os.path.join(ROOT, module_dir)))
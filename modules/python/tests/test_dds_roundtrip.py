@@ -0,0 +1,87 @@
+"""
+ImageData round trip over CycloneDDS: a frame published by one participant
+must come back with the same metadata and payload bytes.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("cyclonedds")
+
+from cyclonedds.core import Qos, Policy
+from cyclonedds.domain import DomainParticipant
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.topic import Topic
+from cyclonedds.util import duration
+
+from dashcam_types import ImageData, ImageMetadata, _ImageDataWire
+
+# Keep clear of the domain a running dashcam uses
+DOMAIN_ID = 97
+
+
+def _frame(sequence_id: int, width: int = 64, height: int = 48) -> ImageData:
+    data = bytes((sequence_id + i) % 256 for i in range(width * height * 3))
+    metadata = ImageMetadata(
+        timestamp=1_700_000_000_000_000 + sequence_id,
+        sensor_timestamp=123_456_789 + sequence_id,
+        sequence_id=sequence_id,
+        width=width,
+        height=height,
+        channels=3,
+        format="RGB888",
+        encoding="raw",
+        camera_exposure=16.5,
+        camera_gain=2.0,
+        source_module="test_camera",
+    )
+    return ImageData(metadata=metadata, data=data)
+
+
+def _read(reader, count: int, timeout: float = 5.0):
+    samples = []
+    deadline = time.monotonic() + timeout
+    while len(samples) < count and time.monotonic() < deadline:
+        samples.extend(reader.take(N=count))
+        time.sleep(0.01)
+    return samples
+
+
+@pytest.fixture
+def participant():
+    return DomainParticipant(DOMAIN_ID)
+
+
+def test_image_data_round_trip(participant):
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepLast(4))
+    topic = Topic(participant, "test/roundtrip_images", ImageData)
+    reader = DataReader(participant, topic, qos=qos)
+    writer = DataWriter(participant, topic, qos=qos)
+
+    sent = [_frame(1), _frame(2)]
+    for frame in sent:
+        writer.write(frame)
+
+    received = _read(reader, len(sent))
+    assert len(received) == len(sent)
+    for expected, sample in zip(sent, received):
+        assert sample.metadata == expected.metadata
+        assert isinstance(sample.data, bytes)
+        assert sample.data == expected.data
+
+
+def test_image_data_matches_idl_layout(participant):
+    """Readers typed from the IDL (sequence<octet>) see the same payload"""
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepLast(4))
+    writer = DataWriter(participant, Topic(participant, "test/roundtrip_wire", ImageData), qos=qos)
+    reader = DataReader(participant, Topic(participant, "test/roundtrip_wire", _ImageDataWire), qos=qos)
+
+    frame = _frame(7, width=16, height=8)
+    writer.write(frame)
+
+    received = _read(reader, 1)
+    assert len(received) == 1
+    assert received[0].metadata == frame.metadata
+    assert bytes(received[0].data) == frame.data
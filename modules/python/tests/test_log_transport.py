@@ -0,0 +1,57 @@
+"""
+AsyncLogTransport repeat rate limiting.
+"""
+
+import logging
+
+import pytest
+
+from log_transport import AsyncLogHandler, AsyncLogTransport
+
+
+@pytest.fixture
+def transport():
+    transport = AsyncLogTransport("test", level=0, rate_limit_burst=3, rate_limit_window_s=60.0)
+    records = []
+    transport.add_sink(records.extend)
+    transport.records = records
+    yield transport
+    transport.close()
+
+
+def test_formatted_messages_from_one_site_are_limited(transport):
+    kept = [transport.emit(1, f"Frame {i} late", site=("camera.py", 42)) for i in range(10)]
+    assert kept.count(True) == 3
+    assert transport.suppressed == 7
+
+
+def test_sites_are_limited_independently(transport):
+    for i in range(5):
+        transport.emit(1, f"a {i}", site="site-a")
+        transport.emit(1, f"b {i}", site="site-b")
+    transport.flush()
+    assert len(transport.records) == 6
+
+
+def test_template_is_the_key_without_a_site(transport):
+    kept = [transport.emit(1, "frame %d", (i,)) for i in range(10)]
+    assert kept.count(True) == 3
+    # Unhashable args no longer matter for the key
+    assert transport.emit(1, "config %s", ([1, 2],))
+
+
+def test_module_logging_is_limited_per_call_site(transport):
+    logger = logging.getLogger("test_log_transport")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = AsyncLogHandler(transport)
+    logger.addHandler(handler)
+    try:
+        for i in range(10):
+            logger.warning(f"Sensor read failed after {i} retries")
+        for i in range(10):
+            logger.warning(f"Sensor read failed after {i} retries")
+    finally:
+        logger.removeHandler(handler)
+    transport.flush()
+    assert len(transport.records) == 6
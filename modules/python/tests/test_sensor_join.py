@@ -0,0 +1,77 @@
+import math
+
+from sensor_join import SensorJoin, EMPTY_GPS
+
+NAN = float("nan")
+START_US = 1_700_000_000_000_000
+
+
+def imu_sample(t_us):
+    return dict(EMPTY_GPS, accel_x=t_us / 1e6, accel_y=0.0, accel_z=9.8, gyro_x=0.0, gyro_y=0.0, gyro_z=0.0)
+
+
+def gps_sample(t_us):
+    # One degree of latitude per second, so the expected position at t is t in seconds
+    return dict(EMPTY_GPS, fix_time=t_us, latitude=t_us / 1e6, longitude=7.0, fix_quality=1, satellites=8,
+                accel_x=NAN, accel_y=NAN, accel_z=NAN, gyro_x=NAN, gyro_y=NAN, gyro_z=NAN)
+
+
+def run(duration_s=5.0, imu_hz=50, gps_hz=1, fps=30):
+    """Feed IMU samples, GPS fixes and frames in arrival order against a simulated clock"""
+    now = [START_US]
+    join = SensorJoin(clock=lambda: now[0])
+    events = []
+    for i in range(int(duration_s * imu_hz)):
+        events.append((START_US + i * 1_000_000 // imu_hz, 0, "imu"))
+    for i in range(int(duration_s * gps_hz)):
+        events.append((START_US + i * 1_000_000 // gps_hz, 0, "gps"))
+    for i in range(int(duration_s * fps)):
+        events.append((START_US + i * 1_000_000 // fps, 1, "frame"))
+    resolved = []
+    for t_us, _, kind in sorted(events):
+        now[0] = t_us
+        if kind == "imu":
+            resolved += join.add_sample(t_us, imu_sample(t_us - START_US))
+        elif kind == "gps":
+            resolved += join.add_sample(t_us, gps_sample(t_us - START_US))
+        else:
+            resolved += join.request(t_us, t_us)
+    return join, resolved
+
+
+def test_gps_fields_interpolated_between_epochs_at_mixed_rates():
+    join, resolved = run()
+    checked = 0
+    for _, timestamp, match in resolved:
+        # The first frame has no earlier samples and frames after the last fix no later one
+        if not START_US < timestamp <= START_US + 4_000_000 or match is None:
+            continue
+        sample, interpolated, _ = match
+        expected = (timestamp - START_US) / 1e6
+        assert math.isclose(sample["latitude"], expected, abs_tol=1e-6), (timestamp, sample["latitude"])
+        assert math.isclose(sample["accel_x"], expected, abs_tol=1e-6)
+        assert interpolated
+        checked += 1
+    assert checked >= 115, checked
+
+
+def test_frames_resolved_in_order_and_bounded_without_a_next_fix():
+    join, resolved = run()
+    now = START_US + 10_000_000
+    join.clock = lambda: now
+    resolved += join.expire()
+    timestamps = [timestamp for _, timestamp, _ in resolved]
+    assert timestamps == sorted(timestamps)
+    assert len(timestamps) == 150
+    assert join.stats()["pending"] == 0
+
+
+def test_imu_only_frames_do_not_wait_for_gps():
+    now = [START_US]
+    join = SensorJoin(clock=lambda: now[0])
+    for i in range(10):
+        now[0] = START_US + i * 20_000
+        join.add_sample(now[0], imu_sample(i * 20_000))
+    resolved = join.request("frame", START_US + 50_000)
+    assert [key for key, _, _ in resolved] == ["frame"]
+    assert math.isnan(resolved[0][2][0]["latitude"])
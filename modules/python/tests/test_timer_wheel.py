@@ -0,0 +1,123 @@
+"""
+TimerWheel scheduling, ordering and cancellation against a simulated clock.
+"""
+
+import pytest
+
+from base_module import TimerWheel
+
+TICK_S = 0.01
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def wheel(clock):
+    return TimerWheel(tick_s=TICK_S, slots=64, clock=clock)
+
+
+def run_until(wheel, clock, end: float, step: float = TICK_S):
+    """Advance the clock in steps, returning (time, name) for every firing"""
+    fired = []
+    while clock.now < end - 1e-9:
+        clock.now += step
+        fired.extend((round(clock.now, 6), timer.callback()) for timer in wheel.advance())
+    return fired
+
+
+def test_one_shot_fires_once_at_its_deadline(wheel, clock):
+    start = clock.now
+    wheel.schedule(0.05, lambda: "once", periodic=False)
+    fired = run_until(wheel, clock, start + 0.2)
+    assert [name for _, name in fired] == ["once"]
+    assert fired[0][0] == pytest.approx(start + 0.05, abs=TICK_S)
+
+
+def test_timers_fire_in_deadline_order(wheel, clock):
+    start = clock.now
+    wheel.schedule(0.07, lambda: "c", periodic=False)
+    wheel.schedule(0.02, lambda: "a", periodic=False)
+    wheel.schedule(0.04, lambda: "b", periodic=False)
+    fired = run_until(wheel, clock, start + 0.1)
+    assert [name for _, name in fired] == ["a", "b", "c"]
+
+
+def test_periodic_timer_does_not_drift(wheel, clock):
+    start = clock.now
+    wheel.schedule(0.05, lambda: "tick")
+    fired = run_until(wheel, clock, start + 1.0)
+    assert len(fired) == 20
+    assert fired[-1][0] == pytest.approx(start + 1.0, abs=TICK_S)
+
+
+def test_periodic_timer_skips_missed_firings(wheel, clock):
+    start = clock.now
+    wheel.schedule(0.05, lambda: "tick")
+    clock.now = start + 0.32
+    assert len(wheel.advance()) == 1
+    # Rescheduled from now rather than replaying the missed intervals
+    assert run_until(wheel, clock, start + 0.36) == []
+    assert len(run_until(wheel, clock, start + 0.38)) == 1
+
+
+def test_timer_beyond_one_revolution(wheel, clock):
+    start = clock.now
+    wheel.schedule(1.0, lambda: "late", periodic=False)  # 100 ticks on a 64 slot wheel
+    fired = run_until(wheel, clock, start + 1.2)
+    assert len(fired) == 1
+    assert fired[0][0] == pytest.approx(start + 1.0, abs=TICK_S)
+
+
+def test_cancelled_timer_does_not_fire(wheel, clock):
+    start = clock.now
+    cancelled = wheel.schedule(0.03, lambda: "cancelled")
+    wheel.schedule(0.05, lambda: "kept", periodic=False)
+    cancelled.cancel()
+    assert [name for _, name in run_until(wheel, clock, start + 0.2)] == ["kept"]
+
+
+def test_cancel_periodic_after_firing(wheel, clock):
+    start = clock.now
+    timer = wheel.schedule(0.02, lambda: "tick")
+    assert len(run_until(wheel, clock, start + 0.05)) == 2
+    timer.cancel()
+    assert run_until(wheel, clock, start + 0.2) == []
+
+
+def test_next_timeout_tracks_earliest_live_timer(wheel, clock):
+    revolution = 64 * TICK_S
+    assert wheel.next_timeout() == pytest.approx(revolution)
+
+    far = wheel.schedule(0.3, lambda: "far", periodic=False)
+    near = wheel.schedule(0.1, lambda: "near", periodic=False)
+    assert wheel.next_timeout() == pytest.approx(0.1, abs=TICK_S)
+
+    near.cancel()
+    assert wheel.next_timeout() == pytest.approx(0.3, abs=TICK_S)
+
+    clock.now += 0.3
+    assert wheel.advance() == [far]
+    assert wheel.next_timeout() == pytest.approx(revolution)
+
+
+def test_next_timeout_follows_periodic_reschedule(wheel, clock):
+    wheel.schedule(0.05, lambda: "tick")
+    clock.now += 0.05
+    assert len(wheel.advance()) == 1
+    assert wheel.next_timeout() == pytest.approx(0.05, abs=TICK_S)
+
+
+def test_next_timeout_is_capped_at_one_revolution(wheel, clock):
+    wheel.schedule(5.0, lambda: "later", periodic=False)
+    assert wheel.next_timeout() == pytest.approx(64 * TICK_S)
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Web Interface Module
+
+Live preview server for the dashboard. Frames from the camera are encoded to
+JPEG at most once each, at a capped preview resolution and rate, into a single
+shared buffer; every HTTP MJPEG and WebSocket client is sent that same buffer.
+Clients always get the newest frame: a client that falls behind skips the
+frames it missed instead of queueing them, and one that stops reading is
+disconnected once its socket buffer stays full for client_timeout_s.
+
+Endpoints:
+    GET /stream.mjpg   multipart/x-mixed-replace MJPEG stream
+    GET /ws            WebSocket, one binary message per JPEG frame
+    GET /snapshot.jpg  latest frame (waits for a fresh one when nobody is streaming)
+    GET /stats         preview and per-client statistics as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import signal
+import asyncio
+import hashlib
+import logging
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "base_module"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "camera_interface"))
+
+import cv2
+import numpy as np
+
+from async_module import AsyncDDSModule
+from dashcam_types import ImageData, SharedImageDescriptor
+from shm_transport import FrameDescriptor, SharedFrameReader
+from cyclonedds.core import Qos, Policy
+
+
+DEFAULT_CONFIG = {
+    "module_id": "web_interface",
+    "domain_id": 0,
+    "host": "0.0.0.0",
+    "port": 8080,
+    "image_topic": "camera/preview_images",
+    "descriptor_topic": None,
+    "preview": {
+        "max_width": 640,
+        "max_height": 360,
+        "max_fps": 10,
+        "quality": 70
+    },
+    "clients": {
+        "max_clients": 16,
+        "client_timeout_s": 5.0,
+        "write_buffer_kb": 256
+    }
+}
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MJPEG_BOUNDARY = "dashcamframe"
+WEBSOCKET_MAX_MESSAGE = 64 * 1024
+
+
+def load_config(config_file: Optional[str]) -> Dict[str, Any]:
+    """Load configuration from file over the defaults"""
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    if config_file and os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            user_config = json.load(f)
+        for section in ("preview", "clients"):
+            config[section].update(user_config.pop(section, {}))
+        config.update(user_config)
+    return config
+
+
+def _websocket_header(opcode: int, length: int) -> bytes:
+    """Header of a final, unmasked server-to-client frame"""
+    first = 0x80 | opcode
+    if length < 126:
+        return bytes([first, length])
+    if length < 1 << 16:
+        return bytes([first, 126]) + length.to_bytes(2, "big")
+    return bytes([first, 127]) + length.to_bytes(8, "big")
+
+
+class PreviewFrame:
+    """Latest encoded frame shared by all clients"""
+
+    def __init__(self):
+        self.sequence = 0
+        self.jpeg = b""
+        self.timestamp_us = 0
+        self.encoded_at = 0.0
+        self._changed = asyncio.Event()
+
+    def publish(self, jpeg: bytes, timestamp_us: int):
+        self.sequence += 1
+        self.jpeg = jpeg
+        self.timestamp_us = timestamp_us
+        self.encoded_at = time.monotonic()
+        # Wake everyone waiting, then re-arm for the next frame
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_newer(self, sequence: int) -> None:
+        while self.sequence <= sequence:
+            await self._changed.wait()
+
+
+class PreviewClient:
+    """Per-connection send state"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind: str, peer: Any):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.peer = str(peer)
+        self.connected_at = time.monotonic()
+        self.last_sequence = 0
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+        self.lag_ms = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "peer": self.peer,
+            "connected_s": round(time.monotonic() - self.connected_at, 1),
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "bytes_sent": self.bytes_sent,
+            "lag_ms": round(self.lag_ms, 1),
+        }
+
+
+class WebInterface(AsyncDDSModule):
+    """Encodes the camera stream once and fans it out to preview clients"""
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config["module_id"], domain_id=config.get("domain_id", 0),
+                         log_config=config.get("logging"))
+        self.config = config
+        self.preview_config = config["preview"]
+        self.client_config = config["clients"]
+        self.max_size = (int(self.preview_config["max_width"]), int(self.preview_config["max_height"]))
+        self.min_interval = 1.0 / float(self.preview_config["max_fps"])
+        self.frame: Optional[PreviewFrame] = None
+        self.clients: Dict[int, PreviewClient] = {}
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self.shm_reader = SharedFrameReader() if config.get("descriptor_topic") else None
+        # One encoder thread: cv2 releases the GIL, and frames are encoded in order
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-encode")
+        self._encoding = False
+        self._last_accepted = 0.0
+        self._snapshot_until = 0.0
+        self.frames_received = 0
+        self.frames_encoded = 0
+        self.frames_passthrough = 0
+        self.frames_skipped = 0
+        self.clients_dropped = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def main(self) -> None:
+        self.frame = PreviewFrame()
+        qos = Qos(Policy.Reliability.BestEffort, Policy.History.KeepLast(1))
+        if self.config.get("image_topic"):
+            self.spawn(self._consume_images(self.reader(self.config["image_topic"], ImageData, qos=qos, batch=4)))
+        if self.config.get("descriptor_topic"):
+            self.spawn(self._consume_descriptors(
+                self.reader(self.config["descriptor_topic"], SharedImageDescriptor, qos=qos, batch=4)))
+        self.server = await asyncio.start_server(self._handle_connection, self.config["host"],
+                                                 self.config["port"])
+        self.info(f"Preview server listening on {self.config['host']}:{self.config['port']}")
+        try:
+            await self._stop_event.wait()
+        finally:
+            self.server.close()
+            # wait_closed() waits for every handler, and streaming handlers only
+            # return when a client leaves; cancel them rather than hang on shutdown
+            handlers = list(self._handlers)
+            for handler in handlers:
+                handler.cancel()
+            for connection in list(self._connections):
+                connection.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self.server.wait_closed()
+            self._encoder.shutdown(wait=False)
+            if self.shm_reader is not None:
+                self.shm_reader.close()
+
+    # Frame intake ----------------------------------------------------------
+
+    def _accept_frame(self) -> bool:
+        """Only encode when someone is watching, the encoder is idle and the fps cap allows"""
+        self.frames_received += 1
+        now = time.monotonic()
+        watched = self.clients or now < self._snapshot_until
+        if not watched or self._encoding or now - self._last_accepted < self.min_interval:
+            self.frames_skipped += 1
+            return False
+        self._last_accepted = now
+        return True
+
+    async def _consume_images(self, reader) -> None:
+        async for sample in reader:
+            if not self._accept_frame():
+                continue
+            metadata = sample.metadata
+            data = sample.data
+            if metadata.format == "JPEG" and metadata.width <= self.max_size[0] \
+                    and metadata.height <= self.max_size[1]:
+                # Already a preview-sized JPEG (camera/preview_images): no transcode
+                self.frames_passthrough += 1
+                self.frame.publish(data, metadata.timestamp)
+                continue
+            if metadata.format == "JPEG":
+                job = (self._transcode_jpeg, data)
+            else:
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(
+                    metadata.height, metadata.width, metadata.channels)
+                job = (self._encode, frame)
+            await self._run_encode(job, metadata.timestamp)
+
+    async def _consume_descriptors(self, reader) -> None:
+        async for sample in reader:
+            if not self._accept_frame():
+                continue
+            metadata = sample.metadata
+            descriptor = FrameDescriptor(sample.segment, sample.slot, metadata.sequence_id,
+                                         metadata.timestamp,
+                                         (metadata.height, metadata.width, metadata.channels))
+            await self._run_encode((self._encode_shared, descriptor), metadata.timestamp)
+
+    async def _run_encode(self, job: Tuple, timestamp_us: int) -> None:
+        self._encoding = True
+        try:
+            jpeg = await self.loop.run_in_executor(self._encoder, *job)
+        except Exception as e:
+            self.warn(f"Preview encode failed: {e!r}")
+            jpeg = None
+        finally:
+            self._encoding = False
+        if jpeg is not None:
+            self.frames_encoded += 1
+            self.frame.publish(jpeg, timestamp_us)
+
+    def _encode(self, frame: np.ndarray) -> Optional[bytes]:
+        height, width = frame.shape[:2]
+        scale = min(self.max_size[0] / width, self.max_size[1] / height, 1.0)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)),
+                               interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", frame,
+                                   [cv2.IMWRITE_JPEG_QUALITY, int(self.preview_config["quality"])])
+        return encoded.tobytes() if ok else None
+
+    def _transcode_jpeg(self, data: bytes) -> Optional[bytes]:
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return self._encode(frame) if frame is not None else None
+
+    def _encode_shared(self, descriptor: FrameDescriptor) -> Optional[bytes]:
+        frame = self.shm_reader.view(descriptor)
+        if frame is None:
+            return None
+        jpeg = self._encode(frame)
+        # The writer may have reused the slot while we were reading it
+        return jpeg if self.shm_reader.is_valid(descriptor) else None
+
+    # HTTP ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            await self._serve_connection(reader, writer)
+        except asyncio.CancelledError:
+            # Shutdown; the connection is closed by _serve_connection's cleanup
+            pass
+        finally:
+            self._handlers.discard(task)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10.0)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        method, path, _ = (lines[0].split(" ") + ["", "", ""])[:3]
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        path = path.split("?", 1)[0]
+
+        self._connections.add(writer)
+        try:
+            if method != "GET":
+                await self._respond(writer, 405, "text/plain", b"Method not allowed")
+            elif path == "/stats":
+                await self._respond(writer, 200, "application/json",
+                                    json.dumps(self._get_status()).encode())
+            elif path == "/snapshot.jpg":
+                if not self.clients:
+                    # Frames are only encoded while watched; ask for the next one
+                    self._snapshot_until = time.monotonic() + 2.0
+                    try:
+                        await asyncio.wait_for(self.frame.wait_newer(self.frame.sequence), 2.0)
+                    except asyncio.TimeoutError:
+                        pass
+                if self.frame.jpeg:
+                    await self._respond(writer, 200, "image/jpeg", self.frame.jpeg)
+                else:
+                    await self._respond(writer, 503, "text/plain", b"No frame yet")
+            elif path in ("/stream.mjpg", "/ws"):
+                if len(self.clients) >= int(self.client_config["max_clients"]):
+                    await self._respond(writer, 503, "text/plain", b"Too many preview clients")
+                elif path == "/ws":
+                    await self._serve_websocket(reader, writer, headers)
+                else:
+                    await self._serve_mjpeg(writer)
+            else:
+                await self._respond(writer, 404, "text/plain", b"Not found")
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes):
+        reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed",
+                  400: "Bad Request", 503: "Service Unavailable"}.get(status, "")
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def _serve_mjpeg(self, writer: asyncio.StreamWriter):
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; "
+                     f"boundary={MJPEG_BOUNDARY}\r\nCache-Control: no-cache\r\n"
+                     f"Connection: close\r\n\r\n".encode())
+
+        def frame_parts(jpeg: bytes):
+            header = (f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                      f"Content-Length: {len(jpeg)}\r\n\r\n").encode()
+            return header, jpeg, b"\r\n"
+        await self._stream(writer, "mjpeg", frame_parts)
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               headers: Dict[str, str]):
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or not key:
+            await self._respond(writer, 400, "text/plain", b"Expected a WebSocket upgrade")
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                     f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+
+        def frame_parts(jpeg: bytes):
+            # Unmasked binary frame
+            return _websocket_header(0x2, len(jpeg)), jpeg
+        closed = asyncio.ensure_future(self._read_websocket(reader, writer))
+        await self._stream(writer, "websocket", frame_parts, closed)
+
+    async def _read_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer pings and return once the client closes or goes away"""
+        try:
+            while True:
+                first, second = await reader.readexactly(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if length == 126:
+                    length = int.from_bytes(await reader.readexactly(2), "big")
+                elif length == 127:
+                    length = int.from_bytes(await reader.readexactly(8), "big")
+                if length > WEBSOCKET_MAX_MESSAGE:
+                    return
+                mask = await reader.readexactly(4) if second & 0x80 else b""
+                payload = await reader.readexactly(length)
+                if mask:
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+                if opcode == 0x8:
+                    # Echo the status code back to complete the closing handshake
+                    writer.write(_websocket_header(0x8, min(len(payload), 2)) + payload[:2])
+                    return
+                if opcode == 0x9:
+                    writer.write(_websocket_header(0xA, len(payload)) + payload)
+                # Pongs and data messages from the client are ignored
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    async def _stream(self, writer: asyncio.StreamWriter, kind: str, frame_parts,
+                      closed: Optional[asyncio.Future] = None):
+        """Send the newest shared frame whenever it changes until the client goes away"""
+        client = PreviewClient(kind, writer.get_extra_info("peername"))
+        writer.transport.set_write_buffer_limits(high=int(self.client_config["write_buffer_kb"]) * 1024)
+        timeout = float(self.client_config["client_timeout_s"])
+        self.clients[client.id] = client
+        self.info(f"Preview client {client.id} connected ({kind}, {client.peer})")
+        try:
+            while not self._stop_event.is_set():
+                if closed is None:
+                    await self.frame.wait_newer(client.last_sequence)
+                else:
+                    newer = asyncio.ensure_future(self.frame.wait_newer(client.last_sequence))
+                    await asyncio.wait({newer, closed}, return_when=asyncio.FIRST_COMPLETED)
+                    if closed.done():
+                        newer.cancel()
+                        break
+                frame = self.frame
+                if client.last_sequence:
+                    client.skipped += frame.sequence - client.last_sequence - 1
+                client.last_sequence = frame.sequence
+                jpeg = frame.jpeg
+                # Every client references the same bytes object; nothing is copied per client
+                for part in frame_parts(jpeg):
+                    writer.write(part)
+                try:
+                    await asyncio.wait_for(writer.drain(), timeout)
+                except asyncio.TimeoutError:
+                    self.clients_dropped += 1
+                    self.warn(f"Preview client {client.id} stalled for {timeout}s, disconnecting")
+                    break
+                client.sent += 1
+                client.bytes_sent += len(jpeg)
+                client.lag_ms = (time.monotonic() - frame.encoded_at) * 1000.0
+        except ConnectionError:
+            pass
+        finally:
+            if closed is not None and not closed.done():
+                closed.cancel()
+            del self.clients[client.id]
+            self.info(f"Preview client {client.id} disconnected after {client.sent} frames")
+
+    # Status ----------------------------------------------------------------
+
+    def _get_queue_size(self) -> int:
+        return len(self.clients)
+
+    def _get_status(self) -> dict:
+        return {
+            "module_id": self.module_id,
+            "clients": [client.stats() for client in self.clients.values()],
+            "clients_dropped": self.clients_dropped,
+            "frames_received": self.frames_received,
+            "frames_encoded": self.frames_encoded,
+            "frames_passthrough": self.frames_passthrough,
+            "frames_skipped": self.frames_skipped,
+            "frame_bytes": len(self.frame.jpeg) if self.frame else 0,
+            "max_size": list(self.max_size),
+            "max_fps": self.preview_config["max_fps"],
+        }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dashcam Web Interface Module")
+    parser.add_argument("--config", "-c", help="Configuration file path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    module = WebInterface(load_config(args.config))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, module.request_stop)
+        await module.run_async()
+
+    asyncio.run(run())
+    module.log_transport.flush()
+    print("Web interface shutdown complete")
+
+
+if __name__ == "__main__":
+    main()
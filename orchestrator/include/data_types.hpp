@@ -85,6 +85,7 @@ enum class ModuleType{
     StreamEncoder,
     WebInterface,
     Orchestrator,
+    Sensor,
 };
 
 enum class Languages{